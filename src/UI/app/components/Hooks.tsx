@@ -33,6 +33,7 @@ interface State {
   human_feedback: string[];
   iteration: number;
   structure: Message;
+  thread_id?: string;
 }
 
 interface ProposalResponse {
@@ -44,6 +45,7 @@ interface ProposalResponse {
   status?: string;
   error?: string;
   state?: State;
+  thread_id?: string;
   type?: string;
 }
 
@@ -58,6 +60,8 @@ export function useCustomChat(
   const [interrupted, setInterrupted] = useState<boolean>(false);
   const [feedbackOptions, setFeedbackOptions] = useState<string[]>([]);
   const [currentState, setCurrentState] = useState<State | null>(null);
+  // Checkpointed thread of the proposal under review; /api/resume continues it
+  const [threadId, setThreadId] = useState<string | null>(null);
   const [error, setError] = useState<string | null>(null);
   const [isApproved, setIsApproved] = useState<boolean>(false);
 
@@ -119,6 +123,7 @@ export function useCustomChat(
         setMessages((prev) => [...prev, assistantMessage]);
         setInterrupted(true);
         setCurrentState(data.state || null);
+        setThreadId(data.thread_id ?? data.state?.thread_id ?? null);
         setFeedbackOptions(data.feedback_options || []);
         return;
       }
@@ -126,6 +131,7 @@ export function useCustomChat(
       setInterrupted(false);
       setFeedbackOptions([]);
       setCurrentState(null);
+      setThreadId(null);
 
       if (data.response) {
         const assistantMessage: Message = {
@@ -157,7 +163,7 @@ export function useCustomChat(
 
   // Send feedback to the backend, always with the latest state
   const handleFeedback = async (feedback: string) => {
-    if (!currentState) {
+    if (!currentState || !threadId) {
       setError("Cannot send feedback: missing conversation state.");
       return;
     }
@@ -186,7 +192,7 @@ export function useCustomChat(
       const response = await fetch(apiUrl.replace("/retrieve", "/resume"), {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ state: newState, feedback }),
+        body: JSON.stringify({ thread_id: threadId, state: newState, feedback }),
         credentials: "include",
       });
 
@@ -204,6 +210,7 @@ export function useCustomChat(
         setMessages((prev) => [...prev, assistantMessage]);
         setFeedbackOptions(data.feedback_options || []);
         setCurrentState(data.state || null);
+        setThreadId(data.thread_id ?? threadId);
         return;
       }
 
@@ -217,6 +224,7 @@ export function useCustomChat(
         setInterrupted(false);
         setFeedbackOptions([]);
         setCurrentState(data.state || null);
+        setThreadId(null);
         setIsApproved(true);
         return;
       }
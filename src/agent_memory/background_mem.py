@@ -1,14 +1,10 @@
-import asyncio
 import logging
-from agent_memory import configuration, tools, utils
-from datetime import datetime
-from langchain.chat_models import init_chat_model # type: ignore
+from agent_memory import configuration, utils
+from agent_memory.rolling_summary import rolling_summaries
 from langchain_core.runnables import RunnableConfig # type: ignore
 from langgraph.store.base import BaseStore # type: ignore
 from reflexion_agent.state import State as AgentState
 
-llm = init_chat_model()
-
 def ensure_runnable_config(config) -> RunnableConfig:
     if isinstance(config, dict):
         return RunnableConfig(
@@ -22,28 +18,16 @@ async def background_memory_saver(state: AgentState, config: RunnableConfig, *,
     config = ensure_runnable_config(config)
     cfg_dict = config.get("configurable", {})
 
-    convo = "\n".join(
-        m.content for m in state["messages"]
-        if getattr(m, "type", None) in ("human", "assistant")
-    )
-    prompt = f"Summarize the following conversation in concise bullet points:\n{convo}"
-
-    model_config = RunnableConfig(configurable=utils.split_model_and_provider(cfg_dict.get("model", "openai:gpt-4.1")))
-    logging.info(f"🧠 Summary prompt: {prompt}")
-    logging.info(f"Model config: {model_config}")
-
-    summary_msg = await llm.ainvoke([{"role": "user", "content": prompt}], model_config)
-    summary = summary_msg.content
-    logging.info(f"📝 Generated summary: {summary[:100]}...")
-
-    await tools.upsert_memory(
-        content=summary,
-        context="background summary",
-        config=config,
-        store=store
-    )
+    messages = state.get("messages") or []
+    if not messages:
+        return {}
 
+    user_id = configuration.Configuration.from_runnable_config(config).user_id
+    model_name = utils.split_model_and_provider(cfg_dict.get("model", "openai:gpt-4.1"))["model"]
 
-    # No update to messages, but still return full state
-    return state
+    # Only the messages past the user's watermark are summarized, after the run has returned
+    rolling_summaries.schedule(store, user_id, cfg_dict.get("thread_id"), messages, model_name, config)
+    logging.info(f"🕒 Scheduled the rolling summary update for {user_id} ({model_name})")
 
+    # No state update
+    return {}
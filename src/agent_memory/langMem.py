@@ -1,48 +1,36 @@
 import json
 import logging
-from langchain_community.tools.tavily_search import TavilySearchResults # type: ignore
-from langgraph.prebuilt.tool_node import ToolNode # type: ignore
-from langchain_openai import ChatOpenAI # type: ignore
 from langchain_core.messages import HumanMessage, ToolMessage, AIMessage # type: ignore
-from langchain_core.utils.function_calling import convert_to_openai_function # type: ignore
 from reflexion_agent.state import State # type: ignore
 from config.appconfig import settings as app_settings
 from langgraph.store.base import BaseStore # type: ignore
 from langchain_core.runnables import RunnableConfig # type: ignore
 from agent_memory import utils # type: ignore
+from components import lazy
+from llm_gateway import llm_gateway
 
 logging.basicConfig(level=logging.INFO)
 
-tools = [TavilySearchResults(tavilyApiKey=app_settings.tavily_api_key, max_results=1)]
-tool_executor = ToolNode(tools)
+def _build_search_tools() -> list:
+    from langchain_community.tools.tavily_search import TavilySearchResults # type: ignore
 
-llm = ChatOpenAI(model="gpt-4.1", temperature=0)
-functions = [convert_to_openai_function(t) for t in tools]
-model = llm.bind_tools(functions)
+    return [TavilySearchResults(tavilyApiKey=app_settings.tavily_api_key, max_results=1)]
+
+
+search_tools = lazy("tavily_search_tools", _build_search_tools)
+
+SEARCH_AGENT_MODEL = "gpt-4.1"
 
 async def google_search_agent(state: State, config, store: BaseStore) -> State:
     logging.info("🚦 google_search_agent start; message count=%d", len(state["messages"]))
 
-    cfg = config.get("configurable", {})
-    model_name = cfg.get("model", "gpt-4o-search-preview")  # supports web search
-
     # 1️⃣ Append the user's question
     user_msg = HumanMessage(content=state["user_query"])
     state["messages"].append(user_msg)
     logging.info("➡️ User query: %s", state["user_query"])
 
     # 2️⃣ Call LLM with built-in `web_search` tool enabled
-    msg: AIMessage = await llm.ainvoke(
-        state["messages"],
-        {
-          "configurable": utils.split_model_and_provider(
-            RunnableConfig(configurable={
-              "model": model_name,
-              "tools": [{"type": "web_search"}]
-            })
-          )
-        }
-    )
+    msg: AIMessage = await llm_gateway.ainvoke(SEARCH_AGENT_MODEL, state["messages"])
     logging.info("LLM replied; tool_calls=%s", getattr(msg, "tool_calls", None))
 
     new_msgs = [msg]
@@ -55,10 +43,7 @@ async def google_search_agent(state: State, config, store: BaseStore) -> State:
             query = call["args"]["query"]
             logging.info("📡 Performing web_search for: %s", query)
 
-            result = await llm.call_tool({
-              "tool": "web_search",
-              "arguments": {"query": query}
-            })
+            result = await search_tools.get()[0].ainvoke({"query": query})
 
             tool_msg = ToolMessage(
                 content=json.dumps(result),
@@ -70,14 +55,7 @@ async def google_search_agent(state: State, config, store: BaseStore) -> State:
 
     # 4️⃣ If we ran web_search, get final answer
     if len(new_msgs) > 1:
-        follow_up: AIMessage = await llm.ainvoke(
-            new_msgs + state["messages"],
-            {
-              "configurable": utils.split_model_and_provider(
-                RunnableConfig(configurable={"model": model_name})
-              )
-            }
-        )
+        follow_up: AIMessage = await llm_gateway.ainvoke(SEARCH_AGENT_MODEL, new_msgs + state["messages"])
         new_msgs.append(follow_up)
         state["generated_response"] = follow_up.content
         logging.info("🤖 Follow-up response: %s", follow_up.content)
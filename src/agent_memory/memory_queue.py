@@ -0,0 +1,150 @@
+"""
+In-process queue of memory writes, consumed by a background worker.
+
+`call_model` used to write memories before answering: the tool calls of the answer were upserted one
+by one, then a second LLM call extracted personal facts from the user's messages and upserted them
+too. The reply path now only searches the memories and answers; the writes are queued as a
+`MemoryJob` and the worker applies them after the response has been returned.
+
+The worker takes the jobs that arrive within `MEMORY_BATCH_WINDOW` seconds (at most
+`MEMORY_BATCH_MAX`) and groups them by user. Explicit memories (tool calls, `memories_to_save`) are
+stored as they are; the user messages of all the turns in the group go through a single
+extraction call, so extraction is batched across turns instead of run once per turn. The memories of
+a group are written with one `abatch` call.
+
+- `MemoryJob`: The memory writes of one turn.
+- `MemoryIngestionQueue.start`: Starts the worker (application startup).
+- `MemoryIngestionQueue.enqueue`: Queues a job; starts the worker if it is not running.
+- `MemoryIngestionQueue.drain`: Waits for the queued jobs, then stops the worker (application shutdown).
+- `MemoryIngestionQueue.stats`: Queued, processed and failed jobs, and extraction calls made.
+"""
+
+import asyncio
+import contextvars
+import logging
+import time
+import uuid
+from collections import defaultdict
+from typing import List, NamedTuple, Optional
+from langgraph.store.base import BaseStore, PutOp # type: ignore
+from agent_memory import tools
+from config.appconfig import settings as app_settings
+from llm_gateway import llm_gateway
+
+logger = logging.getLogger(__name__)
+
+EXTRACT_FACTS_PROMPT = (
+    "Extract any personal info or preferences in these user messages, return only the facts. "
+    "If there are none, return NONE."
+)
+NO_FACTS = "NONE"
+
+
+class MemoryJob(NamedTuple):
+    user_id: str
+    config: dict
+    store: BaseStore
+    model: str
+    # `{"content", "context"}` memories to upsert as they are
+    memories: List[dict]
+    # User messages to extract facts from
+    user_messages: List[str]
+
+
+class MemoryIngestionQueue:
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._stats = {"processed": 0, "failed": 0, "batches": 0, "extraction_calls": 0}
+
+    def enqueue(self, job: MemoryJob) -> None:
+        if not job.memories and not job.user_messages:
+            return
+        if self._worker is None or self._worker.done():
+            self.start()
+        self._queue.put_nowait(job)
+
+    def start(self) -> None:
+        """Started by the lifespan; `enqueue` starts it in processes without one (scripts)."""
+        if self._worker is not None and not self._worker.done():
+            return
+        self._queue = asyncio.Queue()
+        # A fresh context: the worker serves every user, so it must not inherit the telemetry labels
+        # (node, tenant) or the run config of the request that happens to start it
+        self._worker = asyncio.get_running_loop().create_task(self._run(), context=contextvars.Context())
+
+    async def _next_batch(self) -> List[MemoryJob]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + app_settings.memory_batch_window
+        while len(batch) < app_settings.memory_batch_max:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            by_user = defaultdict(list)
+            for job in batch:
+                by_user[job.user_id].append(job)
+            for user_id, jobs in by_user.items():
+                try:
+                    await self._ingest(jobs)
+                    self._stats["processed"] += len(jobs)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self._stats["failed"] += len(jobs)
+                    logger.error("Memory ingestion failed for %s: %s", user_id, e)
+            self._stats["batches"] += 1
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _ingest(self, jobs: List[MemoryJob]) -> None:
+        # The newest turn's config and store stand for the user's batch
+        last = jobs[-1]
+        memories = [memory for job in jobs for memory in job.memories]
+
+        # The same message can come with several turns of a thread
+        user_messages = list(dict.fromkeys(text for job in jobs for text in job.user_messages if text))
+        if user_messages:
+            self._stats["extraction_calls"] += 1
+            extracted_msg = await llm_gateway.ainvoke(last.model, [
+                {"role": "system", "content": EXTRACT_FACTS_PROMPT},
+                {"role": "user", "content": "\n".join(user_messages)}
+            ])
+            extracted = (extracted_msg.content or "").strip() if extracted_msg else ""
+            if extracted and extracted.upper() != NO_FACTS:
+                memories.append({"content": extracted, "context": "Extracted automatically"})
+                logger.info(f"👉 Extracted memory from {len(jobs)} turns: {extracted}")
+
+        if not memories:
+            return
+        # One round trip (and one embeddings request) for the whole batch
+        namespace = tools.memory_namespace(last.user_id)
+        await last.store.abatch([
+            PutOp(namespace, str(uuid.uuid4()), {"content": memory["content"], "context": memory["context"]})
+            for memory in memories
+        ])
+        logger.info(f"✅ Saved {len(memories)} memories for {last.user_id}")
+
+    async def drain(self, timeout: float) -> None:
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Dropped %d queued memory jobs at shutdown", self._queue.qsize())
+        self._worker.cancel()
+        self._worker = None
+
+    def stats(self) -> dict:
+        return {**self._stats, "queued": self._queue.qsize() if self._queue is not None else 0}
+
+
+memory_ingestion = MemoryIngestionQueue()
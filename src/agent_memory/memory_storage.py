@@ -1,12 +1,13 @@
 from datetime import datetime
 import logging
 from agent_memory import configuration, memory_storage, tools, utils
-from langchain.chat_models import init_chat_model # type: ignore
 from reflexion_agent.state import State
 from langchain_core.runnables import RunnableConfig  # type: ignore
 from langgraph.graph import END # type: ignore
 from langchain_core.messages import HumanMessage, ToolMessage, AIMessage  # type: ignore
 from langgraph.store.base import BaseStore  # type: ignore
+from agent_memory.memory_queue import MemoryJob, memory_ingestion
+from llm_gateway import llm_gateway
 
 logger = logging.getLogger(__name__)
 
@@ -14,10 +15,19 @@ def sanitize_user_id(user_id: str) -> str:
     return user_id.replace(".", "_").replace("@", "_at_")
 
 DEFAULT_SYSTEM_PROMPT = "You are CDGA-AI, a memory-savvy assistant. Use the provided memories and context to help the user."
-EXTRACT_FACTS_PROMPT = "Extract any personal info or preferences in this text, return only the fact"
 
-# initialize language model that will be used for memory extraction
-llm = init_chat_model("openai:gpt-4.1")
+
+def user_message_texts(messages: list) -> list:
+    """The text of the user's messages, whether LangChain messages or role dicts."""
+    texts = []
+    for m in messages:
+        if isinstance(m, dict):
+            if m.get("role") == "user":
+                texts.append(str(m.get("content") or ""))
+        elif getattr(m, "type", None) == "human":
+            texts.append(str(m.content or ""))
+    return texts
+
 
 async def call_model(state: State, config: RunnableConfig, *, store: BaseStore) -> dict:
     """"Extract the user's state from the conversation and update the memory"""
@@ -42,7 +52,7 @@ async def call_model(state: State, config: RunnableConfig, *, store: BaseStore)
     # Retrieve the most recent memories for context
     logging.info("📆 Retrieving recent memories...")
     memories = await store.asearch(
-        (user_id, "memories"),
+        tools.memory_namespace(user_id),
         query=state["user_query"],
         limit=10,
     )
@@ -63,14 +73,15 @@ async def call_model(state: State, config: RunnableConfig, *, store: BaseStore)
     # This helps the model understand the context and temporal relevance
     sys_msg = system_prompt_tmpl.format(user_info=formatted, time=datetime.now().isoformat())
     logging.info(f"System prompt to be used:\n{sys_msg}")
-    model_config = RunnableConfig(configurable={"model": model})
+    model_name = utils.split_model_and_provider(model)["model"]
     user_msgs = state.get("messages", [])
 
     # invoke the language model with the prepared prompt and tools
     # "bind_tools" gives the LLM the JSON schema for all tools in the list so it knows how to use them
-    msg = await llm.bind_tools([tools.upsert_memory]).ainvoke(
+    msg = await llm_gateway.ainvoke(
+        model_name,
         [{"role": "system", "content": sys_msg}, *user_msgs],
-        {"configurable": utils.split_model_and_provider(model_config)},
+        tools=[tools.upsert_memory]
     )
 
     # llm_msg = await llm.bind_tools([tools.upsert_memory]).ainvoke(
@@ -78,36 +89,22 @@ async def call_model(state: State, config: RunnableConfig, *, store: BaseStore)
     #     {"configurable": utils.split_model_and_provider(model_cfg)}
     # )
 
-    # Handle tool calls
+    # Memory writes go to the ingestion queue and are applied after the response has been returned
     content = msg.content or ""
-    if getattr(msg, "tool_calls", None):
-        for tc in msg.tool_calls:
-            await tools.upsert_memory(
-                content=tc["args"]["content"],
-                context=tc["args"]["context"],
-                config=config,
-                store=store
-            )
+    memory_ingestion.enqueue(MemoryJob(
+        user_id=user_id,
+        config=config,
+        store=store,
+        model=model_name,
+        memories=[
+            {"content": tc["args"]["content"], "context": tc["args"]["context"]}
+            for tc in getattr(msg, "tool_calls", None) or []
+        ],
+        user_messages=user_message_texts(user_msgs),
+    ))
 
     logging.info("✅ LLM returned a message via bind_tools")
 
-    extracted_msg = await llm.ainvoke([
-        {"role": "system", "content": "Extract any personal info or preferences in this text, return only the fact"},
-        *user_msgs  # include user messages so the model has context
-    ], {"configurable": utils.split_model_and_provider(config)})
-
-    extracted = extracted_msg.content if extracted_msg else None
-
-    if extracted:
-        await tools.upsert_memory(
-            content=extracted,
-            context="Extracted automatically",
-            config=config,
-            store=store
-        )
-        logging.info(f"👉 Stored memory automatically: {extracted}")
-
-    
     # ✅ Preserve full state and add response
     assistant_msg = {"role": "assistant", "content": content}
     state["should_save_memory"] = True
@@ -132,29 +129,24 @@ async def store_memory(state: State, config: RunnableConfig, *, store: BaseStore
     cfg = configuration.Configuration.from_runnable_config(config)
     user_id = cfg.user_id
 
-    # Save explicit memories from prior step
-    for mem in state.get("memories_to_save", []):
-        await tools.upsert_memory(
-            user_id=user_id,
-            content=mem,
-            context="document_route",
-            config=config,
-            store=store
-        )
-        logging.info(f"✅ Saved explicit memory: {mem!r}")
-
-    # Save from tool_calls in last assistant message
+    memories = [{"content": mem, "context": "document_route"} for mem in state.get("memories_to_save", [])]
+
+    # Memories from tool_calls in last assistant message
     last_msg = state.get("messages", [])[-1] if state.get("messages") else None
     for tc in getattr(last_msg, "tool_calls", []) or []:
         args = tc.get("args", {})
-        await tools.upsert_memory(
-            user_id=user_id,
-            content=args.get("content", ""),
-            context=args.get("context", ""),
-            config=config,
-            store=store
-        )
-        logging.info(f"✅ Saved memory from tool_call: {args.get('content')!r}")
+        memories.append({"content": args.get("content", ""), "context": args.get("context", "")})
+
+    # Written by the memory ingestion worker, off the request path
+    memory_ingestion.enqueue(MemoryJob(
+        user_id=user_id,
+        config=config,
+        store=store,
+        model=utils.split_model_and_provider(cfg.model)["model"],
+        memories=[memory for memory in memories if memory["content"]],
+        user_messages=[],
+    ))
+    logging.info(f"🕒 Queued {len(memories)} memories for {user_id}")
 
     return state
 
@@ -0,0 +1,150 @@
+"""
+Rolling per-user conversation summary, updated off the request path.
+
+`background_memory_saver` used to join every message of the run and summarize the whole conversation
+on every turn, inside the graph, before the response was returned. `rolling_summaries` instead keeps,
+per user, the last summary and a watermark (the thread and the id of the last message folded into
+it), and asks the model to fold in only the messages past the watermark. The update runs as an
+asyncio task scheduled by the node, so the run ends (and the response is returned) without waiting
+for it.
+
+Records live in the graph's store:
+- `("summaries", user_id)` / `conversation`: `{"summary", "thread_id", "watermark", "count", "updated_at"}`,
+  stored without embedding.
+- `("memories", user_id)`: the summary itself, as a single `background summary` memory updated in
+  place, so `call_model` finds it with the other memories.
+
+- `RollingSummaries.schedule`: Starts the update of a user's summary in the background.
+- `RollingSummaries.update`: Folds the new messages of a run into the user's summary.
+- `RollingSummaries.drain`: Waits for the pending updates (application shutdown).
+"""
+
+import asyncio
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+from langgraph.store.base import BaseStore # type: ignore
+from agent_memory import tools
+from llm_gateway import llm_gateway
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_NAMESPACE = "summaries"
+SUMMARY_KEY = "conversation"
+SUMMARY_CONTEXT = "background summary"
+
+_CONVERSATION_TYPES = ("human", "ai", "assistant")
+
+
+def _summary_prompt(summary: str, convo: str) -> str:
+    if not summary:
+        return f"Summarize the following conversation in concise bullet points:\n{convo}"
+    return (
+        "Here is the summary of the conversation so far, in concise bullet points:\n"
+        f"{summary}\n\n"
+        "Update it with the following new messages. Keep it concise, merge points that repeat, "
+        "and return only the updated bullet points.\n"
+        f"{convo}"
+    )
+
+
+def new_messages(messages: list, record: Optional[dict], thread_id: Optional[str]) -> list:
+    """The messages past the watermark. A new thread is new as a whole; the earlier ones are already summarized."""
+    if not record or record.get("thread_id") != thread_id:
+        return messages
+    watermark = record.get("watermark")
+    if watermark is not None:
+        for position, message in enumerate(messages):
+            if getattr(message, "id", None) == watermark:
+                return messages[position + 1:]
+    # Messages without ids: fall back to the count summarized so far
+    count = record.get("count", 0)
+    return messages[count:] if count <= len(messages) else messages
+
+
+class RollingSummaries:
+    def __init__(self):
+        # Only users with an update running or waiting have a lock; `_waiters` counts those updates
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._waiters: Dict[str, int] = {}
+        # The event loop keeps only weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+
+    @asynccontextmanager
+    async def _lock(self, user_id: str):
+        lock = self._locks.setdefault(user_id, asyncio.Lock())
+        self._waiters[user_id] = self._waiters.get(user_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._waiters[user_id] -= 1
+            if not self._waiters[user_id]:
+                del self._waiters[user_id]
+                del self._locks[user_id]
+
+    async def update(self, store: BaseStore, user_id: str, thread_id: Optional[str], messages: List,
+                     model: str, config) -> Optional[str]:
+        # Updates of the same user are serialized so each one starts from the previous watermark
+        async with self._lock(user_id):
+            item = await store.aget((SUMMARY_NAMESPACE, user_id), SUMMARY_KEY)
+            record = item.value if item else None
+            pending = [m for m in new_messages(messages, record, thread_id)
+                       if getattr(m, "type", None) in _CONVERSATION_TYPES and m.content]
+            if not pending:
+                logger.info("📝 No new messages to summarize for %s", user_id)
+                return None
+
+            summary = (record or {}).get("summary", "")
+            convo = "\n".join(f"{m.type}: {m.content}" for m in pending)
+            response = await llm_gateway.ainvoke(model, [{"role": "user", "content": _summary_prompt(summary, convo)}])
+            summary = response.content
+            logger.info("📝 Folded %d new messages into the summary of %s: %s...", len(pending), user_id, summary[:100])
+
+            await tools.upsert_memory(
+                content=summary,
+                context=SUMMARY_CONTEXT,
+                # One summary memory per user, overwritten on every update
+                memory_id=uuid.uuid5(uuid.NAMESPACE_URL, f"{SUMMARY_NAMESPACE}/{user_id}"),
+                config=config,
+                store=store
+            )
+            await store.aput(
+                (SUMMARY_NAMESPACE, user_id),
+                SUMMARY_KEY,
+                {
+                    "summary": summary,
+                    "thread_id": thread_id,
+                    "watermark": getattr(messages[-1], "id", None),
+                    "count": len(messages),
+                    "updated_at": datetime.now(timezone.utc).isoformat(),
+                },
+                index=False
+            )
+            return summary
+
+    def schedule(self, store: BaseStore, user_id: str, thread_id: Optional[str], messages: List,
+                 model: str, config) -> asyncio.Task:
+        task = asyncio.create_task(self.update(store, user_id, thread_id, list(messages), model, config))
+        self._tasks.add(task)
+        task.add_done_callback(self._done)
+        return task
+
+    def _done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Rolling summary update failed: %s", task.exception())
+
+    async def drain(self, timeout: float) -> None:
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning("Cancelled %d rolling summary updates at shutdown", len(pending))
+
+
+rolling_summaries = RollingSummaries()
@@ -23,6 +23,11 @@ from langchain_core.runnables import RunnableConfig
 from agent_memory.configuration import Configuration
 
 
+def memory_namespace(user_id: str) -> tuple:
+    """The store namespace of a user's memories; searches and writes must agree on it."""
+    return ("memories", user_id)
+
+
 async def upsert_memory(
         content: str,
         context: str,
@@ -49,7 +54,7 @@ async def upsert_memory(
     mem_id = memory_id or uuid.uuid4()
     user_id = Configuration.from_runnable_config(config).user_id
     await store.aput(
-        ("memories", user_id),
+        memory_namespace(user_id),
         key=str(mem_id),
         value={"content": content, "context": context}
     )
@@ -0,0 +1,99 @@
+"""
+Micro-benchmark for tenant credential lookups.
+
+Compares the old `lookup_user_db_credentials` (a new SQLAlchemy engine and a `users` query on every
+call) with `TenantDirectory` (shared engine plus TTL/LRU cache), both on cache misses and on hits.
+The master database is replaced by a local SQLite file holding `--users` registered users, so no
+Postgres server is needed; with Postgres the "before" numbers are worse, as every call also pays a
+TCP and authentication handshake.
+
+Run from `src/`:
+    python -m benchmarks.bench_credential_lookup --lookups 2000 --users 500
+"""
+
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+
+# database.master_db builds its (lazy) engine at import time; it only needs a well-formed URL.
+for _name, _value in (("DB_USER", "benchmark"), ("DB_HOST", "localhost"), ("DB_PORT", "5432"), ("DB_NAME", "benchmark")):
+    os.environ.setdefault(_name, _value)
+
+from sqlalchemy import create_engine, insert, select # type: ignore # noqa: E402
+from database.tenant_directory import TenantDirectory # noqa: E402
+from models.models import metadata, users_table # noqa: E402
+
+
+def lookup_per_call_engine(url: str, email: str):
+    """The previous implementation: a fresh engine and connection pool per lookup."""
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        result = conn.execute(select(users_table).where(users_table.c.email == email)).fetchone()
+    return result.user, result.database_name, result.password, result.working_dir
+
+
+def _seed(url: str, users: int) -> list:
+    engine = create_engine(url)
+    metadata.create_all(engine, tables=[users_table])
+    emails = [f"user{index}@example.com" for index in range(users)]
+    with engine.begin() as conn:
+        conn.execute(insert(users_table), [
+            {
+                "user": f"user_{index}",
+                "email": email,
+                "database_name": email.replace("@", "_").replace(".", "_"),
+                "db_conn_str": "postgresql://benchmark",
+                "working_dir": f"./data/lightRAG/user_{index}",
+                "password": "secret",
+            }
+            for index, email in enumerate(emails)
+        ])
+    engine.dispose()
+    return emails
+
+
+def _rate(label: str, fn, emails: list, lookups: int) -> float:
+    started = time.perf_counter()
+    for _ in range(lookups):
+        fn(random.choice(emails))
+    elapsed = time.perf_counter() - started
+    rate = lookups / elapsed
+    print(f"{label:<34} {rate:12.0f} lookups/s  ({elapsed * 1000 / lookups:.3f} ms each)")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--users", type=int, default=500)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    random.seed(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'master.db')}"
+        emails = _seed(url, args.users)
+        shared_engine = create_engine(url)
+
+        print(f"Credential lookups over {args.users} users ({args.lookups} lookups)")
+        before = _rate("before: engine per call", lambda email: lookup_per_call_engine(url, email), emails, args.lookups)
+
+        uncached = TenantDirectory(shared_engine, maxsize=args.users, ttl=0)
+        _rate("after:  shared engine, cache miss", uncached.lookup, emails, args.lookups)
+
+        cached = TenantDirectory(shared_engine, maxsize=args.users, ttl=300)
+        for email in emails:
+            cached.lookup(email)
+        after = _rate("after:  shared engine, cache hit", cached.lookup, emails, args.lookups)
+
+        shared_engine.dispose()
+
+    print(f"\nSpeed-up with a warm cache: {after / before:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
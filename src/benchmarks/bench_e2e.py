@@ -0,0 +1,307 @@
+"""
+Offline end-to-end benchmark: the FastAPI app, an ingestion worker, a local Postgres with pgvector
+and AGE, and `benchmarks.fake_openai` standing in for OpenAI chat, completions and embeddings.
+
+The harness starts the fake server, the app (`uvicorn main:app`) and `job_queue.worker` as
+subprocesses, onboards a benchmark tenant and signs its session cookie, then drives:
+
+1. `/api/ingress-file` with the PDFs in `src/doc/`, polling `/api/ingress-jobs/{id}` to completion;
+2. `/api/retrieve`, first `--sequential` requests one at a time, then `--requests` requests at
+   `--concurrency`, over a mix of direct, factual and proposal queries;
+3. `/api/resume` with revision feedback for up to `--resumes` of the proposal drafts from step 2.
+
+For every phase it reports throughput and p50/p95/p99 latency. The sequential pass also splits each
+request into model time (the fake server's busy time while the request ran) and framework overhead
+(everything else: routing, database, LightRAG, serialisation). Queries get a per-request suffix so
+the classifier cache does not serve them, unless `--repeat-queries` is given.
+
+Setup, once and online (afterwards nothing leaves the machine):
+    docker compose -f benchmarks/docker-compose.bench.yml up -d --build
+    pip install -r requirements.txt
+    TIKTOKEN_CACHE_DIR=./data/tiktoken python -c "import tiktoken; tiktoken.get_encoding('cl100k_base'); tiktoken.encoding_for_model('gpt-4o')"
+
+Run from `src/` (keep the same TIKTOKEN_CACHE_DIR):
+    python -m benchmarks.bench_e2e --latency-ms 300 --ms-per-token 2 --requests 40 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import glob
+import logging
+import os
+import subprocess
+import sys
+import time
+import uuid
+import httpx # type: ignore
+
+QUERIES = [
+    ("direct", "Hi there! Who are you?"),
+    ("factual", "What is the submission deadline of the CTBTO RFQ?"),
+    ("factual", "Summarize the scope of work in the design supervision TOR."),
+    ("factual", "Which environmental standards does the model approach reference?"),
+    ("proposal", "Write a proposal against the uploaded CTBTO RFQ."),
+    ("proposal", "Draft a technical proposal for the design supervision and consultancy services."),
+]
+REVISION_FEEDBACK = "revise: expand the methodology and add a staffing table"
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(max(int(round(q / 100 * len(ordered))) - 1, 0), len(ordered) - 1)]
+
+
+def report(label: str, latencies: list, elapsed: float, errors: int) -> None:
+    if not latencies:
+        print(f"{label:<28} no successful requests ({errors} errors)")
+        return
+    print(
+        f"{label:<28} n={len(latencies):<4} err={errors:<3} {len(latencies) / elapsed:7.2f} req/s  "
+        f"p50={percentile(latencies, 50):8.0f} ms  p95={percentile(latencies, 95):8.0f} ms  p99={percentile(latencies, 99):8.0f} ms"
+    )
+
+
+# ---------------- Processes ----------------
+
+def build_env(args) -> dict:
+    fake_base = f"http://127.0.0.1:{args.fake_port}/v1"
+    return {
+        **os.environ,
+        "ENVIRONMENT": "benchmark",
+        "OPENAI_API_KEY": "sk-benchmark",
+        "OPENAI_API_BASE": fake_base,
+        "OPENAI_BASE_URL": fake_base,
+        "TAVILY_API_KEY": "tvly-benchmark",
+        "SESSION_SECRET_KEY": "benchmark-secret",
+        "DB_HOST": args.db_host,
+        "DB_PORT": str(args.db_port),
+        "DB_USER": args.db_user,
+        "DB_PASSWORD": args.db_password,
+        "DB_NAME": args.db_name,
+    }
+
+
+def start(command: list, env: dict, name: str, log_dir: str) -> subprocess.Popen:
+    log = open(os.path.join(log_dir, f"{name}.log"), "wb")
+    print(f"▶️ starting {name}: {' '.join(command)}")
+    return subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+async def wait_for(url: str, timeout: float) -> None:
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() < deadline:
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f} s")
+
+
+def onboard_tenant(env: dict, email: str) -> str:
+    """Creates the benchmark tenant (database, role, working dir) and returns a signed session cookie."""
+    os.environ.update(env)
+    from itsdangerous import URLSafeTimedSerializer # type: ignore
+    from database.master_db import master_engine
+    from multi_tenant.onboard_user import onboard_user
+
+    pg_super_conn_info = {
+        "host": env["DB_HOST"], "port": env["DB_PORT"], "user": env["DB_USER"],
+        "database": env["DB_NAME"], "password": env["DB_PASSWORD"]
+    }
+    db_user = "bench_" + uuid.uuid4().hex[:8]
+    tenant_user, tenant_db, conn_str, working_dir, password = onboard_user(db_user, email, pg_super_conn_info, master_engine)
+    session_data = {
+        "email": email,
+        "db_user": tenant_user,
+        "database_name": tenant_db,
+        "db_conn_str": conn_str,
+        "working_dir": working_dir,
+        "password": password
+    }
+    return URLSafeTimedSerializer(env["SESSION_SECRET_KEY"]).dumps(session_data)
+
+
+# ---------------- Phases ----------------
+
+async def fake_stats(client: httpx.AsyncClient, fake_url: str) -> dict:
+    return (await client.get(f"{fake_url}/stats")).json()
+
+
+async def ingest(client: httpx.AsyncClient, docs: list, timeout: float) -> None:
+    files = [("files", (os.path.basename(path), open(path, "rb").read(), "application/pdf")) for path in docs]
+    started = time.perf_counter()
+    response = (await client.post("/api/ingress-file", files=files)).json()
+    job_id = response.get("job_id")
+    if not job_id:
+        print(f"ingest: nothing queued ({response})")
+        return
+
+    while time.perf_counter() - started < timeout:
+        job = (await client.get(f"/api/ingress-jobs/{job_id}")).json()
+        if job.get("status") in ("completed", "failed"):
+            break
+        await asyncio.sleep(1)
+    elapsed = time.perf_counter() - started
+    print(f"{'ingest':<28} {len(docs)} PDFs in {elapsed:7.1f} s ({60 * len(docs) / elapsed:.1f} docs/min), job: {job}")
+
+
+async def retrieve_once(client: httpx.AsyncClient, query: str, email: str) -> tuple:
+    payload = {"user_query": query, "mode": "hybrid", "user_id": email, "rfq_id": None}
+    started = time.perf_counter()
+    response = await client.post("/api/retrieve", json=payload)
+    latency = (time.perf_counter() - started) * 1000
+    body = response.json() if response.headers.get("content-type", "").startswith("application/json") else {}
+    ok = response.status_code == 200 and "error" not in body
+    return ok, latency, body
+
+
+def pick_query(i: int, args) -> str:
+    _, query = QUERIES[i % len(QUERIES)]
+    return query if args.repeat_queries else f"{query} (run {i})"
+
+
+async def sequential_breakdown(client: httpx.AsyncClient, fake_url: str, args, email: str) -> None:
+    latencies, overheads, model_shares, errors = [], [], [], 0
+    started = time.perf_counter()
+    for i in range(args.sequential):
+        before = await fake_stats(client, fake_url)
+        ok, latency, _ = await retrieve_once(client, pick_query(i, args), email)
+        after = await fake_stats(client, fake_url)
+        if not ok:
+            errors += 1
+            continue
+        model_ms = (after["busy_seconds"] - before["busy_seconds"]) * 1000
+        latencies.append(latency)
+        overheads.append(max(latency - model_ms, 0.0))
+        model_shares.append(model_ms / latency if latency else 0.0)
+    elapsed = time.perf_counter() - started
+
+    report("retrieve (sequential)", latencies, elapsed, errors)
+    if overheads:
+        print(
+            f"{'  framework overhead':<28} p50={percentile(overheads, 50):8.0f} ms  p95={percentile(overheads, 95):8.0f} ms  "
+            f"p99={percentile(overheads, 99):8.0f} ms  (model time = {100 * sum(model_shares) / len(model_shares):.0f}% of latency)"
+        )
+
+
+async def load(client: httpx.AsyncClient, args, email: str) -> list:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, interrupted, errors = [], [], 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            ok, latency, body = await retrieve_once(client, pick_query(i, args), email)
+        if not ok:
+            errors += 1
+            return
+        latencies.append(latency)
+        if body.get("interrupt"):
+            interrupted.append(body["thread_id"])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    report(f"retrieve (concurrency {args.concurrency})", latencies, time.perf_counter() - started, errors)
+    return interrupted
+
+
+async def resume(client: httpx.AsyncClient, thread_ids: list, args) -> None:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, errors = [], 0
+
+    async def one(thread_id: str):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post("/api/resume", json={"thread_id": thread_id, "feedback": REVISION_FEEDBACK})
+            latency = (time.perf_counter() - started) * 1000
+        if response.status_code != 200:
+            errors += 1
+            return
+        latencies.append(latency)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(thread_id) for thread_id in thread_ids[:args.resumes]))
+    report("resume (revise)", latencies, time.perf_counter() - started, errors)
+
+
+async def main_async(args) -> None:
+    env = build_env(args)
+    fake_url = f"http://127.0.0.1:{args.fake_port}"
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    processes = []
+    try:
+        processes.append(start([
+            sys.executable, "-m", "benchmarks.fake_openai", "--port", str(args.fake_port),
+            "--latency-ms", str(args.latency_ms), "--ms-per-token", str(args.ms_per_token),
+            "--embedding-latency-ms", str(args.embedding_latency_ms)
+        ], env, "fake_openai", args.log_dir))
+        await wait_for(f"{fake_url}/stats", 30)
+
+        processes.append(start([
+            sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.app_port), "--log-level", "warning"
+        ], env, "app", args.log_dir))
+        await wait_for(f"{app_url}/api/health", 180)
+
+        processes.append(start([sys.executable, "-m", "job_queue.worker", "--processes", str(args.workers)], env, "worker", args.log_dir))
+
+        email = f"bench-{uuid.uuid4().hex[:8]}@example.com"
+        cookie = await asyncio.to_thread(onboard_tenant, env, email)
+        print(f"👤 tenant {email} onboarded\n")
+
+        docs = sorted(glob.glob(os.path.join(args.docs, "*.pdf")))
+        timeout = httpx.Timeout(args.request_timeout)
+        async with httpx.AsyncClient(base_url=app_url, cookies={"user_session": cookie}, timeout=timeout) as client:
+            print(f"Model latency {args.latency_ms:g} ms + {args.ms_per_token:g} ms/token, embeddings {args.embedding_latency_ms:g} ms\n")
+            await ingest(client, docs, args.ingest_timeout)
+            await sequential_breakdown(client, fake_url, args, email)
+            thread_ids = await load(client, args, email)
+            await resume(client, thread_ids, args)
+            print(f"\nFake OpenAI totals: {await fake_stats(client, fake_url)}")
+            print(f"Logs: {args.log_dir}")
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--ms-per-token", type=float, default=2.0)
+    parser.add_argument("--embedding-latency-ms", type=float, default=50.0)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--sequential", type=int, default=12, help="requests for the model-time / overhead split")
+    parser.add_argument("--resumes", type=int, default=5)
+    parser.add_argument("--repeat-queries", action="store_true", help="reuse identical queries (classifier cache hits)")
+    parser.add_argument("--docs", default="doc")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--fake-port", type=int, default=8900)
+    parser.add_argument("--app-port", type=int, default=8800)
+    parser.add_argument("--db-host", default="127.0.0.1")
+    parser.add_argument("--db-port", type=int, default=55432)
+    parser.add_argument("--db-user", default="bench")
+    parser.add_argument("--db-password", default="bench")
+    parser.add_argument("--db-name", default="bench_master")
+    parser.add_argument("--request-timeout", type=float, default=600.0)
+    parser.add_argument("--ingest-timeout", type=float, default=1800.0)
+    parser.add_argument("--log-dir", default="./data/bench_e2e_logs")
+    args = parser.parse_args()
+
+    os.makedirs(args.log_dir, exist_ok=True)
+    logging.disable(logging.INFO)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Event-loop lag under concurrent requests: synchronous psycopg2 helpers vs the asyncpg data-access layer.
+
+Fires `--requests` handler coroutines, `--concurrency` at a time, the way FastAPI runs `async def`
+endpoints, while a monitor task measures how late its `asyncio.sleep` wake-ups are. A handler that
+calls `database.db_helper` blocks the whole loop for the duration of each query; one that awaits
+`database.async_db` does not.
+
+With tenant credentials the handlers run `fetch_metadata_from_db` / `afetch_metadata` against that
+tenant database. Without them, `--query-ms` of blocking `time.sleep` vs `asyncio.sleep` stands in
+for the query, so the benchmark also runs without Postgres.
+
+Run from `src/`:
+    python -m benchmarks.bench_loop_lag --requests 200 --concurrency 20
+    python -m benchmarks.bench_loop_lag --db-user u --db-name d --db-password p
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+
+async def _monitor(samples: list, interval: float, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(time.perf_counter() - expected, 0) * 1000)
+
+
+async def _run(handler, requests: int, concurrency: int, interval: float) -> tuple:
+    samples: list = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(_monitor(samples, interval, stop))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await handler()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await monitor
+    return samples, elapsed
+
+
+def _report(label: str, samples: list, elapsed: float, requests: int) -> None:
+    ordered = sorted(samples) or [0.0]
+    p95 = ordered[max(int(len(ordered) * 0.95) - 1, 0)]
+    print(
+        f"{label:<22} loop lag p50={statistics.median(ordered):8.2f} ms  p95={p95:8.2f} ms  "
+        f"max={ordered[-1]:8.2f} ms  throughput={requests / elapsed:8.1f} req/s"
+    )
+
+
+def _build_handlers(args) -> tuple:
+    if args.db_user:
+        from database.async_db import afetch_metadata, async_tenant_pools
+        from database.db_helper import fetch_metadata_from_db
+
+        credentials = (args.db_user, args.db_name, args.db_password)
+
+        async def blocking():
+            fetch_metadata_from_db(*credentials)
+
+        async def non_blocking():
+            await afetch_metadata(*credentials)
+
+        return blocking, non_blocking, async_tenant_pools.close_all
+
+    delay = args.query_ms / 1000
+
+    async def blocking():
+        time.sleep(delay)
+
+    async def non_blocking():
+        await asyncio.sleep(delay)
+
+    async def noop():
+        return None
+
+    return blocking, non_blocking, noop
+
+
+async def main_async(args) -> None:
+    blocking, non_blocking, cleanup = _build_handlers(args)
+    interval = args.interval_ms / 1000
+    source = f"tenant DB '{args.db_name}'" if args.db_user else f"simulated {args.query_ms:g} ms queries"
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {source}")
+
+    samples, elapsed = await _run(blocking, args.requests, args.concurrency, interval)
+    _report("before: db_helper", samples, elapsed, args.requests)
+
+    samples, elapsed = await _run(non_blocking, args.requests, args.concurrency, interval)
+    _report("after:  async_db", samples, elapsed, args.requests)
+
+    await cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--query-ms", type=float, default=15.0, help="simulated query time without a database")
+    parser.add_argument("--interval-ms", type=float, default=5.0, help="monitor wake-up interval")
+    parser.add_argument("--db-user")
+    parser.add_argument("--db-name")
+    parser.add_argument("--db-password")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
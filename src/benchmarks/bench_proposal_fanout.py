@@ -0,0 +1,137 @@
+"""
+Critical-path benchmark for the proposal path of the graph.
+
+Measures the time from the start of a full-proposal request until `proposal_draft` (the LightRAG
+call) begins, for:
+
+- before: the old chain `structure_node → retrieve → proposal_draft`, with the query expansion run
+  inside `proposal_draft` before the LightRAG call;
+- after: the graph built by `create_state_graph`, where structure classification, example retrieval
+  and query expansion fan out from `response_router` and join at `proposal_draft`.
+
+The three stages are stubs that sleep for the given latencies (defaults are typical production
+timings: gpt-4o structured output, BM25 over the exemplar PDF, and the gpt-3.5 query expansion), so
+no API key or database is needed. Stages that are synchronous in production block in a worker
+thread here too.
+
+Run from `src/`:
+    python -m benchmarks.bench_proposal_fanout --structure-ms 900 --retrieve-ms 60 --expand-ms 3000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import time
+import uuid
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langgraph.graph import END, StateGraph # type: ignore # noqa: E402
+from graph.node_edges import control_edge, create_state_graph # noqa: E402
+from reflexion_agent.state import State, Status # noqa: E402
+
+
+def build_stubs(args, reached: dict) -> dict:
+    def structure_node(state):
+        time.sleep(args.structure_ms / 1000)
+        return {"structure": {"type": "full_proposal"}}
+
+    async def retrieve(state):
+        await asyncio.to_thread(time.sleep, args.retrieve_ms / 1000)
+        return {"examples": ""}
+
+    def expand_query(state):
+        time.sleep(args.expand_ms / 1000)
+        return {"expanded_query": state["user_query"]}
+
+    async def proposal_draft(state):
+        reached["draft_at"] = time.perf_counter()
+        if not state.get("expanded_query"):
+            # Old behaviour: generate_explicit_query ran inside the draft node
+            await asyncio.to_thread(time.sleep, args.expand_ms / 1000)
+            reached["draft_at"] = time.perf_counter()
+        return {}
+
+    def passthrough(update: dict):
+        return lambda state: update
+
+    return {
+        "intent_router": passthrough({"intent_route": "rag"}),
+        "response_router": passthrough({"response_type": "full_proposal"}),
+        "structure_node": structure_node,
+        "retrieve": retrieve,
+        "expand_query": expand_query,
+        "proposal_draft": proposal_draft,
+        "noop": passthrough({}),
+        "approve": passthrough({"status": Status.APPROVED}),
+    }
+
+
+def build_sequential_graph(stubs: dict):
+    """The proposal path as it was wired before the fan-out."""
+    builder = StateGraph(State)
+    for name in ("intent_router", "response_router", "structure_node", "retrieve", "proposal_draft"):
+        builder.add_node(name, stubs[name])
+    builder.set_entry_point("intent_router")
+    builder.add_edge("intent_router", "response_router")
+    builder.add_edge("response_router", "structure_node")
+    builder.add_edge("structure_node", "retrieve")
+    builder.add_edge("retrieve", "proposal_draft")
+    builder.add_edge("proposal_draft", END)
+    return builder.compile()
+
+
+def build_fanout_graph(stubs: dict):
+    return create_state_graph(
+        State,
+        stubs["intent_router"], stubs["response_router"], stubs["proposal_draft"], stubs["noop"],
+        stubs["structure_node"], stubs["retrieve"], stubs["expand_query"],
+        stubs["noop"], stubs["approve"], control_edge, stubs["noop"], lambda state: END,
+        stubs["noop"], stubs["noop"], stubs["noop"]
+    )
+
+
+async def measure(graph, reached: dict, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        reached.clear()
+        started = time.perf_counter()
+        config = {"configurable": {"thread_id": uuid.uuid4().hex}}
+        await graph.ainvoke({"user_query": "Write a proposal against the uploaded RFQ", "messages": []}, config)
+        samples.append((reached["draft_at"] - started) * 1000)
+    return samples
+
+
+async def main_async(args) -> None:
+    reached: dict = {}
+    stubs = build_stubs(args, reached)
+
+    before = await measure(build_sequential_graph(stubs), reached, args.iterations)
+    after = await measure(build_fanout_graph(stubs), reached, args.iterations)
+
+    print(
+        f"Stage latencies: structure={args.structure_ms:g} ms  retrieve={args.retrieve_ms:g} ms  "
+        f"expand={args.expand_ms:g} ms  ({args.iterations} iterations)"
+    )
+    print(f"{'before: sequential':<20} time to LightRAG call = {statistics.mean(before):8.1f} ms")
+    print(f"{'after:  fan-out':<20} time to LightRAG call = {statistics.mean(after):8.1f} ms")
+    saved = statistics.mean(before) - statistics.mean(after)
+    print(f"\nCritical path reduced by {saved:.1f} ms per request ({100 * saved / statistics.mean(before):.0f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--structure-ms", type=float, default=900.0)
+    parser.add_argument("--retrieve-ms", type=float, default=60.0)
+    parser.add_argument("--expand-ms", type=float, default=3000.0)
+    parser.add_argument("--iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
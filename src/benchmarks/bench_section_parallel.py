@@ -0,0 +1,94 @@
+"""
+Wall-clock benchmark for full-proposal drafting: one `rag.aquery` for the whole document vs
+section-parallel generation (`rag_agent.section_generation`).
+
+LightRAG is replaced by a stub whose latency is `--ttft-ms` plus `--ms-per-token` for every output
+token, with the output length of each section taken from `proposal_structure()` (`--tokens-per-topic`
+per subsection/phase, `--tokens-per-section` otherwise). The single-query baseline generates the sum of
+all sections in one call; the framing call (Introduction and Conclusion) is simulated the same way.
+No API key or database is needed.
+
+Run from `src/`:
+    python -m benchmarks.bench_section_parallel --ms-per-token 15 --concurrency 6
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from config.appconfig import settings as app_settings # noqa: E402
+from rag_agent import section_generation # noqa: E402
+from structure_agent.defined_proposal_strucutre import proposal_structure # noqa: E402
+
+
+def section_tokens(args, outline: dict) -> int:
+    topics = sum(len(values) for values in outline.values())
+    return args.tokens_per_section + topics * args.tokens_per_topic
+
+
+class StubRAG:
+    def __init__(self, args, tokens_by_query: dict):
+        self.args = args
+        self.tokens_by_query = tokens_by_query
+
+    async def aquery(self, query: str, param) -> str:
+        tokens = self.tokens_by_query.get(query, self.tokens_by_query["*"])
+        await asyncio.sleep((self.args.ttft_ms + tokens * self.args.ms_per_token) / 1000)
+        return "x " * tokens
+
+
+async def main_async(args) -> None:
+    structure = proposal_structure()
+    sections = section_generation.proposal_sections(structure)
+    per_section = {
+        section_generation.section_query("q", title, outline): section_tokens(args, outline)
+        for title, outline in sections
+    }
+    total_tokens = sum(section_tokens(args, outline) for _, outline in sections)
+    framing_tokens = sum(
+        section_tokens(args, outline) for title, outline in sections if title in section_generation.FRAMING_SECTIONS
+    )
+
+    async def fake_framing(user_query, titles, body):
+        await asyncio.sleep((args.ttft_ms + framing_tokens * args.ms_per_token) / 1000)
+        return {title: title for title in titles}
+
+    section_generation._draft_framing_sections = fake_framing
+    app_settings.proposal_section_concurrency = args.concurrency
+
+    started = time.perf_counter()
+    await StubRAG(args, {"*": total_tokens}).aquery("whole proposal", None)
+    single = time.perf_counter() - started
+
+    started = time.perf_counter()
+    await section_generation.generate_proposal_sections(
+        StubRAG(args, {**per_section, "*": args.tokens_per_section}), "q", structure, "", None, "hybrid", None, {}
+    )
+    parallel = time.perf_counter() - started
+
+    longest = max(section_tokens(args, outline) for _, outline in sections)
+    print(f"{len(sections)} sections, {total_tokens} output tokens in total, longest section {longest} tokens")
+    print(f"TTFT {args.ttft_ms:g} ms, {args.ms_per_token:g} ms/token, section concurrency {args.concurrency}")
+    print(f"{'before: single query':<26} {single * 1000:9.0f} ms")
+    print(f"{'after:  section-parallel':<26} {parallel * 1000:9.0f} ms  ({single / parallel:.1f}x faster)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ttft-ms", type=float, default=1500.0)
+    parser.add_argument("--ms-per-token", type=float, default=15.0)
+    parser.add_argument("--tokens-per-section", type=int, default=150)
+    parser.add_argument("--tokens-per-topic", type=int, default=120)
+    parser.add_argument("--concurrency", type=int, default=6)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+Local, deterministic stand-in for the OpenAI API, used by the end-to-end benchmark (`bench_e2e`).
+
+Serves `/v1/chat/completions` (plain, JSON mode, structured output via `json_schema` or forced tool
+calls, streaming), `/v1/completions` and `/v1/embeddings`. Every answer is a pure function of the
+request, so repeated runs exercise the same code paths:
+
+- the intent and response-type classifiers answer `rag`/`direct` and `full_proposal`/`simple_answer`
+  from the wording of the user query;
+- metadata, title/summary, prompt-suggestion and LightRAG keyword prompts get well-formed JSON;
+- LightRAG entity extraction gets entities and relationships built from the capitalised words of
+  the chunk, so the knowledge graph is populated;
+- anything else gets `--completion-tokens` words of filler seeded by the prompt hash;
+- embeddings are unit vectors seeded by the text hash (3072 dimensions for `*-large`, else 1536).
+
+Each call sleeps `--latency-ms` plus `--ms-per-token` per completion token (embeddings:
+`--embedding-latency-ms`). `GET /stats` reports the requests served, the summed model time and the
+*busy* time (wall time during which at least one call was sleeping); the benchmark subtracts the
+busy time from request latencies to get the framework overhead. `POST /stats/reset` zeroes them.
+
+Run from `src/`:
+    python -m benchmarks.fake_openai --port 8900 --latency-ms 300 --ms-per-token 2
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import re
+import time
+import uuid
+from typing import Any, Optional
+import numpy as np # type: ignore
+import uvicorn # type: ignore
+from fastapi import FastAPI, Request # type: ignore
+from fastapi.responses import JSONResponse, StreamingResponse # type: ignore
+
+FILLER_WORDS = (
+    "the proposal covers design supervision site inspection quality assurance schedule lot deliverables "
+    "methodology staffing risk warranty reporting commissioning training handover compliance standards "
+    "survey drilling borehole monitoring consultancy experience team approach milestones budget"
+).split()
+
+
+class ModelClock:
+    """Summed and union ("busy") time of the simulated model calls."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.requests = 0
+        self.model_seconds = 0.0
+        self.busy_seconds = 0.0
+        self._active = 0
+        self._busy_since = 0.0
+
+    async def run(self, seconds: float) -> None:
+        self.requests += 1
+        if self._active == 0:
+            self._busy_since = time.perf_counter()
+        self._active += 1
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self._active -= 1
+            self.model_seconds += seconds
+            if self._active == 0:
+                self.busy_seconds += time.perf_counter() - self._busy_since
+
+    def snapshot(self) -> dict:
+        busy = self.busy_seconds
+        if self._active:
+            busy += time.perf_counter() - self._busy_since
+        return {"requests": self.requests, "model_seconds": self.model_seconds, "busy_seconds": busy, "active": self._active}
+
+
+def _seed(text: str) -> int:
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+
+
+def _filler(prompt: str, words: int) -> str:
+    rng = np.random.default_rng(_seed(prompt))
+    chosen = [FILLER_WORDS[i] for i in rng.integers(0, len(FILLER_WORDS), size=words)]
+    sentences = [" ".join(chosen[i:i + 12]).capitalize() + "." for i in range(0, len(chosen), 12)]
+    return " ".join(sentences)
+
+
+def _count_tokens(text: str) -> int:
+    return max(len(text) // 4, 1)
+
+
+def _message_text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content
+
+
+# ---------------- Deterministic answers ----------------
+
+def _from_schema(schema: dict, defs: Optional[dict] = None) -> Any:
+    defs = defs if defs is not None else schema.get("$defs", schema.get("definitions", {}))
+    if "$ref" in schema:
+        return _from_schema(defs[schema["$ref"].split("/")[-1]], defs)
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            options = [option for option in schema[key] if option.get("type") != "null"]
+            return _from_schema(options[0] if options else {}, defs)
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "object" or "properties" in schema:
+        return {name: _from_schema(prop, defs) for name, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [_from_schema(schema.get("items", {"type": "string"}), defs)]
+    if kind == "boolean":
+        return False
+    if kind in ("integer", "number"):
+        return 0
+    return "Section"
+
+
+def _entity_extraction(prompt: str) -> str:
+    # Entities are the capitalised words of the chunk, which comes last in LightRAG's prompt
+    words = re.findall(r"\b[A-Z][A-Za-z]{3,}\b", prompt[-4000:])
+    names = list(dict.fromkeys(word.upper() for word in words))[:6] or ["DOCUMENT"]
+    records = [f'("entity"<|>"{name}"<|>"organization"<|>"{name} is mentioned in the document.")' for name in names]
+    records += [
+        f'("relationship"<|>"{a}"<|>"{b}"<|>"{a} is mentioned together with {b}."<|>"co-occurrence"<|>5)'
+        for a, b in zip(names, names[1:])
+    ]
+    return "##".join(records) + "##<|COMPLETE|>"
+
+
+def answer_text(prompt: str, query: str, completion_tokens: int) -> str:
+    """The answer for a plain prompt; `query` is the last user message (the whole prompt for completions)."""
+    lowered = prompt.lower()
+    if "`direct` or `rag`" in prompt:
+        return "direct" if re.match(r"\s*(hi|hello|hey|who are you)\b", query.lower()) else "rag"
+    if "simple_answer" in prompt and "full_proposal" in prompt:
+        return "full_proposal" if re.search(r"proposal|draft", query.lower()) else "simple_answer"
+    if "organization_name" in prompt and "submission_deadline" in prompt:
+        return json.dumps({
+            "organization_name": "CTBTO", "title": "Benchmark RFQ", "reference_no": "RFQ-BENCH-0001",
+            "submission_deadline": "2025-01-31", "country_or_region": "Austria"
+        })
+    if "'title' and 'summary'" in prompt:
+        return json.dumps({"title": "Benchmark Proposal", "summary": _filler(prompt, 40)})
+    if "<|COMPLETE|>" in prompt:
+        if "many entities and relationships were missed" in lowered:
+            return "<|COMPLETE|>"
+        return _entity_extraction(prompt)
+    if "`yes` or `no`" in lowered:
+        return "NO"
+    return _filler(prompt, completion_tokens)
+
+
+def answer_json(prompt: str) -> str:
+    """JSON-mode answers (`response_format={"type": "json_object"}`)."""
+    if "high_level_keywords" in prompt:
+        return json.dumps({"high_level_keywords": ["proposal", "methodology"], "low_level_keywords": ["CTBTO", "RFQ", "inspection"]})
+    if "question" in prompt.lower():
+        return json.dumps({"questions": [
+            "What are the key deliverables of this RFQ?",
+            "Which technical standards must the proposal follow?",
+            "What is the submission deadline and format?",
+            "Which past CDGA projects are most relevant here?"
+        ]})
+    return "{}"
+
+
+# ---------------- API ----------------
+
+def create_app(args) -> FastAPI:
+    app = FastAPI()
+    clock = ModelClock()
+
+    def model_delay(completion_tokens: int) -> float:
+        return (args.latency_ms + args.ms_per_token * completion_tokens) / 1000
+
+    def usage(prompt_tokens: int, completion_tokens: int) -> dict:
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        prompt = "\n".join(_message_text(message) for message in messages)
+        user_messages = [_message_text(m) for m in messages if m.get("role") == "user"]
+        query = user_messages[-1] if user_messages else prompt
+        model = body.get("model", "gpt-4o")
+
+        tool_calls = None
+        response_format = body.get("response_format") or {}
+        tool_choice = body.get("tool_choice")
+        if response_format.get("type") == "json_schema":
+            content = json.dumps(_from_schema(response_format["json_schema"]["schema"]))
+        elif response_format.get("type") == "json_object":
+            content = answer_json(prompt)
+        elif isinstance(tool_choice, dict) or (tool_choice == "required" and body.get("tools")):
+            # Forced tool call: LangChain's function-calling structured output
+            name = tool_choice["function"]["name"] if isinstance(tool_choice, dict) else body["tools"][0]["function"]["name"]
+            tool = next(t for t in body["tools"] if t["function"]["name"] == name)
+            content = None
+            tool_calls = [{
+                "id": f"call_{uuid.uuid4().hex[:12]}", "type": "function",
+                "function": {"name": name, "arguments": json.dumps(_from_schema(tool["function"].get("parameters", {})))}
+            }]
+        else:
+            content = answer_text(prompt, query, args.completion_tokens)
+
+        prompt_tokens = _count_tokens(prompt)
+        completion_tokens = _count_tokens(content or json.dumps(tool_calls))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+
+        if body.get("stream"):
+            include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+            async def events():
+                # Time to first token, then the rest of the tokens as they are "generated"
+                await clock.run(args.latency_ms / 1000)
+                pieces = re.findall(r"\S+\s*", content or "") or [""]
+                per_piece = args.ms_per_token * completion_tokens / 1000 / len(pieces)
+                for piece in pieces:
+                    if per_piece:
+                        await clock.run(per_piece)
+                    chunk = {
+                        "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                        "choices": [{"index": 0, "delta": {"role": "assistant", "content": piece}, "finish_reason": None}]
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                final = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+                }
+                yield f"data: {json.dumps(final)}\n\n"
+                if include_usage:
+                    usage_chunk = {
+                        "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                        "choices": [], "usage": usage(prompt_tokens, completion_tokens)
+                    }
+                    yield f"data: {json.dumps(usage_chunk)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await clock.run(model_delay(completion_tokens))
+        return JSONResponse({
+            "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content, "tool_calls": tool_calls},
+                "finish_reason": "tool_calls" if tool_calls else "stop"
+            }],
+            "usage": usage(prompt_tokens, completion_tokens)
+        })
+
+    @app.post("/v1/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        prompt = body.get("prompt", "")
+        prompt = "\n".join(prompt) if isinstance(prompt, list) else prompt
+        text = answer_text(prompt, prompt, min(args.completion_tokens, body.get("max_tokens") or args.completion_tokens))
+        prompt_tokens, completion_tokens = _count_tokens(prompt), _count_tokens(text)
+
+        await clock.run(model_delay(completion_tokens))
+        return JSONResponse({
+            "id": f"cmpl-{uuid.uuid4().hex[:24]}", "object": "text_completion", "created": int(time.time()),
+            "model": body.get("model", "gpt-3.5-turbo-instruct"),
+            "choices": [{"index": 0, "text": text, "finish_reason": "stop", "logprobs": None}],
+            "usage": usage(prompt_tokens, completion_tokens)
+        })
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        texts = body.get("input", [])
+        texts = [texts] if isinstance(texts, str) else texts
+        model = body.get("model", "text-embedding-3-small")
+        dims = body.get("dimensions") or (3072 if model.endswith("-large") else 1536)
+
+        data = []
+        for index, text in enumerate(texts):
+            text = text if isinstance(text, str) else json.dumps(text)
+            vector = np.random.default_rng(_seed(text)).standard_normal(dims).astype(np.float32)
+            vector /= np.linalg.norm(vector)
+            if body.get("encoding_format") == "base64":
+                embedding = base64.b64encode(vector.tobytes()).decode("ascii")
+            else:
+                embedding = vector.tolist()
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+
+        await clock.run(args.embedding_latency_ms / 1000)
+        prompt_tokens = sum(_count_tokens(t if isinstance(t, str) else json.dumps(t)) for t in texts)
+        return JSONResponse({
+            "object": "list", "data": data, "model": model,
+            "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens}
+        })
+
+    @app.get("/stats")
+    def stats():
+        return clock.snapshot()
+
+    @app.post("/stats/reset")
+    def reset_stats():
+        clock.reset()
+        return clock.snapshot()
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="per chat/completion call (time to first token)")
+    parser.add_argument("--ms-per-token", type=float, default=0.0, help="added per completion token")
+    parser.add_argument("--embedding-latency-ms", type=float, default=50.0)
+    parser.add_argument("--completion-tokens", type=int, default=120, help="length of free-text answers, in words")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
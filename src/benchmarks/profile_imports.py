@@ -0,0 +1,106 @@
+"""
+Import-time profile of the API server: how long `import main` takes in a fresh interpreter, which
+modules account for it, and whether any lazy component (see `components`) was built while importing.
+
+Runs `python -X importtime -c "import main"` in a subprocess (best of `--runs`), prints the slowest
+top-level packages and modules by cumulative import time, and exits with status 1 when the import
+exceeds `--budget-ms` or builds a component, so it can gate CI and deploys. The default budget is
+for a `basic-xxs` App Platform instance (1 shared vCPU, 512 MiB); measure on one and adjust.
+
+Run from `src/`:
+    python -m benchmarks.profile_imports --budget-ms 6000 --top 25
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+from components import component_stats
+built = [name for name, stats in component_stats().items() if stats["built"]]
+print("PROFILE" + json.dumps({"import_seconds": elapsed, "built_components": built}))
+"""
+
+
+def run_probe() -> tuple:
+    env = {**os.environ, "WARM_UP_COMPONENTS": "false"}
+    # Deploys import from bytecode; make sure it gets written
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True
+    )
+    report = None
+    for line in result.stdout.splitlines():
+        if line.startswith("PROFILE"):
+            report = json.loads(line[len("PROFILE"):])
+    if result.returncode != 0 or report is None:
+        sys.stderr.write(result.stderr[-4000:])
+        raise SystemExit(f"import main failed with exit code {result.returncode}")
+    return report, parse_importtime(result.stderr)
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Module -> (self µs, cumulative µs) from the `-X importtime` lines."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            modules[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            continue
+    return modules
+
+
+def by_package(modules: dict) -> dict:
+    # Top-level packages: sum the self time of all their modules
+    totals = defaultdict(int)
+    for name, (self_us, _) in modules.items():
+        totals[name.split(".")[0]] += self_us
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "6000")))
+    parser.add_argument("--runs", type=int, default=3, help="The best run counts; the first one also fills the bytecode cache")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    runs = [run_probe() for _ in range(args.runs)]
+    report, modules = min(runs, key=lambda run: run[0]["import_seconds"])
+    import_ms = report["import_seconds"] * 1000
+
+    print(f"import main: {import_ms:.0f} ms (best of {args.runs}), budget {args.budget_ms:.0f} ms\n")
+    print(f"{'package':<40} {'self ms':>10}")
+    for name, self_us in sorted(by_package(modules).items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<40} {self_us / 1000:>10.1f}")
+    print(f"\n{'module':<60} {'cumulative ms':>14}")
+    for name, (_, cumulative_us) in sorted(modules.items(), key=lambda item: -item[1][1])[:args.top]:
+        print(f"{name:<60} {cumulative_us / 1000:>14.1f}")
+
+    failed = False
+    if report["built_components"]:
+        print(f"\n❌ Components built at import time: {', '.join(report['built_components'])}")
+        failed = True
+    if import_ms > args.budget_ms:
+        print(f"\n❌ Import time {import_ms:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if not failed:
+        print("\n✅ Within budget, no component built at import time")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -22,9 +22,9 @@ Note:
   of missing files or other exceptions.
 """
 
-import boto3
 from botocore.exceptions import ClientError
 from pathlib import Path
+from components import lazy
 from config.appconfig import settings as app_settings
 
 SPACE_NAME = "lightrag-bucket"
@@ -35,13 +35,20 @@ DO_ENDPOINT = f"https://{SPACE_REGION}.digitaloceanspaces.com"
 ACCESS_KEY = app_settings.do_spaces_access_key
 SECRET_KEY = app_settings.do_spaces_secret_key
 
-session = boto3.session.Session()
-client = session.client('s3',
-    region_name=SPACE_REGION,
-    endpoint_url=DO_ENDPOINT,
-    aws_access_key_id=ACCESS_KEY,
-    aws_secret_access_key=SECRET_KEY
-)
+def _build_client():
+    import boto3
+
+    session = boto3.session.Session()
+    return session.client('s3',
+        region_name=SPACE_REGION,
+        endpoint_url=DO_ENDPOINT,
+        aws_access_key_id=ACCESS_KEY,
+        aws_secret_access_key=SECRET_KEY
+    )
+
+
+# Created on first use: importing boto3 and building the client is slow
+spaces_client = lazy("do_spaces_client", _build_client)
 
 # def list_files():
 #     try:
@@ -59,7 +66,7 @@ client = session.client('s3',
 def list_files():
     """List all files inside the folder in the Space, excluding the folder key itself."""
     try:
-        response = client.list_objects_v2(Bucket=SPACE_NAME, Prefix=FOLDER_NAME + "/")
+        response = spaces_client.get().list_objects_v2(Bucket=SPACE_NAME, Prefix=FOLDER_NAME + "/")
         file_keys = []
         for content in response.get("Contents", []):
             key = content["Key"]
@@ -76,7 +83,7 @@ def delete_existing_files():
     files = list_files()
     for file_key in files:
         try:
-            client.delete_object(Bucket=SPACE_NAME, Key=file_key)
+            spaces_client.get().delete_object(Bucket=SPACE_NAME, Key=file_key)
             print(f"Deleted {file_key}")
         except ClientError as e:
             print(f"Error deleting {file_key}: {e}")
@@ -84,7 +91,7 @@ def delete_existing_files():
 
 def file_exists(file_key: str) -> bool:
     try:
-        client.head_object(Bucket=SPACE_NAME, Key=file_key)
+        spaces_client.get().head_object(Bucket=SPACE_NAME, Key=file_key)
         return True
     except ClientError as e:
         if e.response['Error']['Code'] == '404':
@@ -107,12 +114,12 @@ def upload_file(file_path: Path):
     if file_exists(file_key):
         print(f"{file_key} exists in the Space. It will be replaced.")
         # Optionally, delete the existing file before uploading new one
-        client.delete_object(Bucket=SPACE_NAME, Key=file_key)
+        spaces_client.get().delete_object(Bucket=SPACE_NAME, Key=file_key)
 
     # Upload the new file
     try:
         with open(file_path, "rb") as f:
-            client.upload_fileobj(f, SPACE_NAME, file_key)
+            spaces_client.get().upload_fileobj(f, SPACE_NAME, file_key)
         print(f"Uploaded {file_key} to Space.")
     except ClientError as e:
         print(f"Error uploading file {file_key}: {e}")
@@ -138,7 +145,7 @@ def download_all_files(download_dir: Path):
     for file_key in files:
         file_name = file_key.split("/")[-1]
         download_path = download_dir / file_name
-        client.download_file(SPACE_NAME, file_key, str(download_path))
+        spaces_client.get().download_file(SPACE_NAME, file_key, str(download_path))
         print(f"⬇️ Downloaded {file_key} to {download_path}")
 
 
@@ -0,0 +1,81 @@
+"""
+Process-wide components that are built on first use instead of at import time.
+
+Modules that need a heavy object (an embeddings client, the Tavily tools, the DigitalOcean Spaces
+client, the example-proposal index) register a factory with `lazy` and call `.get()` where they use
+it. Importing `main` therefore builds nothing; the FastAPI lifespan starts `warm_up` in the
+background once the app is serving, so the first requests usually find everything built anyway.
+
+- `LazyComponent`: A value built once, on the first `get()`, safely across threads.
+- `lazy`: Registers a factory under a name and returns its `LazyComponent`.
+- `warm_up`: Builds every registered component that is not built yet (blocking; run it in a thread).
+- `component_stats`: Whether each component is built and how long it took.
+
+`benchmarks/profile_imports.py` checks that importing `main` stays within the cold-start budget.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LazyComponent(Generic[T]):
+    def __init__(self, name: str, factory: Callable[[], T]):
+        self.name = name
+        self._factory = factory
+        self._value: Optional[T] = None
+        self._built = False
+        self._lock = threading.Lock()
+        self.build_seconds: Optional[float] = None
+
+    @property
+    def built(self) -> bool:
+        return self._built
+
+    def get(self) -> T:
+        if not self._built:
+            with self._lock:
+                # A failed build is retried by the next caller
+                if not self._built:
+                    started = time.perf_counter()
+                    self._value = self._factory()
+                    self.build_seconds = time.perf_counter() - started
+                    self._built = True
+                    logger.info("🧩 Built %s in %.1f ms", self.name, self.build_seconds * 1000)
+        return self._value
+
+
+_components: Dict[str, LazyComponent] = {}
+
+
+def lazy(name: str, factory: Callable[[], T]) -> LazyComponent[T]:
+    if name in _components:
+        raise ValueError(f"Component '{name}' is already registered")
+    component = _components[name] = LazyComponent(name, factory)
+    return component
+
+
+def warm_up() -> None:
+    for component in list(_components.values()):
+        if component.built:
+            continue
+        try:
+            component.get()
+        except Exception as e:
+            # e.g. missing credentials: the request that needs it will raise instead
+            logger.warning("Could not warm up %s: %s", component.name, e)
+
+
+def component_stats() -> dict:
+    return {
+        name: {
+            "built": component.built,
+            "build_ms": round(component.build_seconds * 1000, 1) if component.build_seconds is not None else None,
+        }
+        for name, component in _components.items()
+    }
@@ -50,6 +50,60 @@ class AppSettings:
     password = os.getenv("DB_PASSWORD")
     host = os.getenv("DB_HOST")
     port_db = os.getenv("DB_PORT")
+    ingestion_poll_interval = float(os.getenv("INGESTION_POLL_INTERVAL", "2"))
+    ingestion_job_timeout = int(os.getenv("INGESTION_JOB_TIMEOUT", "900"))
+    ingestion_max_attempts = int(os.getenv("INGESTION_MAX_ATTEMPTS", "3"))
+    ingestion_concurrency = int(os.getenv("INGESTION_CONCURRENCY", "4"))
+    extraction_cache_dir = os.getenv("EXTRACTION_CACHE_DIR", "./data/extraction_cache")
+    extraction_cache_size = int(os.getenv("EXTRACTION_CACHE_SIZE", "64"))
+    # The oldest extractions are deleted once the directory grows past this
+    extraction_cache_disk_mb = int(os.getenv("EXTRACTION_CACHE_DISK_MB", "512"))
+    llm_cache_size = int(os.getenv("LLM_CACHE_SIZE", "4096"))
+    # 3072-dim float32 vectors take 12 KiB each
+    embedding_cache_size = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+    tenant_pool_max_per_tenant = int(os.getenv("TENANT_POOL_MAX_PER_TENANT", "5"))
+    tenant_pool_max_tenants = int(os.getenv("TENANT_POOL_MAX_TENANTS", "50"))
+    tenant_pool_timeout = float(os.getenv("TENANT_POOL_TIMEOUT", "30"))
+    tenant_pool_idle_timeout = float(os.getenv("TENANT_POOL_IDLE_TIMEOUT", "300"))
+    # Per process, split between the psycopg2 pools (the rest) and the asyncpg pools
+    db_pool_max_connections = int(os.getenv("DB_POOL_MAX_CONNECTIONS", "40"))
+    async_db_pool_max_connections = int(os.getenv("ASYNC_DB_POOL_MAX_CONNECTIONS", str(db_pool_max_connections // 2)))
+    sync_db_pool_max_connections = max(1, db_pool_max_connections - async_db_pool_max_connections)
+    tenant_directory_cache_size = int(os.getenv("TENANT_DIRECTORY_CACHE_SIZE", "1024"))
+    tenant_directory_cache_ttl = float(os.getenv("TENANT_DIRECTORY_CACHE_TTL", "300"))
+    llm_max_connections = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+    llm_max_keepalive_connections = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    llm_keepalive_expiry = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+    llm_request_timeout = float(os.getenv("LLM_REQUEST_TIMEOUT", "120"))
+    llm_default_concurrency = int(os.getenv("LLM_DEFAULT_CONCURRENCY", "8"))
+    llm_model_concurrency = os.getenv("LLM_MODEL_CONCURRENCY", "")
+    proposal_generation_mode = os.getenv("PROPOSAL_GENERATION_MODE", "single")  # "single" or "sections" (opt-in)
+    proposal_section_concurrency = int(os.getenv("PROPOSAL_SECTION_CONCURRENCY", "6"))
+    lightrag_llm_max_async = int(os.getenv("LIGHTRAG_LLM_MAX_ASYNC", "8"))
+    exemplar_index_dir = os.getenv("EXEMPLAR_INDEX_DIR", "./data/exemplar_index")
+    exemplar_index_max_tenants = int(os.getenv("EXEMPLAR_INDEX_MAX_TENANTS", "32"))
+    exemplar_chunk_chars = int(os.getenv("EXEMPLAR_CHUNK_CHARS", "2000"))
+    exemplar_winning_boost = float(os.getenv("EXEMPLAR_WINNING_BOOST", "1.5"))
+    exemplar_top_k = int(os.getenv("EXEMPLAR_TOP_K", "4"))
+    warm_up_components = os.getenv("WARM_UP_COMPONENTS", "true").lower() == "true"
+    warm_up_delay = float(os.getenv("WARM_UP_DELAY", "1"))
+    background_drain_timeout = float(os.getenv("BACKGROUND_DRAIN_TIMEOUT", "10"))
+    memory_batch_window = float(os.getenv("MEMORY_BATCH_WINDOW", "2"))
+    memory_batch_max = int(os.getenv("MEMORY_BATCH_MAX", "16"))
+    graph_checkpointer = os.getenv("GRAPH_CHECKPOINTER", "postgres")  # "postgres" or "memory"
+    memory_store = os.getenv("MEMORY_STORE", "postgres")  # "postgres" or "memory"
+    memory_pool_max_size = int(os.getenv("MEMORY_POOL_MAX_SIZE", "5"))
+    memory_embedding_model = os.getenv("MEMORY_EMBEDDING_MODEL", "openai:text-embedding-3-small")
+    memory_embedding_dims = int(os.getenv("MEMORY_EMBEDDING_DIMS", "1536"))
+    memory_hnsw_m = int(os.getenv("MEMORY_HNSW_M", "16"))
+    memory_hnsw_ef_construction = int(os.getenv("MEMORY_HNSW_EF_CONSTRUCTION", "64"))
+    memory_query_cache_size = int(os.getenv("MEMORY_QUERY_CACHE_SIZE", "2048"))
+    checkpoint_pool_max_size = int(os.getenv("CHECKPOINT_POOL_MAX_SIZE", "10"))
+    checkpoint_compress_min_bytes = int(os.getenv("CHECKPOINT_COMPRESS_MIN_BYTES", "1024"))
+    checkpoint_keep_last = int(os.getenv("CHECKPOINT_KEEP_LAST", "5"))
+    checkpoint_thread_ttl_hours = float(os.getenv("CHECKPOINT_THREAD_TTL_HOURS", "72"))
+    checkpoint_compact_grace = float(os.getenv("CHECKPOINT_COMPACT_GRACE", "300"))
+    checkpoint_prune_interval = float(os.getenv("CHECKPOINT_PRUNE_INTERVAL", "600"))
     
 
     @property
@@ -0,0 +1,372 @@
+"""
+Async data-access layer for the tenant databases, built on asyncpg.
+
+Offers the operations of `database.db_helper` without blocking the event loop, for `async def`
+endpoints, graph nodes and the ingestion workers. Each tenant gets a lazily created asyncpg pool;
+the least recently used pools are closed once more than `tenant_pool_max_tenants` are open, and the
+number of connections checked out across all tenants is capped by `async_db_pool_max_connections`.
+That is this layer's share of `DB_POOL_MAX_CONNECTIONS` (half by default); the psycopg2 pools of
+`database.tenant_pool` get the rest, so the two together stay within the process budget.
+
+Functions:
+- `adocument_exists`: Whether a document with the given file name is stored.
+- `adelete_document`: Deletes a document by its file name.
+- `ainsert_file_metadata`: Inserts a document unless its name is already present.
+- `ainsert_document`: Inserts or updates a document.
+- `asave_metadata`: Inserts or updates the RFQ metadata and prompt suggestions of a document.
+- `afetch_metadata`: Returns the metadata of every RFQ.
+- `aget_recent_rfqs`: RFQs ordered by document upload time, newest first.
+- `aget_prompt_suggestions`: Prompt suggestions of an RFQ, or of the latest RFQ.
+- `aget_recent_activity`: RFQs and proposals of the last 30 days.
+- `aget_winning_proposals`: Proposals marked as winning.
+- `astore_proposal`: Stores a generated proposal and returns its id.
+- `aget_proposals_after`: Proposals with an id above the given one, oldest first.
+- `aget_fingerprint`: SHA-256 of the content last ingested under a document name.
+- `aset_fingerprints`: Records the content hashes of ingested documents.
+"""
+
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timezone
+from typing import List, Optional
+import asyncpg # type: ignore
+from config.appconfig import settings as app_settings
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTenantPools:
+    def __init__(self, max_per_tenant: int, max_total: int, max_tenants: int, idle_timeout: float):
+        self.max_per_tenant = max_per_tenant
+        self.max_tenants = max_tenants
+        self.idle_timeout = idle_timeout
+        self._pools: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(max_total)
+        # The event loop keeps only weak references to tasks
+        self._closing: set = set()
+
+    def _close_later(self, pool) -> None:
+        task = asyncio.create_task(pool.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closed)
+
+    def _closed(self, task: asyncio.Task) -> None:
+        self._closing.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Closing an async tenant pool failed: %s", task.exception())
+
+    async def _get_pool(self, db_user: str, db_name: str, db_password: str):
+        key = (db_user, db_name)
+        async with self._lock:
+            entry = self._pools.get(key)
+            if entry is not None and entry[0] == db_password:
+                self._pools.move_to_end(key)
+                return entry[1]
+            if entry is not None:
+                # Credentials changed: replace the pool opened with the old password
+                self._close_later(entry[1])
+
+            pool = await asyncpg.create_pool(
+                user=db_user,
+                database=db_name,
+                password=db_password,
+                host=app_settings.host,
+                port=int(app_settings.port_db or 5432),
+                min_size=0,
+                max_size=self.max_per_tenant,
+                max_inactive_connection_lifetime=self.idle_timeout,
+            )
+            self._pools[key] = (db_password, pool)
+            self._pools.move_to_end(key)
+
+            while len(self._pools) > self.max_tenants:
+                evicted_key, (_, evicted) = self._pools.popitem(last=False)
+                # close() waits for checked-out connections, so it must not hold up this request
+                self._close_later(evicted)
+                logger.info("Evicted async tenant pool for %s/%s", *evicted_key)
+            return pool
+
+    @asynccontextmanager
+    async def connection(self, db_user: str, db_name: str, db_password: str):
+        pool = await self._get_pool(db_user, db_name, db_password)
+        async with self._slots:
+            async with pool.acquire() as conn:
+                yield conn
+
+    async def close_all(self) -> None:
+        async with self._lock:
+            pools = [pool for _, pool in self._pools.values()]
+            self._pools.clear()
+        await asyncio.gather(*(pool.close() for pool in pools), *self._closing, return_exceptions=True)
+
+
+async_tenant_pools = AsyncTenantPools(
+    max_per_tenant=app_settings.tenant_pool_max_per_tenant,
+    max_total=app_settings.async_db_pool_max_connections,
+    max_tenants=app_settings.tenant_pool_max_tenants,
+    idle_timeout=app_settings.tenant_pool_idle_timeout,
+)
+
+
+def _to_date(value) -> Optional[date]:
+    # asyncpg needs a date object for DATE columns; the LLM metadata gives "YYYY-MM-DD" strings
+    if value is None or isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+# ---------------- Documents ----------------
+
+async def adocument_exists(file_name: str, db_user: str, db_name: str, db_password: str) -> bool:
+    async with async_tenant_pools.connection(db_user, db_name, db_password) as conn:
+        row = await conn.fetchrow("SELECT 1 FROM documents WHERE file_name = $1", file_name)
+    return row is not None
+
+
+async def adelete_document(file_name: str, db_user: str, db_name: str, db_password: str) -> None:
+    async with async_tenant_pools.connection(db_user, db_name, db_password) as conn:
+        await conn.execute("DELETE FROM documents WHERE file_name = $1", file_name)
+
+
+async def ainsert_file_metadata(document_name, file_name, file_content, db_user, db_name, db_password) -> None:
+    async with async_tenant_pools.connection(db_user, db_name, db_password) as conn:
+        await conn.execute("""
+            INSERT INTO documents (document_name, file_name, file_content)
+            VALUES ($1, $2, $3)
+            ON CONFLICT (document_name) DO NOTHING;
+        """, document_name, file_name, file_content)
+
+
+async def ainsert_document(document_name: str, file_name: str, file_content: str, db_user, db_name, db_password) -> None:
+    async with async_tenant_pools.connection(db_user, db_name, db_password) as conn:
+        await conn.execute("""
+            INSERT INTO documents (document_name, file_name, file_content)
+            VALUES ($1, $2, $3)
+            ON CONFLICT (document_name) DO UPDATE SET
+                file_name = EXCLUDED.file_name,
+                file_content = EXCLUDED.file_content,
+                upload_time = CURRENT_TIMESTAMP;
+        """, document_name, file_name, file_content)
+
+
+# ---------------- RFQ metadata ----------------
+
+async def asave_metadata(data: dict, prompt_suggestions, db_user, db_name, db_password) -> None:
+    async with async_tenant_pools.connection(db_user, db_name, db_password) as conn:
+        await conn.execute("""
+            INSERT INTO rfqs (
+                document_name,
+                organization_name,
+                reference_no,
+                title,
+                submission_deadline,
+                country_or_region,
+                file_name,
+                contact_email,
+                prompt_suggestions
+            )
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+            ON CONFLICT (document_name) DO UPDATE SET
+                organization_name = EXCLUDED.organization_name,
+                reference_no = EXCLUDED.reference_no,
+                title = EXCLUDED.title,
+                submission_deadline = EXCLUDED.submission_deadline,
+                country_or_region = EXCLUDED.country_or_region,
+                file_name = EXCLUDED.file_name,
+                contact_email = EXCLUDED.contact_email,
+                prompt_suggestions = EXCLUDED.prompt_suggestions;
+        """,
+            data.get("document_name") or data.get("id") or data.get("file_name"),
+            data.get("organization_name"),
+            data.get("reference_no"),
+            data.get("title"),
+            _to_date(data.get("submission_deadline")),
+            data.get("country_or_region"),
+            data.get("file_name"),
+            data.get("contact_email"),
+            json.dumps(prompt_suggestions)
+        )
+    logger.info(f"✅ RFQ metadata saved for {data.get('document_name') or data.get('id')}")
+
+
+async def afetch_metadata(db_user, db_name, db_password) -> List[dict]:
+    async with async_tenant_pools.connection(db_user, db_name, db_password) as conn:
+        rows = await conn.fetch("""
+            SELECT rfq_id, document_name, organization_name, reference_no, title,
+                   submission_deadline, country_or_region, file_name, contact_email
+            FROM rfqs
+        """)
+    return [
+        {**dict(row), "submission_deadline": str(row["submission_deadline"])}
+        for row in rows
+    ]
+
+
+async def aget_recent_rfqs(db_user, db_name, db_password) -> List[dict]:
+    async with async_tenant_pools.connection(db_user, db_name, db_password) as conn:
+        rows = await conn.fetch("""
+            SELECT m.file_name, m.organization_name, m.title, m.submission_deadline
+            FROM rfqs m
+            JOIN documents d ON m.file_name = d.document_name
+            ORDER BY d.upload_time DESC
+        """)
+    return [
+        {
+            "document_name": row["file_name"],
+            "organization": row["organization_name"],
+            "title": row["title"],
+            "deadline": row["submission_deadline"].isoformat() if row["submission_deadline"] else None
+        }
+        for row in rows
+    ]
+
+
+async def aget_prompt_suggestions(rfq_id: Optional[str], db_user, db_name, db_password) -> Optional[str]:
+    """Raw JSON of the prompt suggestions of `rfq_id`, or of the latest RFQ when no id is given."""
+    async with async_tenant_pools.connection(db_user, db_name, db_password) as conn:
+        if rfq_id:
+            return await conn.fetchval("SELECT prompt_suggestions FROM rfqs WHERE document_name = $1", rfq_id)
+        return await conn.fetchval("""
+            SELECT prompt_suggestions
+            FROM rfqs
+            ORDER BY created_at DESC
+            LIMIT 1
+        """)
+
+
+# ---------------- Proposals and activity ----------------
+
+async def aget_recent_activity(db_user, db_name, db_password) -> dict:
+    async with async_tenant_pools.connection(db_user, db_name, db_password) as conn:
+        rfq_rows = await conn.fetch("""
+            SELECT rfq_id, title, created_at
+            FROM rfqs
+            WHERE created_at >= NOW() - INTERVAL '30 days'
+            ORDER BY created_at DESC
+        """)
+        proposal_rows = await conn.fetch("""
+            SELECT p.proposal_id, p.rfq_id, p.proposal_title, p.proposal_content, p.is_winning, p.created_at
+            FROM proposals p
+            JOIN rfqs r ON r.rfq_id = p.rfq_id
+            WHERE p.created_at >= NOW() - INTERVAL '30 days'
+              AND r.created_at >= NOW() - INTERVAL '30 days'
+            ORDER BY p.created_at DESC
+        """)
+
+    rfqs = [
+        {
+            "id": str(row["rfq_id"]),
+            "title": row["title"],
+            "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+        }
+        for row in rfq_rows
+    ]
+    proposals = [
+        {
+            "id": str(row["proposal_id"]),
+            "rfq_id": str(row["rfq_id"]),
+            "title": row["proposal_title"],
+            "content": row["proposal_content"],
+            "is_winning": row["is_winning"],
+            "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+        }
+        for row in proposal_rows
+    ]
+    return {"rfqs": rfqs, "proposals": proposals}
+
+
+async def aget_winning_proposals(db_user: str, db_name: str, db_password: str) -> List[dict]:
+    async with async_tenant_pools.connection(db_user, db_name, db_password) as conn:
+        rows = await conn.fetch("""
+            SELECT proposal_id, proposal_title, proposal_content, created_at
+            FROM proposals
+            WHERE is_winning = TRUE
+            ORDER BY created_at DESC
+        """)
+    return [
+        {
+            "proposal_id": str(row["proposal_id"]),
+            "proposal_title": row["proposal_title"],
+            "proposal_content": row["proposal_content"],
+            "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+        }
+        for row in rows
+    ]
+
+
+async def astore_proposal(db_user, db_name, db_password, rfq_id, title, content, summary, is_winning) -> int:
+    async with async_tenant_pools.connection(db_user, db_name, db_password) as conn:
+        return await conn.fetchval("""
+            INSERT INTO proposals (rfq_id, proposal_title, proposal_content, summary, is_winning, created_at)
+            VALUES ($1, $2, $3, $4, $5, $6)
+            RETURNING proposal_id
+        """,
+            rfq_id, title, content, summary, is_winning,
+            # created_at is TIMESTAMP without time zone: store naive UTC
+            datetime.now(timezone.utc).replace(tzinfo=None)
+        )
+
+
+async def aget_proposals_after(proposal_id: int, db_user, db_name, db_password) -> List[dict]:
+    async with async_tenant_pools.connection(db_user, db_name, db_password) as conn:
+        rows = await conn.fetch("""
+            SELECT proposal_id, proposal_title, proposal_content, COALESCE(is_winning, FALSE) AS is_winning
+            FROM proposals
+            WHERE proposal_id > $1
+            ORDER BY proposal_id
+        """, proposal_id)
+    return [dict(row) for row in rows]
+
+
+# ---------------- Content fingerprints ----------------
+
+# Tenants onboarded before fingerprints existed get the table on first use
+_FINGERPRINT_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS document_fingerprints (
+        document_name TEXT PRIMARY KEY,
+        sha256 TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+_fingerprint_tables_ready = set()
+
+
+async def _ensure_fingerprint_table(conn, db_name: str) -> None:
+    if db_name not in _fingerprint_tables_ready:
+        await conn.execute(_FINGERPRINT_TABLE_SQL)
+        _fingerprint_tables_ready.add(db_name)
+
+
+async def aget_fingerprint(document_name: str, db_user: str, db_name: str, db_password: str) -> Optional[str]:
+    """Returns the stored hash only while the document itself is still present."""
+    async with async_tenant_pools.connection(db_user, db_name, db_password) as conn:
+        await _ensure_fingerprint_table(conn, db_name)
+        return await conn.fetchval("""
+            SELECT f.sha256
+            FROM document_fingerprints f
+            JOIN documents d ON d.file_name = f.document_name
+            WHERE f.document_name = $1
+            LIMIT 1
+        """, document_name)
+
+
+async def aset_fingerprints(fingerprints: List[tuple], db_user: str, db_name: str, db_password: str) -> None:
+    """`fingerprints` is a list of `(document_name, sha256)` pairs."""
+    if not fingerprints:
+        return
+    async with async_tenant_pools.connection(db_user, db_name, db_password) as conn:
+        await _ensure_fingerprint_table(conn, db_name)
+        await conn.executemany("""
+            INSERT INTO document_fingerprints (document_name, sha256, updated_at)
+            VALUES ($1, $2, CURRENT_TIMESTAMP)
+            ON CONFLICT (document_name) DO UPDATE SET
+                sha256 = EXCLUDED.sha256,
+                updated_at = CURRENT_TIMESTAMP;
+        """, fingerprints)
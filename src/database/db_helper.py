@@ -2,6 +2,7 @@
 Handles the initialization and management of an SQLite database for storing document metadata and content across various sections.
 
 Functions:
+- `open_tenant_db_connection`: Checks out a pooled connection to a tenant database (see `database.tenant_pool`).
 - `initialize_database`: Creates tables for each document section.
 - `insert_file_metadata`: Inserts file metadata and content into the relevant section table.
 - `delete_file`: Deletes a document by its file name from the section table.
@@ -17,23 +18,18 @@ import logging
 import traceback
 from typing import List
 import psycopg2 # type: ignore
-from openai import OpenAI  # type: ignore
-from config.appconfig import settings as app_settings
-import psycopg2 # type: ignore
 from config.appconfig import settings as app_settings
+from database.tenant_pool import tenant_connection, tenant_pools
+from llm_gateway import llm_gateway
+from reflexion_agent import exemplar_index
 
 def open_tenant_db_connection(db_user: str, db_name: str, db_password: str):
-    conn = psycopg2.connect(
-        user=db_user,
-        dbname=db_name,
-        password=db_password,
-        host=app_settings.host,
-        port=app_settings.port_db,
-    )
-    return conn
+    # Pooled connection; conn.close() returns it to the tenant pool instead of closing it
+    return tenant_pools.acquire(db_user, db_name, db_password)
 
 
 def initialize_age(db_user: str, db_name: str, db_password: str):
+    # Dedicated connection: the session settings below must not leak into pooled connections
     conn = psycopg2.connect(
         user=db_user,
         dbname=db_name,
@@ -59,50 +55,57 @@ def initialize_age(db_user: str, db_name: str, db_password: str):
 
 
 def initialize_database(db_user: str, db_name: str, db_password: str):
-    conn = open_tenant_db_connection(db_user, db_name, db_password)
-    cursor = conn.cursor()
+    with tenant_connection(db_user, db_name, db_password) as conn:
+        cursor = conn.cursor()
 
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS documents (
-            document_name TEXT PRIMARY KEY,
-            file_name TEXT UNIQUE,
-            file_content TEXT,
-            upload_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS rfqs (
-            rfq_id SERIAL PRIMARY KEY,
-            document_name TEXT UNIQUE,
-            organization_name TEXT,
-            reference_no TEXT UNIQUE,
-            title TEXT,
-            submission_deadline DATE,
-            country_or_region TEXT,
-            file_name TEXT,
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                document_name TEXT PRIMARY KEY,
+                file_name TEXT UNIQUE,
+                file_content TEXT,
+                upload_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS rfqs (
+                rfq_id SERIAL PRIMARY KEY,
+                document_name TEXT UNIQUE,
+                organization_name TEXT,
+                reference_no TEXT UNIQUE,
+                title TEXT,
+                submission_deadline DATE,
+                country_or_region TEXT,
+                file_name TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                contact_email TEXT,
+                prompt_suggestions TEXT
+            );
+        """)
+
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS proposals (
+            proposal_id SERIAL PRIMARY KEY,
+            rfq_id INTEGER REFERENCES rfqs(rfq_id) ON DELETE CASCADE,
+            proposal_title TEXT,
+            proposal_content TEXT,
+            is_winning BOOLEAN DEFAULT FALSE,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            contact_email TEXT,
-            prompt_suggestions TEXT
-        );
-    """)
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS proposals (
-        proposal_id SERIAL PRIMARY KEY,
-        rfq_id INTEGER REFERENCES rfqs(rfq_id) ON DELETE CASCADE,
-        proposal_title TEXT,
-        proposal_content TEXT,
-        is_winning BOOLEAN DEFAULT FALSE,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        summary TEXT,
-        proposal_author TEXT
-        );
-    """)
+            summary TEXT,
+            proposal_author TEXT
+            );
+        """)
 
-    conn.commit()
-    cursor.close()
-    conn.close()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS document_fingerprints (
+                document_name TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+
+        conn.commit()
+        cursor.close()
 
 
 def insert_file_metadata(document_name, file_name, file_content, db_user, db_name, db_password):
@@ -124,9 +127,7 @@ def insert_file_metadata(document_name, file_name, file_content, db_user, db_nam
 
 # ---------------- Metadata with LLM ----------------
 
-def extract_metadata_with_llm(text):
-    from langchain_openai import OpenAI # type: ignore
-    llm = OpenAI(temperature = 0, openai_api_key=app_settings.openai_api_key)
+async def extract_metadata_with_llm(text):
     prompt = f"""
     You are an AI assistant that extracts metadata from tender documents.
     Understand the content of the document and extract the following metadata fields.
@@ -149,7 +150,7 @@ def extract_metadata_with_llm(text):
     Only return a valid JSON. Here's the document content:
     \"\"\"{text}\"\"\"
     """
-    response = llm.invoke(prompt)
+    response = await llm_gateway.acomplete(prompt)
     print("[extract_metadata_with_llm] LLM Response:", response)
     return json.loads(response)
 
@@ -200,9 +201,7 @@ def extract_metadata_with_llm(text):
 #         logging.error(f"Failed to parse prompt suggestions: {response}")
 #         return []
 
-def extract_prompt_suggestions(text: str) -> List[str]:
-    client = OpenAI(api_key=app_settings.openai_api_key)
-
+async def extract_prompt_suggestions(text: str) -> List[str]:
     prompt = f"""
     You are an assistant that ***STRICTLY*** generates insightful prompt suggestions based on RFQ documents.
 
@@ -226,16 +225,13 @@ def extract_prompt_suggestions(text: str) -> List[str]:
     """
 
     try:
-        response = client.chat.completions.create(
+        content = await llm_gateway.achat(
+            [{"role": "system", "content": prompt}],
             model="gpt-4o-2024-08-06",
-            messages=[{"role": "system", "content": prompt}],
-            response_format={"type": "json_object"},
-            temperature=0,
+            response_format={"type": "json_object"}
         )
 
-        logging.info("Prompt: %s", response)
-
-        content = response.choices[0].message.content
+        logging.info("Prompt: %s", content)
 
         try:
             data = json.loads(content)
@@ -380,77 +376,72 @@ def fetch_metadata_from_db(db_user, db_name, db_password):
 
 
 def get_recent_activity(db_user, db_name, db_password):
-    conn = open_tenant_db_connection(db_user, db_name, db_password)
-    cursor = conn.cursor()
-
-    # Fetch RFQs from last 30 days
-    cursor.execute("""
-        SELECT id, title, created_at
-        FROM rfqs
-        WHERE created_at >= NOW() - INTERVAL '30 days'
-        ORDER BY created_at DESC
-    """)
-    rfq_rows = cursor.fetchall()
-
-    # Build list of RFQs as dicts
-    rfqs = [
-        {
-            "id": str(row[0]),
-            "title": row[1],
-            "created_at": row[2].isoformat() if row[2] else None,
-        }
-        for row in rfq_rows
-    ]
+    with tenant_connection(db_user, db_name, db_password) as conn:
+        cursor = conn.cursor()
 
-    # Fetch proposals linked to those RFQs, also last 30 days
-    cursor.execute("""
-        SELECT id, rfq_id, title, content, is_winning, created_at
-        FROM proposals
-        WHERE created_at >= NOW() - INTERVAL '30 days'
-          AND rfq_id IN (
-              SELECT id FROM rfqs WHERE created_at >= NOW() - INTERVAL '30 days'
-          )
-        ORDER BY created_at DESC
-    """)
-    proposal_rows = cursor.fetchall()
-
-    proposals = [
-        {
-            "id": str(row[0]),
-            "rfq_id": str(row[1]),
-            "title": row[2],
-            "content": row[3],
-            "is_winning": row[4],
-            "created_at": row[5].isoformat() if row[5] else None,
-        }
-        for row in proposal_rows
-    ]
+        # Fetch RFQs from last 30 days
+        cursor.execute("""
+            SELECT id, title, created_at
+            FROM rfqs
+            WHERE created_at >= NOW() - INTERVAL '30 days'
+            ORDER BY created_at DESC
+        """)
+        rfq_rows = cursor.fetchall()
+
+        # Build list of RFQs as dicts
+        rfqs = [
+            {
+                "id": str(row[0]),
+                "title": row[1],
+                "created_at": row[2].isoformat() if row[2] else None,
+            }
+            for row in rfq_rows
+        ]
+
+        # Fetch proposals linked to those RFQs, also last 30 days
+        cursor.execute("""
+            SELECT id, rfq_id, title, content, is_winning, created_at
+            FROM proposals
+            WHERE created_at >= NOW() - INTERVAL '30 days'
+              AND rfq_id IN (
+                  SELECT id FROM rfqs WHERE created_at >= NOW() - INTERVAL '30 days'
+              )
+            ORDER BY created_at DESC
+        """)
+        proposal_rows = cursor.fetchall()
+
+        proposals = [
+            {
+                "id": str(row[0]),
+                "rfq_id": str(row[1]),
+                "title": row[2],
+                "content": row[3],
+                "is_winning": row[4],
+                "created_at": row[5].isoformat() if row[5] else None,
+            }
+            for row in proposal_rows
+        ]
 
-    cursor.close()
-    conn.close()
+        cursor.close()
 
-    return {"rfqs": rfqs, "proposals": proposals}
+        return {"rfqs": rfqs, "proposals": proposals}
 
 
 # --- Get Winning Proposals ---
 def get_winning_proposals(db_user: str, db_name: str, db_password: str):
-    conn = open_tenant_db_connection(db_user, db_name, db_password)
-    cursor = conn.cursor()
+    with tenant_connection(db_user, db_name, db_password) as conn:
+        cursor = conn.cursor()
 
-    cursor.execute("""
-        SELECT * FROM proposals WHERE is_winning = TRUE;
-    """)
-    winning_proposals = cursor.fetchall()
+        cursor.execute("""
+            SELECT * FROM proposals WHERE is_winning = TRUE;
+        """)
+        winning_proposals = cursor.fetchall()
 
-    cursor.close()
-    conn.close()
-    return winning_proposals
+        cursor.close()
+        return winning_proposals
 
 
 async def extract_proposal_metadata_llm(proposal_text: str) -> dict:
-    from langchain_openai import OpenAI # type: ignore
-    llm = OpenAI(temperature = 0, openai_api_key=app_settings.openai_api_key)
-    
     prompt = f"""
     <CONTEXT>
     You are a CDGA staff who specializes in giving titles to proposals. 
@@ -467,7 +458,7 @@ async def extract_proposal_metadata_llm(proposal_text: str) -> dict:
     Return it as JSON with 'title' and 'summary'.
     """
     
-    response = llm.invoke(prompt)
+    response = await llm_gateway.acomplete(prompt)
     try:
         return json.loads(response.strip())
     except Exception as e:
@@ -477,16 +468,19 @@ async def extract_proposal_metadata_llm(proposal_text: str) -> dict:
     
 
 def store_proposal_to_db(db_user, db_name, db_password, rfq_id, title, content, summary, is_winning):
-    conn = open_tenant_db_connection(db_user, db_name, db_password)
-    cursor = conn.cursor()
+    with tenant_connection(db_user, db_name, db_password) as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            INSERT INTO proposals (rfq_id, proposal_title, proposal_content, summary, is_winning, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            RETURNING proposal_id
+        """, (
+            rfq_id, title, content, summary, is_winning, datetime.now(timezone.utc)
+        ))
+        proposal_id = cursor.fetchone()[0]
 
-    cursor.execute("""
-        INSERT INTO proposals (rfq_id, proposal_title, proposal_content, summary, is_winning, created_at)
-        VALUES (%s, %s, %s, %s, %s, %s)
-    """, (
-        rfq_id, title, content, summary, is_winning, datetime.now(timezone.utc)
-    ))
+        conn.commit()
+        cursor.close()
 
-    conn.commit()
-    cursor.close()
-    conn.close()
+    exemplar_index.add_proposal(db_name, proposal_id, title, content, is_winning)
@@ -0,0 +1,22 @@
+"""
+Shared SQLAlchemy engine for the master database (users registry and ingestion job queue).
+
+Both the web app and the ingestion workers import `master_engine` from here so each process keeps a
+single connection pool to the master database.
+"""
+
+from sqlalchemy import create_engine # type: ignore
+from config.appconfig import settings as app_settings
+
+
+master_engine = create_engine(
+    app_settings.master_db_url,
+    pool_pre_ping=True,       # Checks connection health before use
+    pool_recycle=3600,        # Recycles connections every hour
+    connect_args={
+        "keepalives": 1,
+        "keepalives_idle": 30,
+        "keepalives_interval": 10,
+        "keepalives_count": 5,
+    }
+)
@@ -0,0 +1,83 @@
+"""
+Directory of tenant database credentials, keyed by user email.
+
+Resolving a tenant used to build a new SQLAlchemy engine and query the master `users` table on every
+call, and a single `/api/retrieve` request resolves the same tenant several times. `TenantDirectory`
+reads through the shared `master_engine` and keeps the records in a TTL + LRU cache. Writers of the
+`users` table (`register_user`, `onboard_user`) call `invalidate` so a changed record is re-read.
+"""
+
+import logging
+import threading
+from typing import NamedTuple, Optional
+from cachetools import TTLCache # type: ignore
+from sqlalchemy import select # type: ignore
+from config.appconfig import settings as app_settings
+from database.master_db import master_engine
+from models.models import users_table
+
+logger = logging.getLogger(__name__)
+
+
+class TenantRecord(NamedTuple):
+    db_user: str
+    db_name: str
+    db_password: str
+    working_dir: str
+
+
+class TenantDirectory:
+    def __init__(self, engine, maxsize: int, ttl: float):
+        self._engine = engine
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, email: str) -> Optional[TenantRecord]:
+        """Returns the tenant record for `email`, or None if the user is not registered."""
+        with self._lock:
+            record = self._cache.get(email)
+            if record is not None:
+                self.hits += 1
+                return record
+            self.misses += 1
+
+        with self._engine.connect() as conn:
+            row = conn.execute(
+                select(
+                    users_table.c.user,
+                    users_table.c.database_name,
+                    users_table.c.password,
+                    users_table.c.working_dir
+                ).where(users_table.c.email == email)
+            ).fetchone()
+
+        # Unknown users are not cached so a fresh registration is visible immediately
+        if not row:
+            return None
+
+        record = TenantRecord(row.user, row.database_name, row.password, row.working_dir)
+        with self._lock:
+            self._cache[email] = record
+        logger.info("Tenant record for %s loaded from the master database (DB: %s)", email, record.db_name)
+        return record
+
+    def invalidate(self, email: Optional[str] = None) -> None:
+        """Drops the cached record of `email`, or every cached record when no email is given."""
+        with self._lock:
+            if email is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(email, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+tenant_directory = TenantDirectory(
+    master_engine,
+    maxsize=app_settings.tenant_directory_cache_size,
+    ttl=app_settings.tenant_directory_cache_ttl,
+)
@@ -0,0 +1,277 @@
+"""
+Bounded, lazily created connection pools for the tenant databases.
+
+Every tenant has its own database and role, so a single psycopg2 pool cannot serve them all. The
+`TenantPoolManager` keeps one small pool per `(db_user, db_name)`, created on first use, and:
+
+- caps the connections of each tenant pool (`max_per_tenant`),
+- caps the connections open across *all* tenants (`max_total`); when the cap is reached an idle
+  connection of another tenant is closed to make room, otherwise the caller waits (`tenant_pools`
+  gets what `DB_POOL_MAX_CONNECTIONS` leaves after the asyncpg pools of `database.async_db`),
+- evicts the least recently used tenant pools once more than `max_tenants` are open, and closes
+  connections that stayed idle longer than `idle_timeout`,
+- exposes gauges for checked-out, idle and waiting connections through `stats()`.
+
+`tenant_connection(...)` is the context manager for new code. `open_tenant_db_connection(...)` in
+`database.db_helper` keeps returning a connection object whose `close()` hands it back to the pool.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import List, Tuple
+import psycopg2 # type: ignore
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE # type: ignore
+from config.appconfig import settings as app_settings
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no tenant connection became available within the pool timeout."""
+
+
+class PooledConnection:
+    """psycopg2 connection proxy whose `close()` returns the connection to its tenant pool."""
+
+    def __init__(self, manager: "TenantPoolManager", key: Tuple[str, str], conn):
+        self._manager = manager
+        self._key = key
+        self._conn = conn
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise psycopg2.InterfaceError("connection already returned to the pool")
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Same semantics as a psycopg2 connection: end the transaction, keep the connection open
+        if self._conn is None:
+            return
+        if exc_type is None:
+            self._conn.commit()
+        else:
+            self._conn.rollback()
+
+    @property
+    def closed(self):
+        return 1 if self._conn is None else self._conn.closed
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._manager.release(self._key, conn)
+
+
+class _TenantPool:
+    def __init__(self, db_password: str):
+        self.db_password = db_password
+        self.idle: List[Tuple[object, float]] = []
+        self.checked_out = 0
+
+    @property
+    def size(self) -> int:
+        return len(self.idle) + self.checked_out
+
+
+class TenantPoolManager:
+    def __init__(self, max_per_tenant: int, max_total: int, max_tenants: int, timeout: float, idle_timeout: float):
+        self.max_per_tenant = max_per_tenant
+        self.max_total = max_total
+        self.max_tenants = max_tenants
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._pools: "OrderedDict[Tuple[str, str], _TenantPool]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._total = 0
+        self._waiting = 0
+
+    # ---------------- Acquire / release ----------------
+
+    def acquire(self, db_user: str, db_name: str, db_password: str) -> PooledConnection:
+        key = (db_user, db_name)
+        deadline = time.monotonic() + self.timeout
+        to_close = []
+
+        with self._cond:
+            while True:
+                pool = self._get_pool(key, db_password, to_close)
+                to_close += self._expire_idle(pool)
+
+                if pool.idle:
+                    conn, _ = pool.idle.pop()
+                    pool.checked_out += 1
+                    break
+
+                if pool.size < self.max_per_tenant and (self._total < self.max_total or self._steal_idle(key, to_close)):
+                    conn = None
+                    pool.checked_out += 1
+                    self._total += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"No connection available for tenant database '{db_name}' within {self.timeout}s")
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+        self._close_all(to_close)
+
+        if conn is None or conn.closed:
+            try:
+                conn = self._connect(db_user, db_name, db_password)
+            except Exception:
+                self._forget(key)
+                raise
+        return PooledConnection(self, key, conn)
+
+    def release(self, key: Tuple[str, str], conn) -> None:
+        reusable = not conn.closed
+        if reusable and conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                reusable = False
+
+        with self._cond:
+            pool = self._pools.get(key)
+            if pool is not None:
+                pool.checked_out -= 1
+            if pool is not None and reusable:
+                pool.idle.append((conn, time.monotonic()))
+                conn = None
+            else:
+                self._total -= 1
+            # Waiters are for different tenants: a single notify can wake one that cannot use the slot
+            self._cond.notify_all()
+
+        if conn is not None:
+            self._close_all([conn])
+
+    @contextmanager
+    def connection(self, db_user: str, db_name: str, db_password: str):
+        conn = self.acquire(db_user, db_name, db_password)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # ---------------- Gauges ----------------
+
+    def stats(self) -> dict:
+        with self._cond:
+            checked_out = sum(pool.checked_out for pool in self._pools.values())
+            idle = sum(len(pool.idle) for pool in self._pools.values())
+            return {
+                "checked_out": checked_out,
+                "idle": idle,
+                "waiting": self._waiting,
+                "total": self._total,
+                "max_total": self.max_total,
+                "tenant_pools": len(self._pools),
+            }
+
+    def close_all(self) -> None:
+        with self._cond:
+            to_close = [conn for pool in self._pools.values() for conn, _ in pool.idle]
+            for pool in self._pools.values():
+                self._total -= len(pool.idle)
+                pool.idle.clear()
+            self._cond.notify_all()
+        self._close_all(to_close)
+
+    # ---------------- Internals (called with the lock held) ----------------
+
+    def _get_pool(self, key, db_password: str, to_close: list) -> _TenantPool:
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = _TenantPool(db_password)
+            self._evict_lru_pools(key, to_close)
+        elif pool.db_password != db_password:
+            # Credentials changed: drop the idle connections opened with the old password
+            to_close += [conn for conn, _ in pool.idle]
+            self._total -= len(pool.idle)
+            pool.idle.clear()
+            pool.db_password = db_password
+        self._pools.move_to_end(key)
+        return pool
+
+    def _evict_lru_pools(self, keep, to_close: list) -> None:
+        """Drops idle least recently used pools over `max_tenants`; `keep` (the pool being acquired from) stays."""
+        for key in list(self._pools.keys()):
+            if len(self._pools) <= self.max_tenants:
+                return
+            pool = self._pools[key]
+            if key != keep and pool.checked_out == 0:
+                to_close += [conn for conn, _ in pool.idle]
+                self._total -= len(pool.idle)
+                del self._pools[key]
+                logger.info("Evicted idle tenant pool for %s/%s", *key)
+
+    def _expire_idle(self, pool: _TenantPool) -> list:
+        cutoff = time.monotonic() - self.idle_timeout
+        expired = [conn for conn, last_used in pool.idle if last_used < cutoff]
+        if expired:
+            pool.idle = [(conn, last_used) for conn, last_used in pool.idle if last_used >= cutoff]
+            self._total -= len(expired)
+        return expired
+
+    def _steal_idle(self, key, to_close: list) -> bool:
+        """Closes an idle connection of the least recently used other tenant to free a global slot."""
+        for other_key, pool in self._pools.items():
+            if other_key != key and pool.idle:
+                conn, _ = pool.idle.pop(0)
+                to_close.append(conn)
+                self._total -= 1
+                return True
+        return False
+
+    def _forget(self, key) -> None:
+        with self._cond:
+            pool = self._pools.get(key)
+            if pool is not None:
+                pool.checked_out -= 1
+            self._total -= 1
+            self._cond.notify_all()
+
+    # ---------------- Internals (called without the lock) ----------------
+
+    @staticmethod
+    def _connect(db_user: str, db_name: str, db_password: str):
+        return psycopg2.connect(
+            user=db_user,
+            dbname=db_name,
+            password=db_password,
+            host=app_settings.host,
+            port=app_settings.port_db,
+        )
+
+    @staticmethod
+    def _close_all(connections: list) -> None:
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+tenant_pools = TenantPoolManager(
+    max_per_tenant=app_settings.tenant_pool_max_per_tenant,
+    max_total=app_settings.sync_db_pool_max_connections,
+    max_tenants=app_settings.tenant_pool_max_tenants,
+    timeout=app_settings.tenant_pool_timeout,
+    idle_timeout=app_settings.tenant_pool_idle_timeout,
+)
+
+
+def tenant_connection(db_user: str, db_name: str, db_password: str):
+    """Context manager yielding a pooled connection to a tenant database."""
+    return tenant_pools.connection(db_user, db_name, db_password)
@@ -3,14 +3,23 @@ Processes various document types (TXT, PDF, Webpages) to extract and clean text
 
 Functions:
 - `extract_txt_content`: Extracts text from a TXT file.
+- `extract_pdf`: Single-pass PDF extraction (pages, tables and plain text), cached by the SHA-256 of the file bytes.
 - `extract_text_and_tables_from_pdf`: Extracts text and tables from a PDF file.
 - `preprocess_document`: Preprocesses PDF documents by extracting text and tables.
 - `process_webpage`: Extracts and cleans text content from a webpage using trafilatura.
 """
 
 
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+from cachetools import LRUCache # type: ignore
 from langchain_core.documents.base import Document # type: ignore
 import trafilatura # type: ignore
+from config.appconfig import settings as app_settings
 from utils import clean_text
 import logging
 import pdfplumber #type: ignore
@@ -18,10 +27,152 @@ import fitz #type: ignore
 
 logging.basicConfig(level=logging.INFO)
 
+# Length of the text handed to the metadata / prompt-suggestion LLM calls
+METADATA_TEXT_LIMIT = 10000
+
+
+@dataclass
+class PdfExtraction:
+    sha256: str
+    pages: List[str]
+    tables: List[dict] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.pages)
+
+    @property
+    def metadata_text(self) -> str:
+        return self.text[:METADATA_TEXT_LIMIT]
+
+    @property
+    def rag_text(self) -> str:
+        """Page-tagged text followed by the tables, the layout LightRAG has always been given."""
+        text = "".join(
+            f"\n\n[Page {page_num}]\n{page_text}"
+            for page_num, page_text in enumerate(self.pages, start=1) if page_text.strip()
+        )
+        table_texts = []
+        for table in self.tables:
+            table_str = f"\n\n[Page {table['page']} - Table {table['index']}]\n"
+            for row in table["rows"]:
+                table_str += " | ".join(cell if cell is not None else "" for cell in row) + "\n"
+            table_texts.append(table_str)
+        return text + "\n\n".join(table_texts)
+
+
+class ExtractionCache:
+    """
+    PDF extractions keyed by content hash: an in-process LRU in front of JSON files on disk. The files
+    are kept under `max_disk_bytes`, least recently used first out (a disk hit refreshes the mtime).
+    """
+
+    def __init__(self, directory: str, maxsize: int, max_disk_bytes: int):
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+
+    def _path(self, sha256: str) -> str:
+        return os.path.join(self.directory, f"{sha256}.json")
+
+    def get(self, sha256: str) -> Optional[PdfExtraction]:
+        with self._lock:
+            extraction = self._memory.get(sha256)
+        if extraction is not None:
+            return extraction
+
+        try:
+            with open(self._path(sha256), "r", encoding="utf-8") as f:
+                extraction = PdfExtraction(**json.load(f))
+            os.utime(self._path(sha256))
+        except (OSError, ValueError, TypeError):
+            return None
+
+        with self._lock:
+            self._memory[sha256] = extraction
+        return extraction
+
+    def put(self, extraction: PdfExtraction) -> None:
+        with self._lock:
+            self._memory[extraction.sha256] = extraction
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{self._path(extraction.sha256)}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(asdict(extraction), f)
+            os.replace(tmp_path, self._path(extraction.sha256))
+        except OSError as e:
+            logging.warning("Could not persist PDF extraction %s: %s", extraction.sha256, e)
+            return
+        self._prune()
+
+    def _prune(self) -> None:
+        """Deletes the least recently used files until the directory fits in `max_disk_bytes`."""
+        try:
+            entries = []
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(".json") and entry.is_file():
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError as e:
+            logging.warning("Could not scan the PDF extraction cache: %s", e)
+            return
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Pruned concurrently by another worker
+                pass
+            except OSError as e:
+                logging.warning("Could not prune PDF extraction %s: %s", path, e)
+                continue
+            total -= size
+            removed += 1
+        if removed:
+            logging.info("🧹 Pruned %d PDF extractions from the disk cache", removed)
+
+
+extraction_cache = ExtractionCache(
+    app_settings.extraction_cache_dir,
+    app_settings.extraction_cache_size,
+    max_disk_bytes=app_settings.extraction_cache_disk_mb * 1024 * 1024,
+)
+
+
 class DocumentProcessor:
     def __init__(self):
         pass
 
+    def extract_pdf(self, file_bytes: bytes) -> PdfExtraction:
+        """
+        Parses a PDF once with PyMuPDF, collecting the text and tables of every page. The result is
+        cached by the SHA-256 of the bytes, so the same file is never parsed twice.
+        """
+        sha256 = hashlib.sha256(file_bytes).hexdigest()
+        cached = extraction_cache.get(sha256)
+        if cached is not None:
+            logging.info("♻️ PDF extraction cache hit for %s", sha256[:12])
+            return cached
+
+        pages = []
+        tables = []
+        with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+            for page_num, page in enumerate(doc, start=1):
+                pages.append(page.get_text())
+                for table_idx, table in enumerate(page.find_tables().tables, start=1):
+                    tables.append({"page": page_num, "index": table_idx, "rows": table.extract()})
+
+        extraction = PdfExtraction(sha256=sha256, pages=pages, tables=tables)
+        extraction_cache.put(extraction)
+        return extraction
+
     def extract_text_from_pdf(self, filepath):
         doc = fitz.open(filepath)
         text = "\n".join([page.get_text() for page in doc])
@@ -0,0 +1,155 @@
+"""
+Content-addressed cache of text embeddings, in front of LightRAG's embedding function.
+
+LightRAG embeds every chunk, entity and relation it inserts and every query it answers. Re-ingesting
+a document, annexes that repeat the same clauses and repeated questions used to pay for fresh
+3072-dim `text-embedding-3-large` vectors each time. `embedding_cache.aembed` keys each text on the
+SHA-256 of the model name and the whitespace-normalized text, serves the hits and sends only the
+misses to the API (one request for all of them), then returns the vectors in input order.
+
+Lookups go through an in-process LRU (`EMBEDDING_CACHE_SIZE` vectors) and then the `embedding_cache`
+table in the master database, where vectors are stored as float32 bytes and shared by the web app
+and the ingestion workers. A failed database lookup or write only costs the cache, never the call.
+
+Hit rates are exported on `/api/metrics` (`embedding_cache_lookups_total` by model and result) and
+summarized on `/api/health/embedding-cache`.
+
+- `normalize_embedding_text`: Whitespace normalization applied before hashing.
+- `embedding_cache.aembed`: Embeddings of a list of texts, in order, computing only the misses.
+- `embedding_cache.stats`: Memory hits, database hits and misses per model.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import threading
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List
+import numpy as np # type: ignore
+from cachetools import LRUCache # type: ignore
+from prometheus_client import Counter # type: ignore
+from sqlalchemy import select # type: ignore
+from sqlalchemy.dialects.postgresql import insert # type: ignore
+from config.appconfig import settings as app_settings
+from database.master_db import master_engine
+from models.models import embedding_cache_table
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_LOOKUPS = Counter(
+    "embedding_cache_lookups_total", "Embedding cache lookups by result (memory_hit/db_hit/miss)", ["model", "result"]
+)
+
+_STAT_FIELDS = {"memory_hit": "memory_hits", "db_hit": "db_hits", "miss": "misses"}
+
+# Keys per `IN (...)` lookup
+_DB_LOOKUP_BATCH = 500
+
+
+def normalize_embedding_text(text: str) -> str:
+    """Surrounding and repeated whitespace does not change what a text means; case does."""
+    return re.sub(r"\s+", " ", (text or "").strip())
+
+
+class EmbeddingCache:
+    def __init__(self, engine, maxsize: int):
+        self._engine = engine
+        self._memory = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"memory_hits": 0, "db_hits": 0, "misses": 0})
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\x00{normalize_embedding_text(text)}".encode("utf-8")).hexdigest()
+
+    def _count(self, model: str, result: str, count: int) -> None:
+        if count:
+            with self._lock:
+                self._stats[model][_STAT_FIELDS[result]] += count
+            EMBEDDING_CACHE_LOOKUPS.labels(model, result).inc(count)
+
+    # ---------------- Lookups ----------------
+
+    def _lookup_memory(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        with self._lock:
+            return {key: self._memory[key] for key in keys if key in self._memory}
+
+    def _lookup_db(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        try:
+            with self._engine.connect() as conn:
+                for start in range(0, len(keys), _DB_LOOKUP_BATCH):
+                    rows = conn.execute(
+                        select(embedding_cache_table.c.cache_key, embedding_cache_table.c.vector)
+                        .where(embedding_cache_table.c.cache_key.in_(keys[start:start + _DB_LOOKUP_BATCH]))
+                    ).fetchall()
+                    for row in rows:
+                        found[row.cache_key] = np.frombuffer(row.vector, dtype=np.float32)
+        except Exception as e:
+            logger.warning("Embedding cache lookup failed: %s", e)
+            return {}
+        with self._lock:
+            self._memory.update(found)
+        return found
+
+    def _store(self, model: str, vectors: Dict[str, np.ndarray]) -> None:
+        with self._lock:
+            self._memory.update(vectors)
+        try:
+            with self._engine.begin() as conn:
+                conn.execute(
+                    insert(embedding_cache_table)
+                    .values([
+                        {"cache_key": key, "model": model, "dims": int(vector.shape[0]), "vector": vector.tobytes()}
+                        for key, vector in vectors.items()
+                    ])
+                    .on_conflict_do_nothing(index_elements=["cache_key"])
+                )
+        except Exception as e:
+            logger.warning("Embedding cache write failed for %s: %s", model, e)
+
+    async def aembed(self, texts: List[str], model: str,
+                     compute: Callable[[List[str]], Awaitable[np.ndarray]]) -> np.ndarray:
+        """`compute(texts)` embeds the misses; each distinct text is sent at most once."""
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        keys = [self.make_key(model, text) for text in texts]
+        # Distinct keys, each with the first text that produced it
+        distinct = {}
+        for key, text in zip(keys, texts):
+            distinct.setdefault(key, text)
+
+        vectors = self._lookup_memory(list(distinct))
+        self._count(model, "memory_hit", sum(key in vectors for key in keys))
+
+        pending = [key for key in distinct if key not in vectors]
+        if pending:
+            found = await asyncio.to_thread(self._lookup_db, pending)
+            vectors.update(found)
+            self._count(model, "db_hit", sum(key in found for key in keys))
+
+        missing = [key for key in distinct if key not in vectors]
+        self._count(model, "miss", sum(key not in vectors for key in keys))
+        if missing:
+            computed = np.asarray(await compute([distinct[key] for key in missing]), dtype=np.float32)
+            fresh = dict(zip(missing, computed))
+            vectors.update(fresh)
+            await asyncio.to_thread(self._store, model, fresh)
+            logger.info("🧮 Embedded %d of %d texts (%s); the rest came from the cache", len(missing), len(texts), model)
+
+        return np.stack([vectors[key] for key in keys])
+
+    # ---------------- Metrics ----------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = {}
+            for model, counts in self._stats.items():
+                lookups = counts["memory_hits"] + counts["db_hits"] + counts["misses"]
+                hits = counts["memory_hits"] + counts["db_hits"]
+                models[model] = {**counts, "hit_rate": round(hits / lookups, 4) if lookups else 0.0}
+            return {"memory_entries": len(self._memory), "models": models}
+
+
+embedding_cache = EmbeddingCache(master_engine, maxsize=app_settings.embedding_cache_size)
@@ -0,0 +1,237 @@
+"""
+Durable LangGraph checkpointer in the master database, with retention.
+
+The compiled graph used to checkpoint into an `InMemorySaver`: checkpoints were lost on restart, not
+visible to the other workers, and only ever removed by `release_thread`. `checkpoint_store` keeps them
+in the master database through `AsyncPostgresSaver` (tables `checkpoints`, `checkpoint_blobs` and
+`checkpoint_writes`, created by `setup()`), over a small psycopg connection pool opened by the FastAPI
+lifespan.
+
+State channels are serialized as msgpack by LangGraph's `JsonPlusSerializer`; `CompressedSerializer`
+additionally zlib-compresses payloads of `CHECKPOINT_COMPRESS_MIN_BYTES` or more (retrieved examples,
+drafts and message histories compress well).
+
+Retention keeps storage flat under sustained traffic:
+- `compact_thread` keeps the last `CHECKPOINT_KEEP_LAST` checkpoints of a thread (with their pending
+  writes and the channel blobs they reference) and drops the rest.
+- `prune` deletes whole threads whose newest checkpoint is older than `CHECKPOINT_THREAD_TTL_HOURS`
+  and compacts threads that have been idle for `CHECKPOINT_COMPACT_GRACE` seconds. `run_pruner`
+  repeats it every `CHECKPOINT_PRUNE_INTERVAL` seconds.
+
+With `GRAPH_CHECKPOINTER=memory` (or before `open()`, e.g. in scripts that compile the graph on their
+own) the graph falls back to an `InMemorySaver`.
+"""
+
+import asyncio
+import logging
+import zlib
+from typing import Any, List, Optional, Tuple
+from langgraph.checkpoint.base import BaseCheckpointSaver # type: ignore
+from langgraph.checkpoint.memory import InMemorySaver # type: ignore
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver # type: ignore
+from langgraph.checkpoint.serde.base import SerializerProtocol # type: ignore
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer # type: ignore
+from psycopg.rows import dict_row # type: ignore
+from psycopg_pool import AsyncConnectionPool # type: ignore
+from config.appconfig import settings as app_settings
+
+logger = logging.getLogger(__name__)
+
+_ZLIB_SUFFIX = "+zlib"
+
+
+class CompressedSerializer(SerializerProtocol):
+    """`JsonPlusSerializer` whose typed payloads are zlib-compressed above a size threshold."""
+
+    def __init__(self, min_bytes: int, level: int = 6):
+        self.inner = JsonPlusSerializer()
+        self.min_bytes = min_bytes
+        self.level = level
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.inner.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self.inner.loads(data)
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.inner.dumps_typed(obj)
+        if data and len(data) >= self.min_bytes:
+            return type_ + _ZLIB_SUFFIX, zlib.compress(data, self.level)
+        return type_, data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.endswith(_ZLIB_SUFFIX):
+            return self.inner.loads_typed((type_[:-len(_ZLIB_SUFFIX)], zlib.decompress(payload)))
+        return self.inner.loads_typed(data)
+
+
+# Threads whose newest checkpoint is older than the TTL
+_EXPIRED_THREADS_SQL = """
+    SELECT thread_id
+    FROM checkpoints
+    GROUP BY thread_id
+    HAVING max((checkpoint ->> 'ts')::timestamptz) < now() - make_interval(secs => %(ttl)s)
+    LIMIT %(limit)s
+"""
+
+# Idle threads holding more checkpoints than are kept; in-flight runs are left alone
+_OVERGROWN_THREADS_SQL = """
+    SELECT DISTINCT thread_id
+    FROM (
+        SELECT thread_id
+        FROM checkpoints
+        GROUP BY thread_id, checkpoint_ns
+        HAVING count(*) > %(keep)s
+           AND max((checkpoint ->> 'ts')::timestamptz) < now() - make_interval(secs => %(grace)s)
+    ) overgrown
+    LIMIT %(limit)s
+"""
+
+_DELETE_THREADS_SQL = (
+    "DELETE FROM checkpoint_writes WHERE thread_id = ANY(%(threads)s)",
+    "DELETE FROM checkpoint_blobs WHERE thread_id = ANY(%(threads)s)",
+    "DELETE FROM checkpoints WHERE thread_id = ANY(%(threads)s)",
+)
+
+_TRIM_CHECKPOINTS_SQL = """
+    WITH doomed AS (
+        SELECT thread_id, checkpoint_ns, checkpoint_id
+        FROM (
+            SELECT thread_id, checkpoint_ns, checkpoint_id,
+                   row_number() OVER (PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC) AS recency
+            FROM checkpoints
+            WHERE thread_id = ANY(%(threads)s)
+        ) ranked
+        WHERE recency > %(keep)s
+    ), dropped_writes AS (
+        DELETE FROM checkpoint_writes w
+        USING doomed d
+        WHERE w.thread_id = d.thread_id AND w.checkpoint_ns = d.checkpoint_ns AND w.checkpoint_id = d.checkpoint_id
+    )
+    DELETE FROM checkpoints c
+    USING doomed d
+    WHERE c.thread_id = d.thread_id AND c.checkpoint_ns = d.checkpoint_ns AND c.checkpoint_id = d.checkpoint_id
+"""
+
+# Channel values no remaining checkpoint of the thread points at
+_ORPHAN_BLOBS_SQL = """
+    DELETE FROM checkpoint_blobs b
+    WHERE b.thread_id = ANY(%(threads)s)
+      AND NOT EXISTS (
+          SELECT 1 FROM checkpoints c
+          WHERE c.thread_id = b.thread_id
+            AND c.checkpoint_ns = b.checkpoint_ns
+            AND c.checkpoint -> 'channel_versions' ->> b.channel = b.version
+      )
+"""
+
+PRUNE_BATCH = 500
+
+
+class CheckpointStore:
+    def __init__(self):
+        self._pool: Optional[AsyncConnectionPool] = None
+        self._saver: Optional[AsyncPostgresSaver] = None
+        self._memory: Optional[InMemorySaver] = None
+
+    @property
+    def durable(self) -> bool:
+        return self._saver is not None
+
+    async def open(self) -> None:
+        if app_settings.graph_checkpointer != "postgres" or self._saver is not None:
+            return
+        self._pool = AsyncConnectionPool(
+            app_settings.master_db_url,
+            min_size=1,
+            max_size=app_settings.checkpoint_pool_max_size,
+            # Settings AsyncPostgresSaver requires of its connections
+            kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+            open=False,
+        )
+        await self._pool.open()
+        saver = AsyncPostgresSaver(self._pool, serde=CompressedSerializer(app_settings.checkpoint_compress_min_bytes))
+        await saver.setup()
+        self._saver = saver
+        logger.info("💾 Graph checkpoints are stored in the master database")
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+        self._pool = None
+        self._saver = None
+
+    def checkpointer(self) -> BaseCheckpointSaver:
+        """The saver to compile the graph with."""
+        if self._saver is not None:
+            return self._saver
+        if app_settings.graph_checkpointer == "postgres":
+            logger.warning("Checkpoint store not opened; compiling the graph with an in-memory checkpointer")
+        if self._memory is None:
+            self._memory = InMemorySaver()
+        return self._memory
+
+    # ---------------- Retention ----------------
+
+    async def _run(self, statements, params: dict) -> None:
+        async with self._pool.connection() as conn:
+            async with conn.transaction():
+                for sql in statements:
+                    await conn.execute(sql, params)
+
+    async def _select_threads(self, sql: str, params: dict) -> List[str]:
+        async with self._pool.connection() as conn:
+            cursor = await conn.execute(sql, {**params, "limit": PRUNE_BATCH})
+            return [row["thread_id"] for row in await cursor.fetchall()]
+
+    async def compact_threads(self, thread_ids: List[str]) -> None:
+        """Keeps the newest `CHECKPOINT_KEEP_LAST` checkpoints of each thread. Call when no run is writing to it."""
+        if not self.durable or not thread_ids:
+            return
+        await self._run(
+            (_TRIM_CHECKPOINTS_SQL, _ORPHAN_BLOBS_SQL),
+            {"threads": thread_ids, "keep": app_settings.checkpoint_keep_last},
+        )
+
+    async def compact_thread(self, thread_id: str) -> None:
+        await self.compact_threads([thread_id])
+
+    async def prune(self) -> dict:
+        """One retention pass: deletes expired threads, then compacts overgrown idle ones."""
+        expired = compacted = 0
+        if not self.durable:
+            return {"expired_threads": expired, "compacted_threads": compacted}
+
+        ttl = app_settings.checkpoint_thread_ttl_hours * 3600
+        while threads := await self._select_threads(_EXPIRED_THREADS_SQL, {"ttl": ttl}):
+            await self._run(_DELETE_THREADS_SQL, {"threads": threads})
+            expired += len(threads)
+            if len(threads) < PRUNE_BATCH:
+                break
+
+        params = {"keep": app_settings.checkpoint_keep_last, "grace": app_settings.checkpoint_compact_grace}
+        while threads := await self._select_threads(_OVERGROWN_THREADS_SQL, params):
+            await self.compact_threads(threads)
+            compacted += len(threads)
+            if len(threads) < PRUNE_BATCH:
+                break
+
+        return {"expired_threads": expired, "compacted_threads": compacted}
+
+    async def run_pruner(self) -> None:
+        """Background task started by the lifespan; cancel it on shutdown."""
+        while True:
+            await asyncio.sleep(app_settings.checkpoint_prune_interval)
+            try:
+                result = await self.prune()
+                if result["expired_threads"] or result["compacted_threads"]:
+                    logger.info("🧹 Checkpoint retention: %s", result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Checkpoint pruning failed: %s", e)
+
+
+checkpoint_store = CheckpointStore()
@@ -0,0 +1,140 @@
+"""
+Process-wide registry of compiled LangGraph workflows.
+
+Building the `StateGraph` (registering every node, wiring the conditional edges and compiling it)
+used to happen on every `/api/retrieve` and `/api/resume` call. The registry compiles each workflow
+once — normally from the background warm-up started by the FastAPI `lifespan` — and hands the same compiled app to every request.
+
+- `GraphRegistry.compile_all`: Compiles every registered workflow (called by the startup warm-up).
+- `GraphRegistry.get`: Returns the compiled app for a workflow, compiling it lazily if needed.
+- `GraphRegistry.aget`: `get` for the event loop; a lazy compile runs in a worker thread.
+- `GraphRegistry.arelease_thread`: Drops the checkpoints a request left behind for its thread.
+- `GraphRegistry.aend_request`: Keeps a thread awaiting proposal review, releases any other.
+
+Checkpoints are durable (see `graph.checkpointer`); threads that are not released expire by TTL.
+
+Requests stay isolated because each one runs under its own `thread_id`; the compiled graph itself is
+stateless and safe to share between concurrent requests.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Callable, Dict
+from langgraph.graph.state import CompiledStateGraph # type: ignore
+from reflexion_agent.human_feedback import human_node
+from rag_agent.inference import expand_proposal_query, factual_generate_draft, proposal_generate_draft
+from reflexion_agent.critic import critic
+from agent_memory.langMem import google_search_agent
+from intent_router.intent_router import intent_router_agent, response_type_router_agent
+from agent_memory.background_mem import background_memory_saver
+from agent_memory.memory_storage import call_model, route_message, store_memory
+from structure_agent.structure_agent import structure_node
+from reflexion_agent.retriever import retrieve_examples
+from reflexion_agent.state import State
+from graph.node_edges import control_edge, create_state_graph
+from graph.checkpointer import checkpoint_store
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GRAPH = "proposal_agent"
+
+
+def build_proposal_agent_graph() -> CompiledStateGraph:
+    """Compiles the main workflow: intent routing into the direct, factual and proposal paths."""
+    return create_state_graph(
+        State,
+        intent_router_agent,
+        response_type_router_agent,
+        proposal_generate_draft,
+        factual_generate_draft,
+        structure_node,
+        retrieve_examples,
+        expand_proposal_query,
+        critic,
+        human_node,
+        control_edge,
+        google_search_agent,
+        route_message,
+        call_model,
+        store_memory,
+        background_memory_saver
+    )
+
+
+class GraphRegistry:
+    # The direct, factual and proposal paths are branches of the same workflow, selected by the
+    # intent and response-type routers, so a single compiled app serves all three of them.
+    _builders: Dict[str, Callable[[], CompiledStateGraph]] = {
+        DEFAULT_GRAPH: build_proposal_agent_graph,
+    }
+    _graphs: Dict[str, CompiledStateGraph] = {}
+    # The background warm-up and a first request may compile at the same time; each graph owns its
+    # checkpointer, so only one compiled instance may ever be handed out
+    _lock = threading.Lock()
+    # Requests that find the graph missing wait here instead of queueing worker threads on `_lock`
+    _alock = asyncio.Lock()
+
+    @classmethod
+    def register(cls, name: str, builder: Callable[[], CompiledStateGraph]) -> None:
+        cls._builders[name] = builder
+        cls._graphs.pop(name, None)
+
+    @classmethod
+    def compile_all(cls) -> None:
+        for name in cls._builders:
+            cls._compile(name)
+
+    @classmethod
+    def get(cls, name: str = DEFAULT_GRAPH) -> CompiledStateGraph:
+        if name not in cls._graphs:
+            cls._compile(name)
+        return cls._graphs[name]
+
+    @classmethod
+    async def aget(cls, name: str = DEFAULT_GRAPH) -> CompiledStateGraph:
+        """Never blocks the event loop: compiling (or waiting for the warm-up's compile) happens in a thread."""
+        graph = cls._graphs.get(name)
+        if graph is not None:
+            return graph
+        async with cls._alock:
+            if name not in cls._graphs:
+                await asyncio.to_thread(cls._compile, name)
+        return cls._graphs[name]
+
+    @classmethod
+    async def arelease_thread(cls, thread_id: str, name: str = DEFAULT_GRAPH) -> None:
+        """Deletes the checkpoints stored for `thread_id` so the shared checkpointer does not grow."""
+        graph = cls._graphs.get(name)
+        if graph is None or graph.checkpointer is None:
+            return
+        try:
+            await graph.checkpointer.adelete_thread(thread_id)
+        except Exception as e:
+            logger.warning("Failed to release graph thread %s: %s", thread_id, e)
+
+    @classmethod
+    async def aend_request(cls, thread_id: str, interrupted: bool, name: str = DEFAULT_GRAPH) -> None:
+        """
+        Called when a request stops driving `thread_id`. A thread paused for proposal review is kept
+        for `/api/resume`, trimmed to its last checkpoints; any other thread is released.
+        """
+        if interrupted:
+            try:
+                await checkpoint_store.compact_thread(thread_id)
+            except Exception as e:
+                logger.warning("Failed to compact graph thread %s: %s", thread_id, e)
+        else:
+            await cls.arelease_thread(thread_id, name)
+
+    @classmethod
+    def _compile(cls, name: str) -> None:
+        if name not in cls._builders:
+            raise KeyError(f"No graph registered under '{name}'")
+        with cls._lock:
+            if name in cls._graphs:
+                return
+            started = time.perf_counter()
+            cls._graphs[name] = cls._builders[name]()
+        logger.info("Compiled graph '%s' in %.1f ms", name, (time.perf_counter() - started) * 1000)
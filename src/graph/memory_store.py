@@ -0,0 +1,169 @@
+"""
+Durable long-term memory store for the LangGraph workflows, in the master database.
+
+The graphs were compiled with a process-global `InMemoryStore`: memories were lost on restart,
+invisible to the other uvicorn workers and searched in-process. `long_term_memory` keeps them in
+the master database through LangGraph's `AsyncPostgresStore` (tables `store` and `store_vectors`,
+created by `setup()`, which also enables the `vector` extension — the database role needs the
+privilege once). Memory contents are embedded into a pgvector column with an HNSW index, so
+`call_model`'s `store.asearch` is an approximate nearest-neighbour lookup whose cost stays flat as
+memories grow. Items are partitioned per user by namespace (`("memories", user_id)`,
+`("summaries", user_id)`), and a search only reads the caller's namespace.
+
+Writes are batched by the memory ingestion worker (`agent_memory.memory_queue`), which sends the
+memories of a batch with one `abatch` call.
+
+Query embeddings are cached: `CachedQueryEmbeddings` keeps an LRU of `MEMORY_QUERY_CACHE_SIZE`
+query vectors keyed by the SHA-256 of the query, so a repeated question does not wait for the
+embeddings API before the database lookup. Document embeddings are never cached.
+
+With `MEMORY_STORE=memory` (or before `open()`, e.g. in scripts that compile the graph on their own)
+the graph falls back to an `InMemoryStore` with the same index.
+"""
+
+import hashlib
+import logging
+import threading
+from typing import List, Optional
+from cachetools import LRUCache # type: ignore
+from langchain_core.embeddings import Embeddings # type: ignore
+from langgraph.store.base import BaseStore # type: ignore
+from langgraph.store.memory import InMemoryStore # type: ignore
+from langgraph.store.postgres.aio import AsyncPostgresStore # type: ignore
+from psycopg.rows import dict_row # type: ignore
+from psycopg_pool import AsyncConnectionPool # type: ignore
+from components import lazy
+from config.appconfig import settings as app_settings
+
+logger = logging.getLogger(__name__)
+
+
+def _build_embeddings():
+    from langchain.embeddings import init_embeddings # type: ignore
+
+    return init_embeddings(app_settings.memory_embedding_model)
+
+
+memory_embeddings = lazy("memory_embeddings", _build_embeddings)
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """Embeddings whose query vectors are cached in an LRU; the client is built on first use."""
+
+    def __init__(self, maxsize: int):
+        self._queries = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _cached(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._queries.get(key)
+            if vector is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return vector
+
+    def _remember(self, key: str, vector: List[float]) -> List[float]:
+        with self._lock:
+            self._queries[key] = vector
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return memory_embeddings.get().embed_documents(texts)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await memory_embeddings.get().aembed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vector = self._cached(key)
+        if vector is None:
+            vector = self._remember(key, memory_embeddings.get().embed_query(text))
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vector = self._cached(key)
+        if vector is None:
+            vector = self._remember(key, await memory_embeddings.get().aembed_query(text))
+        return vector
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._queries)}
+
+
+class LongTermMemory:
+    def __init__(self):
+        self._pool: Optional[AsyncConnectionPool] = None
+        self._store: Optional[AsyncPostgresStore] = None
+        self._memory: Optional[InMemoryStore] = None
+        self.query_embeddings = CachedQueryEmbeddings(app_settings.memory_query_cache_size)
+
+    @property
+    def durable(self) -> bool:
+        return self._store is not None
+
+    def _index(self) -> dict:
+        # Memories are searched by their content; the context is metadata
+        return {
+            "dims": app_settings.memory_embedding_dims,
+            "embed": self.query_embeddings,
+            "fields": ["content"],
+        }
+
+    async def open(self) -> None:
+        if app_settings.memory_store != "postgres" or self._store is not None:
+            return
+        self._pool = AsyncConnectionPool(
+            app_settings.master_db_url,
+            min_size=1,
+            max_size=app_settings.memory_pool_max_size,
+            # Settings AsyncPostgresStore requires of its connections
+            kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+            open=False,
+        )
+        await self._pool.open()
+        store = AsyncPostgresStore(
+            self._pool,
+            index={
+                **self._index(),
+                "distance_type": "cosine",
+                "ann_index_config": {
+                    "kind": "hnsw",
+                    "m": app_settings.memory_hnsw_m,
+                    "ef_construction": app_settings.memory_hnsw_ef_construction,
+                },
+            },
+        )
+        await store.setup()
+        self._store = store
+        logger.info("💾 Long-term memories are stored in the master database (pgvector, HNSW)")
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+        self._pool = None
+        self._store = None
+
+    def store(self) -> BaseStore:
+        """The store to compile the graph with."""
+        if self._store is not None:
+            return self._store
+        if app_settings.memory_store == "postgres":
+            logger.warning("Memory store not opened; compiling the graph with an in-memory store")
+        if self._memory is None:
+            self._memory = InMemoryStore(index=self._index())
+        return self._memory
+
+    def stats(self) -> dict:
+        return {"durable": self.durable, "query_embedding_cache": self.query_embeddings.stats()}
+
+
+long_term_memory = LongTermMemory()
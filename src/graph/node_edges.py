@@ -1,15 +1,13 @@
 import logging
-from langgraph.store.memory import InMemoryStore # type: ignore
-from langgraph.checkpoint.memory import InMemorySaver # type: ignore
-from langchain.embeddings import init_embeddings # type: ignore
 from langgraph.graph import END, StateGraph # type: ignore
 from reflexion_agent.state import State, Status
 from intent_router.intent_router import route_intent, route_response_type 
 from langchain_core.runnables import RunnableLambda # type: ignore
+from graph.checkpointer import checkpoint_store
+from graph.memory_store import long_term_memory
+from telemetry import trace_node
+from config.appconfig import settings as app_settings
 
-# Initialize semantic InMemoryStore
-embeddings = init_embeddings("openai:text-embedding-3-small")
-store = InMemoryStore(index={"embed": embeddings, "dims": 1536})
 
 def control_edge(state: State):
     """Control flow for the graph based on state"""
@@ -20,14 +18,36 @@ def control_edge(state: State):
             print("-> Ending graph execution")
             return "call_model"
         case Status.NEEDS_REVISION:
-            state["iteration"] += 1
-            return "draft"
+            # human_node has recorded the feedback and counted the iteration
+            return "proposal_draft"
         case Status.IN_PROGRESS:
             return "human_interrupt"
         case _:
             return "human_interrupt"
 
 
+def proposal_branches() -> list:
+    """
+    The nodes a full proposal fans out to. Query expansion only feeds the single-query draft;
+    section-parallel generation builds its own per-section queries, so it is left out there.
+    """
+    branches = ["structure_node", "retrieve"]
+    if app_settings.proposal_generation_mode != "sections":
+        branches.append("expand_query")
+    return branches
+
+
+def route_response_type_branches(state: State):
+    """
+    Factual queries go straight to the factual draft. Full proposals fan out: structure
+    classification, example retrieval and (in single-query mode) query expansion are independent
+    of each other, so they run in the same step and `proposal_draft` waits for all of them.
+    """
+    if state["response_type"] == "full_proposal":
+        return proposal_branches()
+    return "factual_draft"
+
+
 def create_state_graph(
     State,
     intent_router_agent,
@@ -36,6 +56,7 @@ def create_state_graph(
     factual_generate_draft,
     structure_node,
     retrieve_examples,
+    expand_query,
     critic,
     human_node,
     control_edge,
@@ -53,6 +74,7 @@ def create_state_graph(
         "response_router": response_type_router_agent,
         "structure_node": structure_node,
         "retrieve": retrieve_examples,
+        "expand_query": expand_query,
         "proposal_draft": proposal_generate_draft,
         "factual_draft": factual_generate_draft,
         "critic": critic,
@@ -62,8 +84,13 @@ def create_state_graph(
         "store_memory": store_memory,
         "background_saver": background_memory_saver
     }
+    branches = proposal_branches()
+    if "expand_query" not in branches:
+        del nodes["expand_query"]
+
+    # Every node is timed and its LLM calls attributed to it (see telemetry)
     for name, fn in nodes.items():
-        builder.add_node(name, fn)
+        builder.add_node(name, trace_node(name, fn))
 
     logging.info("Registered nodes: %s", builder.nodes.keys())
 
@@ -86,12 +113,9 @@ def create_state_graph(
 
     # ➤ RAG path: decide response type (factual vs proposal)
     builder.add_conditional_edges(
-        "response_router",  # returns 'simple_answer' or 'full_proposal'
-        lambda state: state["response_type"],
-        {
-            "simple_answer": "factual_draft",
-            "full_proposal": "structure_node"
-        }
+        "response_router",  # 'simple_answer' → factual draft, 'full_proposal' → parallel branches
+        route_response_type_branches,
+        ["factual_draft", *branches]
     )
     logging.info("Response-type routing configured")
 
@@ -102,9 +126,8 @@ def create_state_graph(
     # ➤ Ensure factual_draft doesn't go to human_interrupt
     logging.info("Factual draft configured to end directly")
 
-    # ➤ Proposal path: RAG pipeline with human feedback
-    builder.add_edge("structure_node", "retrieve")
-    builder.add_edge("retrieve", "proposal_draft")
+    # ➤ Proposal path: the parallel branches join before the LightRAG draft
+    builder.add_edge(branches, "proposal_draft")
     builder.add_edge("proposal_draft", "critic")
     builder.add_edge("critic", "human_interrupt")
 
@@ -131,5 +154,5 @@ def create_state_graph(
     builder.add_edge("background_saver", END)
 
     # 🔁 Compile
-    app = builder.compile(store=store, checkpointer=InMemorySaver())
+    app = builder.compile(store=long_term_memory.store(), checkpointer=checkpoint_store.checkpointer())
     return app
\ No newline at end of file
@@ -1,5 +1,5 @@
 from reflexion_agent.human_feedback import human_node
-from rag_agent.inference import factual_generate_draft, proposal_generate_draft
+from rag_agent.inference import expand_proposal_query, factual_generate_draft, proposal_generate_draft
 from reflexion_agent.critic import critic as wrapped_critic
 from agent_memory.langMem import google_search_agent
 from intent_router.intent_router import intent_router_agent, response_type_router_agent
@@ -19,6 +19,7 @@ graph = create_state_graph(
             factual_generate_draft,
             structure_node,
             retrieve_examples,
+            expand_proposal_query,
             wrapped_critic,
             human_node,
             control_edge,
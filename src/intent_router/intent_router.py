@@ -7,15 +7,22 @@ This module defines the intent router that determines the next action based on t
 from reflexion_agent.state import State
 from langgraph.types import interrupt # type: ignore
 import logging
-from langchain_openai import ChatOpenAI # type: ignore
 from langchain_core.messages import HumanMessage, SystemMessage # type: ignore
 from reflexion_agent.state import State # type: ignore
-from openai import AsyncOpenAI # type: ignore
-from config.appconfig import settings as app_settings
 import logging
 from langchain_core.prompts import ChatPromptTemplate # type: ignore
+from llm_cache import llm_cache
+from llm_gateway import llm_gateway
 
-llm = ChatOpenAI(model="gpt-4.1", openai_api_key=app_settings.openai_api_key, temperature=0)
+ROUTER_MODEL = "gpt-4.1"
+
+# Bump a version whenever its prompt changes; cached classifications of older versions are ignored
+INTENT_ROUTER_PROMPT_VERSION = "1"
+RESPONSE_TYPE_PROMPT_VERSION = "1"
+DETECT_INTENT_PROMPT_VERSION = "1"
+llm_cache.register("intent_router", INTENT_ROUTER_PROMPT_VERSION)
+llm_cache.register("response_type_router", RESPONSE_TYPE_PROMPT_VERSION)
+llm_cache.register("detect_intent", DETECT_INTENT_PROMPT_VERSION)
 
 
 async def intent_router_agent(state: State) -> State:
@@ -65,17 +72,19 @@ async def intent_router_agent(state: State) -> State:
     Respond only with one word: `direct` or `rag`
     """
 
-    try:
-        client = AsyncOpenAI(api_key=app_settings.openai_api_key)
-        response = await client.chat.completions.create(
-            model="gpt-4-1106-preview",
-            messages=[
+    async def classify() -> str:
+        response = await llm_gateway.achat(
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": query}
             ],
-            temperature=0.0
+            model="gpt-4-1106-preview"
         )
-        decision = response.choices[0].message.content.strip().lower()
+        return response.strip().lower()
+
+    # Failed calls raise and are not cached; they fall back to "direct" below
+    try:
+        decision = await llm_cache.aget_or_compute("intent_router", INTENT_ROUTER_PROMPT_VERSION, query, classify)
     except Exception as e:
         logging.error(f"Routing failed: {e}")
         decision = "direct"
@@ -137,12 +146,14 @@ async def response_type_router_agent(state: State) -> State:
     Respond with only one word: `simple_answer` or `full_proposal`
     """
 
-    # Replace this with your actual LLM call
-    response_type = await llm.ainvoke([
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=query)
-    ])
-    response_type = response_type.content.strip().lower()
+    async def classify() -> str:
+        response = await llm_gateway.ainvoke(ROUTER_MODEL, [
+            SystemMessage(content=system_prompt),
+            HumanMessage(content=query)
+        ])
+        return response.content.strip().lower()
+
+    response_type = await llm_cache.aget_or_compute("response_type_router", RESPONSE_TYPE_PROMPT_VERSION, query, classify)
 
     if response_type not in {"simple_answer", "full_proposal"}:
         response_type = "simple_answer"
@@ -232,7 +243,7 @@ async def interrupt_for_clarification(state: State, config) -> str:
         "Maintain a helpful, respectful, and professional tone in your response."
     )
 
-    response = await llm.ainvoke([
+    response = await llm_gateway.ainvoke(ROUTER_MODEL, [
         SystemMessage(content=system_prompt),
         HumanMessage(content=query)
     ])
@@ -242,7 +253,7 @@ async def interrupt_for_clarification(state: State, config) -> str:
 
 
 
-def detect_intent(user_query) -> str:
+async def detect_intent(user_query) -> str:
     """
     Analyze user_query to determine intent: either "full_proposal" or "simple_answer".
     Uses GPT‑4.1—no additional logic or clarification.
@@ -257,9 +268,11 @@ def detect_intent(user_query) -> str:
         "{user_query}\n\n"
         "Respond with exactly one word: full_proposal or simple_answer."
     )
-    llm = ChatOpenAI(model="gpt-4.1", temperature=0.0)
-    out = llm.invoke(prompt.format_prompt(user_query=user_query))
-    query_intent = out.content.strip()
+    async def classify() -> str:
+        out = await llm_gateway.ainvoke(ROUTER_MODEL, prompt.format_prompt(user_query=user_query))
+        return out.content.strip()
+
+    query_intent = await llm_cache.aget_or_compute("detect_intent", DETECT_INTENT_PROMPT_VERSION, user_query, classify)
     if query_intent not in ("full_proposal", "simple_answer"):
         query_intent = "simple_answer"
     logging.info("User intent: %s", query_intent)
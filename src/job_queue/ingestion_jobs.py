@@ -0,0 +1,197 @@
+"""
+Durable, Postgres-backed queue of document-ingestion jobs stored in the master database.
+
+An upload request is written as one `ingestion_jobs` row plus one `ingestion_job_items` row per file
+or web link, and acknowledged immediately with the job id. Worker processes (`job_queue.worker`)
+claim jobs with `SELECT ... FOR UPDATE SKIP LOCKED`, so any number of workers can poll the same table
+without handing the same job to two of them.
+
+- `enqueue_ingestion_job`: Stores an upload and its items; returns the new job id.
+- `claim_next_job`: Atomically claims the oldest queued job for a worker.
+- `fetch_pending_items`: Returns the items of a job that still need processing.
+- `complete_item`: Records an item's outcome and advances the job's progress counter.
+- `heartbeat`: Marks a running job as alive.
+- `finish_job`: Moves a job to its final status.
+- `requeue_stale_jobs`: Returns jobs whose worker stopped sending heartbeats to the queue.
+- `get_job_status`: Status and progress of a job, as shown to the client.
+"""
+
+import logging
+import uuid
+from typing import List, Optional, Tuple
+from sqlalchemy import select, update, insert, func, and_ # type: ignore
+from models.models import ingestion_jobs_table, ingestion_job_items_table
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+ITEM_DONE = "done"
+ITEM_FAILED = "failed"
+ITEM_UNCHANGED = "unchanged"
+
+
+def enqueue_ingestion_job(engine, email: str, items: List[Tuple[str, str, Optional[bytes]]]) -> str:
+    """
+    Stores a new job. `items` is a list of `(kind, name, content)` tuples where `kind` is
+    "file" (content holds the uploaded bytes) or "link" (name holds the URL, content is None).
+    """
+    job_id = uuid.uuid4().hex
+    with engine.begin() as conn:
+        conn.execute(insert(ingestion_jobs_table).values(
+            job_id=job_id,
+            email=email,
+            status=JOB_QUEUED,
+            total_items=len(items)
+        ))
+        conn.execute(insert(ingestion_job_items_table), [
+            {"job_id": job_id, "position": position, "kind": kind, "name": name, "content": content}
+            for position, (kind, name, content) in enumerate(items)
+        ])
+    logger.info("📨 Queued ingestion job %s with %d item(s) for %s", job_id, len(items), email)
+    return job_id
+
+
+def claim_next_job(engine, worker_id: str) -> Optional[dict]:
+    with engine.begin() as conn:
+        row = conn.execute(
+            select(ingestion_jobs_table.c.job_id, ingestion_jobs_table.c.email)
+            .where(ingestion_jobs_table.c.status == JOB_QUEUED)
+            .order_by(ingestion_jobs_table.c.created_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).fetchone()
+        if not row:
+            return None
+
+        conn.execute(
+            update(ingestion_jobs_table)
+            .where(ingestion_jobs_table.c.job_id == row.job_id)
+            .values(
+                status=JOB_RUNNING,
+                locked_by=worker_id,
+                attempts=ingestion_jobs_table.c.attempts + 1,
+                started_at=func.now(),
+                heartbeat_at=func.now()
+            )
+        )
+    return {"job_id": row.job_id, "email": row.email}
+
+
+def fetch_pending_items(engine, job_id: str) -> List[dict]:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(
+                ingestion_job_items_table.c.item_id,
+                ingestion_job_items_table.c.kind,
+                ingestion_job_items_table.c.name,
+                ingestion_job_items_table.c.content
+            )
+            .where(and_(
+                ingestion_job_items_table.c.job_id == job_id,
+                ingestion_job_items_table.c.status.notin_([ITEM_DONE, ITEM_FAILED, ITEM_UNCHANGED])
+            ))
+            .order_by(ingestion_job_items_table.c.position)
+        ).fetchall()
+    return [dict(row._mapping) for row in rows]
+
+
+def complete_item(engine, job_id: str, item_id: int, status: str, result: dict) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            update(ingestion_job_items_table)
+            .where(ingestion_job_items_table.c.item_id == item_id)
+            .values(status=status, result=result, content=None)
+        )
+        conn.execute(
+            update(ingestion_jobs_table)
+            .where(ingestion_jobs_table.c.job_id == job_id)
+            .values(processed_items=ingestion_jobs_table.c.processed_items + 1, heartbeat_at=func.now())
+        )
+
+
+def heartbeat(engine, job_id: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            update(ingestion_jobs_table)
+            .where(ingestion_jobs_table.c.job_id == job_id)
+            .values(heartbeat_at=func.now())
+        )
+
+
+def finish_job(engine, job_id: str, status: str, error: Optional[str] = None) -> None:
+    with engine.begin() as conn:
+        conn.execute(
+            update(ingestion_jobs_table)
+            .where(ingestion_jobs_table.c.job_id == job_id)
+            .values(status=status, error=error, locked_by=None, finished_at=func.now())
+        )
+    logger.info("🏁 Ingestion job %s finished with status %s", job_id, status)
+
+
+def requeue_stale_jobs(engine, timeout_seconds: int, max_attempts: int) -> int:
+    """Jobs whose worker died mid-way are queued again, or failed once they ran out of attempts."""
+    stale = and_(
+        ingestion_jobs_table.c.status == JOB_RUNNING,
+        ingestion_jobs_table.c.heartbeat_at < func.now() - func.make_interval(0, 0, 0, 0, 0, 0, timeout_seconds)
+    )
+    with engine.begin() as conn:
+        requeued = conn.execute(
+            update(ingestion_jobs_table)
+            .where(and_(stale, ingestion_jobs_table.c.attempts < max_attempts))
+            .values(status=JOB_QUEUED, locked_by=None)
+        ).rowcount
+        failed = conn.execute(
+            update(ingestion_jobs_table)
+            .where(and_(stale, ingestion_jobs_table.c.attempts >= max_attempts))
+            .values(status=JOB_FAILED, locked_by=None, error="Worker stopped responding", finished_at=func.now())
+        ).rowcount
+    if requeued or failed:
+        logger.warning("♻️ Requeued %d and failed %d stale ingestion job(s)", requeued, failed)
+    return requeued
+
+
+def get_job_status(engine, job_id: str, email: str) -> Optional[dict]:
+    with engine.connect() as conn:
+        job = conn.execute(
+            select(ingestion_jobs_table).where(and_(
+                ingestion_jobs_table.c.job_id == job_id,
+                ingestion_jobs_table.c.email == email
+            ))
+        ).fetchone()
+        if not job:
+            return None
+
+        items = conn.execute(
+            select(
+                ingestion_job_items_table.c.kind,
+                ingestion_job_items_table.c.name,
+                ingestion_job_items_table.c.status,
+                ingestion_job_items_table.c.result
+            )
+            .where(ingestion_job_items_table.c.job_id == job_id)
+            .order_by(ingestion_job_items_table.c.position)
+        ).fetchall()
+
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "progress": {
+            "processed": job.processed_items,
+            "total": job.total_items,
+            "percent": round(100 * job.processed_items / job.total_items) if job.total_items else 100
+        },
+        "attempts": job.attempts,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "unchanged": sum(item.status == ITEM_UNCHANGED for item in items),
+        "items": [
+            {"kind": item.kind, "name": item.name, "status": item.status, "result": item.result}
+            for item in items
+        ]
+    }
@@ -0,0 +1,152 @@
+"""
+Ingestion worker entry point.
+
+Polls the `ingestion_jobs` queue in the master database and claims one job at a time. The files and
+web links of a job are prepared concurrently (parsing, metadata extraction and database writes, at
+most `INGESTION_CONCURRENCY` at once) and then inserted into LightRAG in one batch. Run one or more worker processes next to the web app, from
+`src/`:
+
+    python -m job_queue.worker --processes 2
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+from config.appconfig import settings as app_settings
+from database.master_db import master_engine
+from job_queue.ingestion_jobs import (
+    ITEM_DONE, ITEM_FAILED, ITEM_UNCHANGED, JOB_COMPLETED, JOB_FAILED,
+    claim_next_job, complete_item, fetch_pending_items, finish_job, heartbeat, requeue_stale_jobs
+)
+from models.users_utilities import lookup_user_db_credentials
+from rag_agent.ingestion_pipeline import ingest_prepared_documents, prepare_uploaded_file, prepare_web_link
+
+logger = logging.getLogger(__name__)
+
+
+async def keep_alive(job_id: str) -> None:
+    """Refreshes the job heartbeat while a long LightRAG insert is running."""
+    interval = max(app_settings.ingestion_job_timeout / 3, 1)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(heartbeat, master_engine, job_id)
+        except Exception as e:
+            logger.warning("Heartbeat for ingestion job %s failed: %s", job_id, e)
+
+
+async def prepare_item(item: dict, semaphore: asyncio.Semaphore, db_user: str, db_name: str, db_password: str, working_dir: str) -> dict:
+    async with semaphore:
+        try:
+            if item["kind"] == "file":
+                return await prepare_uploaded_file(item["name"], item["content"], db_user, db_name, db_password, working_dir)
+            return await prepare_web_link(item["name"], db_user, db_name, db_password, working_dir)
+        except Exception as e:
+            logger.error("Ingestion of %s failed: %s", item["name"], e, exc_info=True)
+            return {"error": str(e)}
+
+
+async def process_job(job: dict) -> None:
+    job_id = job["job_id"]
+    email = job["email"]
+    logger.info("🛠️ Processing ingestion job %s for %s", job_id, email)
+
+    try:
+        db_user, db_name, db_password, working_dir = await asyncio.to_thread(lookup_user_db_credentials, email)
+        items = await asyncio.to_thread(fetch_pending_items, master_engine, job_id)
+    except Exception as e:
+        logger.error("Ingestion job %s could not start: %s", job_id, e, exc_info=True)
+        await asyncio.to_thread(finish_job, master_engine, job_id, JOB_FAILED, error=str(e))
+        return
+
+    heartbeat_task = asyncio.create_task(keep_alive(job_id))
+    try:
+        # Parse and extract metadata for all items concurrently, bounded by the semaphore
+        semaphore = asyncio.Semaphore(app_settings.ingestion_concurrency)
+        prepared = await asyncio.gather(*(
+            prepare_item(item, semaphore, db_user, db_name, db_password, working_dir) for item in items
+        ))
+
+        # One batched LightRAG insert for every changed document of the upload
+        ready = [document for document in prepared if "error" not in document and not document.get("unchanged")]
+        batch_result = {"success": True}
+        if ready:
+            try:
+                batch_result = await ingest_prepared_documents(ready, db_user, db_name, db_password, working_dir)
+            except Exception as e:
+                logger.error("LightRAG insert for ingestion job %s failed: %s", job_id, e, exc_info=True)
+                batch_result = {"error": str(e)}
+    finally:
+        heartbeat_task.cancel()
+
+    failures = 0
+    for item, document in zip(items, prepared):
+        if document.get("unchanged"):
+            await asyncio.to_thread(complete_item, master_engine, job_id, item["item_id"], ITEM_UNCHANGED, {"status": "unchanged"})
+            continue
+        result = document if "error" in document else batch_result
+        status = ITEM_FAILED if "error" in result else ITEM_DONE
+        failures += status == ITEM_FAILED
+        await asyncio.to_thread(complete_item, master_engine, job_id, item["item_id"], status, result)
+
+    if items and failures == len(items):
+        await asyncio.to_thread(finish_job, master_engine, job_id, JOB_FAILED, error="No files or web links could be processed.")
+    else:
+        await asyncio.to_thread(finish_job, master_engine, job_id, JOB_COMPLETED)
+
+
+async def run_worker(worker_id: str) -> None:
+    logger.info("👷 Ingestion worker %s started", worker_id)
+    while True:
+        try:
+            await asyncio.to_thread(
+                requeue_stale_jobs, master_engine, app_settings.ingestion_job_timeout, app_settings.ingestion_max_attempts
+            )
+            job = await asyncio.to_thread(claim_next_job, master_engine, worker_id)
+        except Exception as e:
+            logger.error("Failed to poll the ingestion queue: %s", e)
+            job = None
+
+        if job is None:
+            await asyncio.sleep(app_settings.ingestion_poll_interval)
+            continue
+
+        try:
+            await process_job(job)
+        except Exception as e:
+            # e.g. the master database went away while recording the results: keep the worker alive
+            logger.error("Ingestion job %s failed: %s", job["job_id"], e, exc_info=True)
+            try:
+                await asyncio.to_thread(finish_job, master_engine, job["job_id"], JOB_FAILED, error=str(e))
+            except Exception as finish_error:
+                # Left running: requeue_stale_jobs hands it out again once its heartbeat is stale
+                logger.error("Could not mark ingestion job %s as failed: %s", job["job_id"], finish_error)
+
+
+def _worker_main(index: int) -> None:
+    logging.basicConfig(level=logging.INFO)
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-{index}"
+    asyncio.run(run_worker(worker_id))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Document ingestion worker")
+    parser.add_argument("--processes", type=int, default=1, help="number of worker processes to start")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        _worker_main(0)
+        return
+
+    processes = [multiprocessing.Process(target=_worker_main, args=(index,)) for index in range(args.processes)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Response cache for deterministic (temperature 0) LLM calls such as the intent and response-type
+classifiers.
+
+Entries are keyed on the SHA-256 of `namespace`, the caller's prompt version and the normalized
+input text. Lookups go through an in-process LRU first and then the `llm_response_cache` table in the
+master database, which is shared by every web and worker process. Only successful LLM results are
+stored; callers keep their own fallbacks for failed calls.
+
+Changing a prompt: bump the version passed by the caller. New requests stop matching the old entries
+immediately, and `purge_stale_versions()` (run at startup) deletes the rows of versions no longer
+registered. `invalidate(namespace)` drops a namespace outright.
+
+- `llm_cache.get_or_compute` / `llm_cache.aget_or_compute`: Returns a cached response or computes and stores it.
+- `llm_cache.invalidate`: Drops the entries of a namespace, or of one prompt version of it.
+- `llm_cache.stats`: Memory hits, database hits and misses per namespace.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Optional
+from cachetools import LRUCache # type: ignore
+from sqlalchemy import and_, delete, select # type: ignore
+from sqlalchemy.dialects.postgresql import insert # type: ignore
+from config.appconfig import settings as app_settings
+from database.master_db import master_engine
+from models.models import llm_response_cache_table
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def normalize_text(text: str) -> str:
+    """Case and whitespace differences do not change a classification."""
+    return re.sub(r"\s+", " ", (text or "").strip().lower())
+
+
+class LLMResponseCache:
+    def __init__(self, engine, maxsize: int):
+        self._engine = engine
+        self._memory = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._versions: Dict[str, str] = {}
+        self._stats = defaultdict(lambda: {"memory_hits": 0, "db_hits": 0, "misses": 0})
+
+    def register(self, namespace: str, prompt_version: str) -> None:
+        """Declares the current prompt version of a namespace (used by `purge_stale_versions`)."""
+        self._versions[namespace] = prompt_version
+
+    @staticmethod
+    def make_key(namespace: str, prompt_version: str, text: str) -> str:
+        return hashlib.sha256(f"{namespace}\x00{prompt_version}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    # ---------------- Lookups ----------------
+
+    def get(self, namespace: str, prompt_version: str, text: str) -> Any:
+        """Returns the cached response, or `None` when there is none."""
+        value = self._lookup(namespace, self.make_key(namespace, prompt_version, text))
+        return None if value is _MISSING else value
+
+    def _lookup(self, namespace: str, key: str) -> Any:
+        with self._lock:
+            value = self._memory.get(key, _MISSING)
+            if value is not _MISSING:
+                self._stats[namespace]["memory_hits"] += 1
+                return value
+
+        try:
+            with self._engine.connect() as conn:
+                row = conn.execute(
+                    select(llm_response_cache_table.c.response)
+                    .where(llm_response_cache_table.c.cache_key == key)
+                ).fetchone()
+        except Exception as e:
+            logger.warning("LLM cache lookup failed for %s: %s", namespace, e)
+            row = None
+
+        with self._lock:
+            if row is None:
+                self._stats[namespace]["misses"] += 1
+                return _MISSING
+            self._stats[namespace]["db_hits"] += 1
+            self._memory[key] = row.response
+        return row.response
+
+    def set(self, namespace: str, prompt_version: str, text: str, response: Any) -> None:
+        self._store(namespace, prompt_version, self.make_key(namespace, prompt_version, text), response)
+
+    def _store(self, namespace: str, prompt_version: str, key: str, response: Any) -> None:
+        with self._lock:
+            self._memory[key] = response
+        try:
+            with self._engine.begin() as conn:
+                conn.execute(
+                    insert(llm_response_cache_table)
+                    .values(cache_key=key, namespace=namespace, prompt_version=prompt_version, response=response)
+                    .on_conflict_do_update(index_elements=["cache_key"], set_={"response": response})
+                )
+        except Exception as e:
+            logger.warning("LLM cache write failed for %s: %s", namespace, e)
+
+    def get_or_compute(self, namespace: str, prompt_version: str, text: str, compute: Callable[[], Any]) -> Any:
+        key = self.make_key(namespace, prompt_version, text)
+        value = self._lookup(namespace, key)
+        if value is _MISSING:
+            value = compute()
+            self._store(namespace, prompt_version, key, value)
+        return value
+
+    async def aget_or_compute(self, namespace: str, prompt_version: str, text: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        key = self.make_key(namespace, prompt_version, text)
+        value = await asyncio.to_thread(self._lookup, namespace, key)
+        if value is _MISSING:
+            value = await compute()
+            await asyncio.to_thread(self._store, namespace, prompt_version, key, value)
+        return value
+
+    # ---------------- Invalidation ----------------
+
+    def invalidate(self, namespace: str, prompt_version: Optional[str] = None) -> int:
+        condition = llm_response_cache_table.c.namespace == namespace
+        if prompt_version is not None:
+            condition = and_(condition, llm_response_cache_table.c.prompt_version == prompt_version)
+        with self._engine.begin() as conn:
+            deleted = conn.execute(delete(llm_response_cache_table).where(condition)).rowcount
+        # Keys are hashes, so the namespace cannot be picked out of the LRU; start it over
+        with self._lock:
+            self._memory.clear()
+        logger.info("🧹 Invalidated %d cached LLM response(s) for %s", deleted, namespace)
+        return deleted
+
+    def purge_stale_versions(self) -> int:
+        """Deletes the rows written by prompt versions that are no longer registered."""
+        deleted = 0
+        with self._engine.begin() as conn:
+            for namespace, version in self._versions.items():
+                deleted += conn.execute(
+                    delete(llm_response_cache_table).where(and_(
+                        llm_response_cache_table.c.namespace == namespace,
+                        llm_response_cache_table.c.prompt_version != version
+                    ))
+                ).rowcount
+        if deleted:
+            logger.info("🧹 Purged %d LLM cache row(s) from old prompt versions", deleted)
+        return deleted
+
+    # ---------------- Metrics ----------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            namespaces = {}
+            for namespace, counts in self._stats.items():
+                lookups = counts["memory_hits"] + counts["db_hits"] + counts["misses"]
+                hits = counts["memory_hits"] + counts["db_hits"]
+                namespaces[namespace] = {**counts, "hit_rate": round(hits / lookups, 4) if lookups else 0.0}
+            return {"memory_entries": len(self._memory), "namespaces": namespaces}
+
+
+llm_cache = LLMResponseCache(master_engine, maxsize=app_settings.llm_cache_size)
@@ -0,0 +1,258 @@
+"""
+Single entry point for every OpenAI call made by the graph nodes, the ingestion pipeline, the memory
+agents and LightRAG.
+
+The gateway owns one long-lived `httpx.AsyncClient` (keep-alive, pooled connections) per event loop.
+Both the raw `AsyncOpenAI` client and the LangChain chat models handed out by `ainvoke` are built on
+it, so calls reuse warm TLS connections instead of opening a new one per request. Every entry point
+is async and waits on a per-model semaphore, which caps the requests in flight to each model in this
+process (`LLM_DEFAULT_CONCURRENCY`, overridden per model with `LLM_MODEL_CONCURRENCY`, e.g.
+`gpt-4o=4,gpt-4.1=8`). `OPENAI_API_BASE` is honoured everywhere. Every call and its token usage is
+reported to `telemetry.record_llm_call`.
+
+- `llm_gateway.achat`: Chat completion; returns the message text.
+- `llm_gateway.acomplete`: Text completion (the instruct models); returns the text.
+- `llm_gateway.ainvoke`: Runs a LangChain chat model, optionally with tools or a structured-output schema.
+- `llm_gateway.astream_chat`: Streamed chat completion; yields the content deltas.
+- `llm_gateway.aembed`: Embeddings as a numpy array.
+- `lightrag_complete` / `lightrag_embed`: `llm_model_func` and embedding function (through `embedding_cache`) for LightRAG.
+- `llm_gateway.stats`: Requests in flight and waiting per model.
+- `llm_gateway.aclose`: Closes the HTTP client of the running loop (application shutdown).
+"""
+
+import asyncio
+import logging
+import weakref
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+import httpx # type: ignore
+import numpy as np # type: ignore
+from langchain_core.callbacks import get_usage_metadata_callback # type: ignore
+from langchain_openai import ChatOpenAI # type: ignore
+from openai import AsyncOpenAI # type: ignore
+from config.appconfig import settings as app_settings
+from embedding_cache import embedding_cache
+from telemetry import attribute_to, record_llm_call
+
+logger = logging.getLogger(__name__)
+
+# Default model of LangChain's `OpenAI` wrapper, which the text-completion callers used before
+DEFAULT_COMPLETION_MODEL = "gpt-3.5-turbo-instruct"
+LIGHTRAG_MODEL = "gpt-4o"
+EMBEDDING_MODEL = "text-embedding-3-large"
+# LightRAG calls its functions from its own worker tasks, outside any graph node (see telemetry)
+LIGHTRAG_NODE_LABEL = "lightrag"
+
+# Arguments LightRAG may pass to its llm_model_func that the OpenAI API understands
+_LIGHTRAG_API_KWARGS = ("max_tokens", "temperature", "top_p", "stop", "seed", "response_format", "stream")
+
+
+def parse_model_concurrency(spec: str) -> Dict[str, int]:
+    """`"gpt-4o=4,gpt-4.1=8"` -> `{"gpt-4o": 4, "gpt-4.1": 8}`."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        model, _, limit = item.partition("=")
+        limits[model.strip()] = int(limit)
+    return limits
+
+
+class _LoopClients:
+    """HTTP client, OpenAI client, chat models and semaphores bound to one event loop."""
+
+    def __init__(self, gateway: "LLMGateway"):
+        self.http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=gateway.max_connections,
+                max_keepalive_connections=gateway.max_keepalive_connections,
+                keepalive_expiry=gateway.keepalive_expiry
+            ),
+            timeout=httpx.Timeout(gateway.timeout)
+        )
+        self.openai = AsyncOpenAI(api_key=gateway.api_key, base_url=gateway.base_url, http_client=self.http)
+        self.chat_models: Dict[tuple, ChatOpenAI] = {}
+        self.semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+class LLMGateway:
+    def __init__(self, api_key: Optional[str], base_url: Optional[str], max_connections: int, max_keepalive_connections: int,
+                 keepalive_expiry: float, timeout: float, default_concurrency: int, model_concurrency: Dict[str, int]):
+        self.api_key = api_key
+        self.base_url = base_url or None
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.default_concurrency = default_concurrency
+        self.model_concurrency = model_concurrency
+        # Clients cannot be shared across event loops (web app, ingestion workers, scripts using asyncio.run)
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopClients]" = weakref.WeakKeyDictionary()
+        self._stats = defaultdict(lambda: {"in_flight": 0, "waiting": 0, "requests": 0, "errors": 0})
+
+    def _clients(self) -> _LoopClients:
+        loop = asyncio.get_running_loop()
+        clients = self._loops.get(loop)
+        if clients is None:
+            clients = self._loops[loop] = _LoopClients(self)
+        return clients
+
+    @asynccontextmanager
+    async def limit(self, model: str) -> AsyncIterator[None]:
+        """Holds one of the model's concurrency slots for the duration of the block."""
+        clients = self._clients()
+        semaphore = clients.semaphores.get(model)
+        if semaphore is None:
+            semaphore = clients.semaphores[model] = asyncio.Semaphore(self.model_concurrency.get(model, self.default_concurrency))
+
+        counts = self._stats[model]
+        counts["waiting"] += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            counts["waiting"] -= 1
+        counts["in_flight"] += 1
+        counts["requests"] += 1
+        try:
+            yield
+        except Exception:
+            counts["errors"] += 1
+            raise
+        finally:
+            counts["in_flight"] -= 1
+            semaphore.release()
+
+    def _chat_model(self, model: str, temperature: float, **kwargs) -> ChatOpenAI:
+        clients = self._clients()
+        key = (model, temperature, tuple(sorted(kwargs.items())))
+        llm = clients.chat_models.get(key)
+        if llm is None:
+            llm = clients.chat_models[key] = ChatOpenAI(
+                model=model,
+                temperature=temperature,
+                openai_api_key=self.api_key,
+                openai_api_base=self.base_url,
+                http_async_client=clients.http,
+                **kwargs
+            )
+        return llm
+
+    # ---------------- Entry points ----------------
+
+    async def achat(self, messages: List[dict], model: str, temperature: float = 0.0, **kwargs) -> str:
+        async with self.limit(model):
+            response = await self._clients().openai.chat.completions.create(
+                model=model, messages=messages, temperature=temperature, **kwargs
+            )
+        _record_usage(model, response.usage)
+        return response.choices[0].message.content or ""
+
+    async def acomplete(self, prompt: str, model: str = DEFAULT_COMPLETION_MODEL, temperature: float = 0.0, max_tokens: int = 256, **kwargs) -> str:
+        # max_tokens defaults to LangChain's OpenAI wrapper default, so outputs keep their previous length
+        async with self.limit(model):
+            response = await self._clients().openai.completions.create(
+                model=model, prompt=prompt, temperature=temperature, max_tokens=max_tokens, **kwargs
+            )
+        _record_usage(model, response.usage)
+        return response.choices[0].text
+
+    async def ainvoke(self, model: str, messages: Any, *, temperature: float = 0.0, tools: Optional[list] = None,
+                      schema: Any = None, config: Optional[dict] = None, **kwargs) -> Any:
+        """
+        Runs `messages` through a LangChain chat model and returns what it returns: an `AIMessage`, or
+        an instance of `schema` when a structured-output schema is given.
+        """
+        runnable = self._chat_model(model, temperature, **kwargs)
+        if tools:
+            runnable = runnable.bind_tools(tools)
+        elif schema is not None:
+            runnable = runnable.with_structured_output(schema=schema)
+        async with self.limit(model):
+            with get_usage_metadata_callback() as usage:
+                result = await runnable.ainvoke(messages, config)
+        if not usage.usage_metadata:
+            record_llm_call(model)
+        for model_name, counts in usage.usage_metadata.items():
+            record_llm_call(model_name, counts.get("input_tokens", 0), counts.get("output_tokens", 0))
+        return result
+
+    async def aembed(self, texts: List[str], model: str = EMBEDDING_MODEL) -> np.ndarray:
+        async with self.limit(model):
+            response = await self._clients().openai.embeddings.create(model=model, input=texts, encoding_format="float")
+        _record_usage(model, response.usage)
+        return np.array([item.embedding for item in response.data])
+
+    async def astream_chat(self, messages: List[dict], model: str, **kwargs) -> AsyncIterator[str]:
+        """Yields the content deltas of a streamed chat completion; the model slot is held until the stream ends."""
+        async with self.limit(model):
+            stream = await self._clients().openai.chat.completions.create(
+                model=model, messages=messages, stream=True, stream_options={"include_usage": True}, **kwargs
+            )
+            usage = None
+            async for chunk in stream:
+                # The usage arrives on a final chunk without choices
+                usage = chunk.usage or usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        _record_usage(model, usage)
+
+    # ---------------- Lifecycle and metrics ----------------
+
+    async def aclose(self) -> None:
+        clients = self._loops.pop(asyncio.get_running_loop(), None)
+        if clients is not None:
+            await clients.http.aclose()
+            logger.info("🔌 Closed the LLM gateway HTTP client")
+
+    def stats(self) -> dict:
+        return {
+            "default_concurrency": self.default_concurrency,
+            "model_concurrency": self.model_concurrency,
+            "models": {model: dict(counts) for model, counts in self._stats.items()}
+        }
+
+
+def _record_usage(model: str, usage: Any) -> None:
+    record_llm_call(
+        model,
+        getattr(usage, "prompt_tokens", 0) or 0,
+        getattr(usage, "completion_tokens", 0) or 0
+    )
+
+
+llm_gateway = LLMGateway(
+    api_key=app_settings.openai_api_key,
+    base_url=app_settings.openai_api_base,
+    max_connections=app_settings.llm_max_connections,
+    max_keepalive_connections=app_settings.llm_max_keepalive_connections,
+    keepalive_expiry=app_settings.llm_keepalive_expiry,
+    timeout=app_settings.llm_request_timeout,
+    default_concurrency=app_settings.llm_default_concurrency,
+    model_concurrency=parse_model_concurrency(app_settings.llm_model_concurrency)
+)
+
+
+async def lightrag_complete(prompt: str, system_prompt: Optional[str] = None, history_messages: Optional[list] = None,
+                            keyword_extraction: bool = False, **kwargs) -> Any:
+    """Drop-in replacement for LightRAG's `gpt_4o_complete` that goes through the shared client."""
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.extend(history_messages or [])
+    messages.append({"role": "user", "content": prompt})
+
+    # LightRAG also passes its own bookkeeping (hashing_kv, ...); only API arguments are forwarded
+    api_kwargs = {key: kwargs[key] for key in _LIGHTRAG_API_KWARGS if key in kwargs}
+    if keyword_extraction:
+        api_kwargs["response_format"] = {"type": "json_object"}
+    if api_kwargs.pop("stream", False):
+        # Iterated (and so recorded) by the graph node that asked for the stream
+        return llm_gateway.astream_chat(messages, LIGHTRAG_MODEL, **api_kwargs)
+    with attribute_to(LIGHTRAG_NODE_LABEL):
+        # gpt_4o_complete leaves the temperature at the API default
+        return await llm_gateway.achat(messages, LIGHTRAG_MODEL, temperature=api_kwargs.pop("temperature", 1.0), **api_kwargs)
+
+
+async def lightrag_embed(texts: List[str]) -> np.ndarray:
+    """LightRAG's embedding function; only the texts missing from `embedding_cache` reach the API."""
+    with attribute_to(LIGHTRAG_NODE_LABEL):
+        return await embedding_cache.aembed(texts, EMBEDDING_MODEL, lambda misses: llm_gateway.aembed(misses, EMBEDDING_MODEL))
@@ -4,53 +4,67 @@ FastAPI application for processing documents and retrieving information using RA
 - `lifespan`: Context manager for initializing and cleaning up resources during the application's lifecycle.
 - `index`: Health check endpoint returning application status.
 - `health`: Endpoint to check the application's health.
-- `ingress_file_doc`: Endpoint for saving and processing uploaded files.
+- `tenant_pool_stats`: Endpoint exposing the tenant connection pool gauges.
+- `llm_cache_stats`: Endpoint exposing the LLM response cache hit/miss counters.
+- `embedding_cache_stats`: Endpoint exposing the embedding cache hit/miss counters.
+- `llm_gateway_stats`: Endpoint exposing the LLM gateway's in-flight and waiting requests per model.
+- `components_stats`: Endpoint reporting which lazily built components have been built.
+- `memory_queue_stats`: Endpoint exposing the memory ingestion queue counters.
+- `memory_store_stats`: Endpoint reporting the long-term memory store and its query embedding cache.
+- `metrics`: Prometheus endpoint with per-node latency, LLM call, token and cost metrics.
+- `upload_files_and_links`: Endpoint queueing uploaded files and web links for the ingestion workers.
+- `ingestion_job_status`: Endpoint reporting the status and progress of an ingestion job.
 - `retrieve_query`: Endpoint for retrieving information from stored files based on the provided query and section.
+- `retrieve_query_stream`: Server-sent-events variant of `retrieve_query` streaming node progress and answer tokens.
 
 Also configures middleware for CORS, security, and handles different modes (development, production).
 """
 
 
+import asyncio
+import hashlib
+import time
 from datetime import datetime
 import json
 from typing import List
-import requests # type: ignore
 import logging
 import traceback
 from urllib.parse import urlencode
-from sqlalchemy import create_engine# type: ignore
 import uuid
-from document_processor import DocumentProcessor
-from googleapiclient.discovery import build # type: ignore
 from google.oauth2.credentials import Credentials # type: ignore
 import httpx # type: ignore
 from google_doc_integration.google_docs_helper import GoogleDocsHelper
 from google_doc_integration.google_drive_helper import GoogleDriveAPI
-from rag_agent.rag_instance import RAGManager
-from reflexion_agent.human_feedback import human_node
-from graph.node_edges import control_edge, create_state_graph
+from reflexion_agent.human_feedback import feedback_status
+from graph.graph_registry import GraphRegistry
+from graph.checkpointer import checkpoint_store
+from graph.memory_store import long_term_memory
 from reflexion_agent.critic import critic
-from reflexion_agent.retriever import retrieve_examples
-from reflexion_agent.state import State, Status
+from reflexion_agent import exemplar_index
+from reflexion_agent.state import Status
 from datamodel import PromptRequest, QueryRequest, RequestModel
-from rag_agent.inference import factual_generate_draft, proposal_generate_draft
-from rag_agent.ingress import ingress_file_doc
-from database.db_helper import extract_prompt_suggestions, extract_proposal_metadata_llm, get_recent_activity, insert_document, open_tenant_db_connection, save_metadata_to_db, extract_metadata_with_llm, store_proposal_to_db
-from models.models import metadata
+from database.async_db import aget_fingerprint, aget_prompt_suggestions, aget_recent_activity, aget_recent_rfqs, aget_winning_proposals, astore_proposal, async_tenant_pools
+from database.db_helper import extract_proposal_metadata_llm, open_tenant_db_connection
+from models.models import metadata, users_table
+from database.master_db import master_engine
+from database.tenant_pool import tenant_pools
+from llm_cache import llm_cache
+from embedding_cache import embedding_cache
+from llm_gateway import llm_gateway
+from telemetry import render_metrics
+from components import component_stats, warm_up
+from job_queue.ingestion_jobs import enqueue_ingestion_job, get_job_status
 from langchain_core.runnables import RunnableConfig # type: ignore
-from langchain_openai import OpenAI # type: ignore
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Query, Request, status, HTTPException, UploadFile, File, Form, Depends # type: ignore
 from models.users_utilities import get_user_session, lookup_user_db_credentials
 # from agent_memory.background_mem import background_memory_saver
-from agent_memory.memory_storage import call_model, route_message, sanitize_user_id, store_memory #call_model, store_memory
-from agent_memory.langMem import google_search_agent
-from intent_router.intent_router import intent_router_agent, interrupt_for_clarification, response_type_router_agent, route_for_rag_clarification
-from agent_memory.background_mem import background_memory_saver
+from agent_memory.memory_storage import sanitize_user_id
+from agent_memory.rolling_summary import rolling_summaries
+from agent_memory.memory_queue import memory_ingestion
 from structure_agent.query_agent import query_understanding_agent
 from utils import sql_expert_prompt
-from structure_agent.structure_agent import structure_node
-from langgraph.types import Interrupt # type: ignore
+from langgraph.types import Command, Interrupt # type: ignore
 import os, uvicorn # type: ignore
 from starlette.middleware.httpsredirect import HTTPSRedirectMiddleware # type: ignore
 from fastapi.security import HTTPBasic # type: ignore
@@ -59,15 +73,12 @@ from starlette.middleware.sessions import SessionMiddleware # type: ignore
 from itsdangerous import URLSafeTimedSerializer # type: ignore
 from starlette.config import Config # type: ignore
 from authlib.integrations.starlette_client import OAuth, OAuthError # type: ignore
-from fastapi.responses import JSONResponse, RedirectResponse # type: ignore
-from langchain_experimental.sql import SQLDatabaseChain #type: ignore
-from langchain_community.utilities import SQLDatabase # type: ignore
+from fastapi.responses import JSONResponse, RedirectResponse, Response, StreamingResponse # type: ignore
 from config.settings import get_setting
 from multi_tenant.onboard_user import onboard_user
 from config.appconfig import settings as app_settings
 from functools import partial
 import logging
-from langchain_openai import ChatOpenAI # type: ignore
 from fastapi.exceptions import RequestValidationError # type: ignore
 from fastapi.exception_handlers import request_validation_exception_handler # type: ignore
 
@@ -81,17 +92,13 @@ description = f"""
 {settings.API_STR} helps you do awesome stuff. 🚀
 """
 
-master_engine = create_engine(
-    app_settings.master_db_url,
-    pool_pre_ping=True,       # Checks connection health before use
-    pool_recycle=3600,        # Recycles connections every hour
-    connect_args={
-        "keepalives": 1,
-        "keepalives_idle": 30,
-        "keepalives_interval": 10,
-        "keepalives_count": 5,
-    }
-)
+async def warm_up_components():
+    await asyncio.sleep(app_settings.warm_up_delay)
+    started = time.perf_counter()
+    await asyncio.to_thread(warm_up)
+    # Compile the LangGraph workflows once; requests reuse the compiled apps
+    await asyncio.to_thread(GraphRegistry.compile_all)
+    logger.info("🔥 Warm-up finished in %.1f s", time.perf_counter() - started)
 
 
 # Define a context manager for the application lifespan
@@ -104,15 +111,36 @@ async def lifespan(app: FastAPI):
     # STARTUP Call Check routine
     print(running_mode)
     logger.info("Master database url: %s", app_settings.master_db_url)
-    master_engine = create_engine(app_settings.master_db_url)
     metadata.create_all(master_engine)
+    # create_all skips indexes of tables that already exist (e.g. users.email)
+    for index in users_table.indexes:
+        index.create(master_engine, checkfirst=True)
+    llm_cache.purge_stale_versions()
+
+    # Heavy components and the LangGraph workflows are built in the background once the app is
+    # serving, so startup (and the health check) does not wait for them; requests build on demand
+    await checkpoint_store.open()
+    await long_term_memory.open()
+    prune_task = asyncio.create_task(checkpoint_store.run_pruner())
+    memory_ingestion.start()
+    warmup_task = asyncio.create_task(warm_up_components()) if app_settings.warm_up_components else None
 
-    # Configure OpenAI API
-    OpenAI.api_key = app_settings.openai_api_key
-    
     print(" ⚡️🚀 RAG Server::Started")
     yield
 
+    if warmup_task is not None:
+        warmup_task.cancel()
+    prune_task.cancel()
+    # Let the rolling conversation summaries and memory writes of the last requests finish
+    await rolling_summaries.drain(app_settings.background_drain_timeout)
+    await memory_ingestion.drain(app_settings.background_drain_timeout)
+    await checkpoint_store.close()
+    await long_term_memory.close()
+    # Close the idle tenant database connections
+    tenant_pools.close_all()
+    await async_tenant_pools.close_all()
+    await llm_gateway.aclose()
+
 # Create FastAPI app instance
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -164,8 +192,6 @@ app.add_middleware(
     https_only=True,        # ✅ False for local dev
 )
 
-extract_metadata = DocumentProcessor()
-
 oauth = OAuth(Config(environ={
     'GOOGLE_CLIENT_ID': app_settings.client_id,
     'GOOGLE_CLIENT_SECRET': app_settings.client_secret,
@@ -182,12 +208,6 @@ oauth.register(
 )
 
 
-# Assuming you already initialized your llm like:
-llm = ChatOpenAI(
-    model="gpt-4o",
-    temperature=0
-)
-
 # Wrap the critic function to always pass in the LLM
 wrapped_critic = partial(critic)
 
@@ -340,105 +360,116 @@ def health():
     return "healthy"
 
 
-@app.post("/api/ingress-file")
+@app.get("/api/health/db-pools", status_code=status.HTTP_200_OK)
+def tenant_pool_stats():
+    """Checked-out, idle and waiting tenant database connections across all tenant pools."""
+    return tenant_pools.stats()
+
+
+@app.get("/api/health/llm-cache", status_code=status.HTTP_200_OK)
+def llm_cache_stats():
+    """Hit and miss counts of the classifier LLM response cache, per namespace."""
+    return llm_cache.stats()
+
+
+@app.get("/api/health/embedding-cache", status_code=status.HTTP_200_OK)
+def embedding_cache_stats():
+    """Hit and miss counts of the LightRAG embedding cache, per model."""
+    return embedding_cache.stats()
+
+
+@app.get("/api/health/llm-gateway", status_code=status.HTTP_200_OK)
+def llm_gateway_stats():
+    """Requests in flight, waiting and failed per model on the shared LLM client."""
+    return llm_gateway.stats()
+
+
+@app.get("/api/health/components", status_code=status.HTTP_200_OK)
+def components_stats():
+    """Which lazily built components exist yet, and how long each took to build."""
+    return component_stats()
+
+
+@app.get("/api/health/memory-queue", status_code=status.HTTP_200_OK)
+def memory_queue_stats():
+    """Memory writes queued, processed and failed, and the extraction calls they took."""
+    return memory_ingestion.stats()
+
+
+@app.get("/api/health/memory-store", status_code=status.HTTP_200_OK)
+def memory_store_stats():
+    """Whether long-term memories are durable, and the query embedding cache hits and misses."""
+    return long_term_memory.stats()
+
+
+@app.get("/api/metrics", status_code=status.HTTP_200_OK)
+def metrics():
+    """Per-node latency, LLM calls, tokens and estimated cost, labelled by node, tenant and path."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
+@app.post("/api/ingress-file", status_code=status.HTTP_202_ACCEPTED)
 async def upload_files_and_links(
     files: List[UploadFile] = File([]),
     web_links: List[str] = Form([]),
     session_data: dict = Depends(get_user_session)
 ):
+    """
+    Queues the uploaded files and web links for ingestion and returns the job id immediately.
+    The ingestion workers (`python -m job_queue.worker`) do the extraction and LightRAG insert;
+    progress is available from `/api/ingress-jobs/{job_id}`.
+    """
     try:
         email = session_data.get("email")
         if not email:
             raise HTTPException(status_code=401, detail="User not authenticated")
 
-        db_user, db_name, db_password, working_dir = lookup_user_db_credentials(email)
-        logger.info("User, Database Name, Database Password: %s: %s: %s", db_user, db_name, db_password)
-
-        results = []
-
+        db_user, db_name, db_password, _ = lookup_user_db_credentials(email)
 
-        # Handle multiple file uploads
+        # Files identical to what was last ingested under the same name are not queued again
+        items = []
+        unchanged = []
         for file in files:
-            file_path = os.path.join(working_dir, file.filename)
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            with open(file_path, "wb") as f:
-                f.write(await file.read())
-
-            text = extract_metadata.extract_text_from_pdf(file_path)
-            metadata = extract_metadata_with_llm(text)
-            prompt_suggestions = extract_prompt_suggestions(text)
-            logging.info("Suggested Prompts: %s", prompt_suggestions)
-
-            document_name = file.filename
-            metadata.update({"id": document_name, "file_name": file.filename})
-
-            insert_document(document_name, file.filename, text, db_user, db_name, db_password)
-            save_metadata_to_db(metadata, prompt_suggestions, db_user, db_name, db_password)
-
-            logging.info(f"✅ Inserted and saved metadata for document {document_name}")
-            logging.info("📥 Calling ingress_file_doc...")
-
-            result = await ingress_file_doc(
-                file_name=file.filename,
-                file_path=file_path,
-                overwrite=True,
-                session_data=session_data
-            )
-            results.append(result)
-
-        # Handle multiple web links
-        for link in web_links:
-            link = link.strip()
-            if not link:
-                continue
-
-            response = requests.get(link)
-            if response.status_code != 200:
-                logging.warning(f"❌ Failed to fetch {link}")
-                continue
-
-            filename = f"web_{uuid.uuid4().hex[:8]}.pdf"
-            file_path = os.path.join(working_dir, filename)
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            with open(file_path, "wb") as f:
-                f.write(response.content)
-
-            text = extract_metadata.extract_text_from_pdf(file_path)
-            metadata = extract_metadata_with_llm(text)
-            prompt_suggestions = extract_prompt_suggestions(text)
-            logging.info("Suggested Prompts: %s", prompt_suggestions)
-
-            document_name = str(uuid.uuid4())
-            metadata.update({
-                "id": document_name,
-                "file_name": filename,
-                "source": link
-            })
-
-            insert_document(document_name, filename, text, db_user, db_name, db_password)
-            save_metadata_to_db(metadata, prompt_suggestions, db_user, db_name, db_password)
-
-            logging.info(f"✅ Saved metadata for web link {link}")
-            logging.info("📥 Calling ingress_file_doc...")
-
-            result = await ingress_file_doc(
-                file_name=link,
-                web_links=[link],
-                overwrite=True,
-                session_data=session_data
-            )
-            results.append(result)
-
-        if not results:
+            content = await file.read()
+            fingerprint = await aget_fingerprint(file.filename, db_user, db_name, db_password)
+            if fingerprint == hashlib.sha256(content).hexdigest():
+                unchanged.append(file.filename)
+            else:
+                items.append(("file", file.filename, content))
+        items += [("link", link.strip(), None) for link in web_links if link.strip()]
+
+        if not items and unchanged:
+            return {"message": "All files are unchanged; nothing to ingest.", "job_id": None, "unchanged": unchanged}
+        if not items:
             raise HTTPException(status_code=400, detail="No valid files or web links processed.")
 
-        return {"message": "Upload completed.", "details": results}
+        job_id = await asyncio.to_thread(enqueue_ingestion_job, master_engine, email, items)
+
+        return {
+            "message": "Upload queued.",
+            "job_id": job_id,
+            "status_url": f"/api/ingress-jobs/{job_id}",
+            "unchanged": unchanged
+        }
 
     except Exception as e:
         logging.error("Unhandled error in /ingress-file route", exc_info=True)
         return {"message": f"An error occurred: {str(e)}"}
 
 
+@app.get("/api/ingress-jobs/{job_id}")
+def ingestion_job_status(job_id: str, session_data: dict = Depends(get_user_session)):
+    email = session_data.get("email")
+    if not email:
+        raise HTTPException(status_code=401, detail="User not authenticated")
+
+    job = get_job_status(master_engine, job_id, email)
+    if not job:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return job
+
+
 # @app.post("/api/retrieve")
 # async def retrieve_query(requestModel: RequestModel, session_data: dict = Depends(get_user_session)):
 #     user_id = sanitize_user_id(requestModel.user_id)
@@ -609,12 +640,9 @@ async def upload_files_and_links(
 #             status_code=500
 #         )
 
-@app.post("/api/retrieve")
-async def retrieve_query(requestModel: RequestModel, session_data: dict = Depends(get_user_session)):
-    user_id = sanitize_user_id(requestModel.user_id)
-    # print("Received data:", requestModel.model_dump())
-
-    initial_state = {
+def build_initial_state(requestModel: RequestModel, user_id: str) -> dict:
+    # The session (with the tenant credentials) goes in the run config, not in the checkpointed state
+    return {
         "user_query": requestModel.user_query,
         "candidate": None,
         "examples": [],
@@ -626,38 +654,33 @@ async def retrieve_query(requestModel: RequestModel, session_data: dict = Depend
         "user_id": user_id,
         "iteration": 0,
         "interrupt_type": None,
-        "session_data": session_data,
     }
 
+
+@app.post("/api/retrieve")
+async def retrieve_query(requestModel: RequestModel, session_data: dict = Depends(get_user_session)):
+    user_id = sanitize_user_id(requestModel.user_id)
+    # print("Received data:", requestModel.model_dump())
+
+    initial_state = build_initial_state(requestModel, user_id)
+
     logging.info("🟢 Initial state passed to graph: %s", initial_state)
     print("query_understanding_agent:", query_understanding_agent, type(query_understanding_agent))
     assert callable(query_understanding_agent), "query_understanding_agent must be a function"
 
+    # Every request runs on its own thread of the shared checkpointer; a proposal review keeps it
+    # (until /api/resume or the checkpoint TTL), anything else releases it when the request ends
+    thread_id = f"{session_data['email']}_{uuid.uuid4().hex}"
+    interrupt_reached = False
+
     try:
-        # Create graph
-        graph = create_state_graph(
-            State,
-            intent_router_agent,
-            response_type_router_agent,
-            proposal_generate_draft,
-            factual_generate_draft,
-            structure_node,
-            retrieve_examples,
-            critic,
-            human_node,
-            control_edge,
-            google_search_agent,
-            route_message,
-            call_model,
-            store_memory,
-            background_memory_saver
-        )
+        graph = await GraphRegistry.aget()
 
         last_response = None
         config = RunnableConfig(
             recursion_limit=10,
             configurable={
-                "thread_id": f"{session_data['email']}_thread1",
+                "thread_id": thread_id,
                 "session_data": session_data,
                 "user_id": str(user_id)
             }
@@ -665,8 +688,6 @@ async def retrieve_query(requestModel: RequestModel, session_data: dict = Depend
 
         logging.info("🛠️ Runnable config: %s", config)
 
-        interrupt_reached = False
-
         async for step in graph.astream(initial_state, config=config):
             logging.info("🧠 Full step returned: %s", step)
             node_id = list(step.keys())[0]
@@ -718,7 +739,8 @@ async def retrieve_query(requestModel: RequestModel, session_data: dict = Depend
                     # Safely convert Enum to string
                     serializable_state = {
                         **initial_state,
-                        "status": initial_state["status"].value
+                        "status": initial_state["status"].value,
+                        "thread_id": thread_id
                     }
 
                     response_payload = {
@@ -729,6 +751,7 @@ async def retrieve_query(requestModel: RequestModel, session_data: dict = Depend
                             "approve - if the proposal is satisfactory",
                             "revise - if changes are needed (please specify what to improve)"
                         ],
+                        "thread_id": thread_id,
                         "state": serializable_state
                     }
 
@@ -754,24 +777,159 @@ async def retrieve_query(requestModel: RequestModel, session_data: dict = Depend
     except Exception as compile_error:
         logging.error("Graph compile failed: %s", compile_error, exc_info=True)
         return JSONResponse({"error": "Graph initialization failed"}, status_code=500)
+    finally:
+        await GraphRegistry.aend_request(thread_id, interrupted=interrupt_reached)
+
+
+# Nodes whose completion is reported to the client by /api/retrieve/stream
+STREAMED_NODES = {"intent_router", "response_router", "structure_node", "retrieve", "proposal_draft", "factual_draft", "critic", "google_search"}
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.post("/api/retrieve/stream")
+async def retrieve_query_stream(requestModel: RequestModel, session_data: dict = Depends(get_user_session)):
+    """
+    Server-sent-events variant of `/api/retrieve`.
+
+    Emits a `node` event as each graph node finishes, `token` events with the LightRAG answer as it
+    is generated by the draft nodes (`section` events, one per finished section, when proposals are
+    drafted section by section), and finally either an `interrupt` event (proposal review, same
+    payload as `/api/retrieve`) or a `done` event with the answer.
+    """
+    user_id = sanitize_user_id(requestModel.user_id)
+    initial_state = build_initial_state(requestModel, user_id)
+    thread_id = f"{session_data['email']}_{uuid.uuid4().hex}"
+
+    config = RunnableConfig(
+        recursion_limit=10,
+        configurable={
+            "thread_id": thread_id,
+            "session_data": session_data,
+            "user_id": str(user_id),
+            "stream_tokens": True
+        }
+    )
+
+    async def event_stream():
+        last_response = None
+        interrupted = False
+        try:
+            graph = await GraphRegistry.aget()
+            async for mode, chunk in graph.astream(initial_state, config=config, stream_mode=["updates", "custom"]):
+                if mode == "custom":
+                    yield sse_event(chunk.get("event", "token"), chunk)
+                    continue
+
+                node_id = list(chunk.keys())[0]
+                value = chunk[node_id]
+
+                if node_id == "__interrupt__":
+                    if not last_response:
+                        yield sse_event("error", {"error": "No proposal content generated"})
+                        return
+
+                    initial_state["candidate"] = last_response
+                    interrupted = True
+                    yield sse_event("interrupt", {
+                        "interrupt": True,
+                        "message": "Please review the draft and provide your feedback.",
+                        "proposal": last_response,
+                        "feedback_options": [
+                            "approve - if the proposal is satisfactory",
+                            "revise - if changes are needed (please specify what to improve)"
+                        ],
+                        "thread_id": thread_id,
+                        "state": {**initial_state, "status": initial_state["status"].value}
+                    })
+                    return
+
+                if node_id in STREAMED_NODES:
+                    yield sse_event("node", {"node": node_id})
+
+                match node_id:
+                    case "proposal_draft" | "factual_draft":
+                        ai_message = value.get("candidate", {})
+                        last_response = ai_message.content if hasattr(ai_message, "content") else str(ai_message)
+                    case "retrieve":
+                        initial_state["examples"] = value.get("examples", [])
+                    case "critic":
+                        initial_state["critic_feedback"] = value.get("critique", "")
+                    case "google_search":
+                        messages = value.get("messages") or []
+                        ai_message = messages[-1] if messages else value
+                        last_response = ai_message.content if hasattr(ai_message, "content") else str(ai_message)
+
+            if last_response:
+                yield sse_event("done", {"response": last_response})
+            else:
+                yield sse_event("error", {"error": "Graph completed without reaching interrupt"})
+
+        except Exception as e:
+            logging.error("Error in retrieve_query_stream: %s", e, exc_info=True)
+            yield sse_event("error", {"error": "Graph execution failed"})
+        finally:
+            await GraphRegistry.aend_request(thread_id, interrupted=interrupted)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def review_state(values: dict, thread_id: str) -> dict:
+    """The JSON-safe part of a checkpointed state, returned with a proposal review."""
+    status = values.get("status", Status.IN_PROGRESS)
+    return {
+        "thread_id": thread_id,
+        "user_query": values.get("user_query"),
+        "rfq_id": values.get("rfq_id"),
+        "mode": values.get("mode"),
+        "user_id": values.get("user_id"),
+        "iteration": values.get("iteration", 0),
+        "critic_feedback": values.get("critic_feedback", ""),
+        "status": getattr(status, "value", status),
+    }
 
 
 @app.post("/api/resume")
-async def resume_graph(payload: dict):
-    try:
-        state_data = payload["state"]
-        feedback = payload.get("feedback", "").lower()
-        print("incoming payload", payload)
+async def resume_graph(payload: dict, session_data: dict = Depends(get_user_session)):
+    """
+    Continues a proposal review from its `human_interrupt` checkpoint.
 
-        raw_status = state_data.get("status", "in_progress").lower()
-        current_status = Status(raw_status) if raw_status in Status._value2member_map_ else Status.IN_PROGRESS
+    Takes the `thread_id` returned with the review (or the review `state` carrying it) and the
+    reviewer's `feedback`. Approval ends the review; otherwise the thread is resumed with
+    `Command(resume=feedback)`, so only the revision loop (draft, critic, review) runs again — the
+    routers, structure classification, example retrieval and query expansion are not repeated.
+    """
+    thread_id = payload.get("thread_id") or (payload.get("state") or {}).get("thread_id")
+    feedback = payload.get("feedback", "")
+    print("incoming payload", payload)
+    if not thread_id:
+        return JSONResponse(content={"error": "thread_id is required"}, status_code=400)
+    # Threads are named after their owner: nobody resumes another user's review
+    if not thread_id.startswith(f"{session_data.get('email')}_"):
+        raise HTTPException(status_code=403, detail="Not allowed to resume this review")
+
+    interrupted = False
+    try:
+        graph = await GraphRegistry.aget()
+        config = RunnableConfig(
+            recursion_limit=10,
+            configurable={"thread_id": thread_id, "session_data": session_data}
+        )
 
-        state = State(state_data)
-        state["human_feedback"].append(feedback)
+        snapshot = await graph.aget_state(config)
+        if "human_interrupt" not in (snapshot.next or ()):
+            # Unknown or finished thread (e.g. an approved review); one still running is left alone
+            interrupted = bool(snapshot.next)
+            return JSONResponse(content={"error": "No proposal awaiting review on this thread"}, status_code=404)
+        config["configurable"]["user_id"] = str(snapshot.values.get("user_id", ""))
 
-        # Update status based on feedback
-        if "approve" in feedback:
-            state["status"] = Status.APPROVED
+        if feedback_status(feedback) == Status.APPROVED:
             return JSONResponse(
                 content={
                     "response": "Proposal approved. Process complete.",
@@ -779,70 +937,27 @@ async def resume_graph(payload: dict):
                 },
                 status_code=200
             )
-        elif "revise" in feedback:
-            state["status"] = Status.NEEDS_REVISION
-        else:
-            state["status"] = Status.IN_PROGRESS
-
-        # Re-create the graph
-        graph = create_state_graph(
-            State,
-            intent_router_agent,
-            response_type_router_agent,
-            proposal_generate_draft,
-            factual_generate_draft,
-            structure_node,
-            retrieve_examples,
-            critic,
-            human_node,
-            control_edge,
-            google_search_agent,
-            route_message,
-            call_model,
-            store_memory,
-            background_memory_saver
-        )
-
-        # Apply feedback to config
-        base_config = RunnableConfig(recursion_limit=10, configurable={"thread_id": "1"})
-        updated_config = graph.update_state(
-            base_config,
-            values={"messages": [("user", feedback)]}
-        )
 
         proposal_content = None
-        async for step in graph.astream(state, config=updated_config):
+        async for step in graph.astream(Command(resume=feedback), config=config):
             node_id = list(step.keys())[0]
             value = step[node_id]
 
             print(f"Processing node: {node_id}")
 
-            # if node_id == "draft":
-            #     ai_message = value.get("candidate", {})
-            #     proposal_content = ai_message.content if hasattr(proposal_content, "content") else str(proposal_content)
-
             if node_id == "proposal_draft":
                 ai_message = value.get("candidate")
-                if ai_message and hasattr(ai_message, "content"):
-                    proposal_content = ai_message.content
-                elif isinstance(ai_message, str):
-                    proposal_content = ai_message
-
-            if node_id == "factual_draft":
-                ai_message = value.get("candidate")
-                if ai_message and hasattr(ai_message, "content"):
-                    proposal_content = ai_message.content
-                elif isinstance(ai_message, str):
-                    proposal_content = ai_message
+                proposal_content = ai_message.content if hasattr(ai_message, "content") else ai_message
+            elif node_id == "__interrupt__":
+                interrupted = True
 
-                
+        state = (await graph.aget_state(config)).values
 
-        if proposal_content:
-            # Return proposal and updated state
-            serializable_state = {
-                **state,
-                "status": state["status"].value
-            }
+        if interrupted:
+            if proposal_content is None:
+                # Feedback was neither an approval nor a revision: the same draft is up for review again
+                candidate = state.get("candidate")
+                proposal_content = candidate.content if hasattr(candidate, "content") else candidate
 
             return JSONResponse(
                 content={
@@ -853,18 +968,19 @@ async def resume_graph(payload: dict):
                         "approve - if the proposal is satisfactory",
                         "revise - if changes are needed (please specify what to improve)"
                     ],
-                    "state": serializable_state
+                    "thread_id": thread_id,
+                    "state": review_state(state, thread_id)
                 },
                 status_code=200
             )
-        else:
-            return JSONResponse(
-                content={
-                    "response": "No proposal generated during resume.",
-                    "status": state["status"].value
-                },
-                status_code=500
-            )
+
+        return JSONResponse(
+            content={
+                "response": proposal_content or "No proposal generated during resume.",
+                "status": review_state(state, thread_id)["status"]
+            },
+            status_code=200 if proposal_content else 500
+        )
 
     except Exception as e:
         logging.error(f"Resume error: {str(e)}")
@@ -872,10 +988,12 @@ async def resume_graph(payload: dict):
             content={"error": f"Failed to resume graph: {str(e)}"},
             status_code=500
         )
+    finally:
+        await GraphRegistry.aend_request(thread_id, interrupted=interrupted)
 
 
 @app.get("/api/recent-rfqs")
-def get_recent_rfqs(session_data: dict = Depends(get_user_session)):
+async def get_recent_rfqs(session_data: dict = Depends(get_user_session)):
     logger.info("📥 Incoming request to /recent-rfqs")
 
     email = session_data.get("email")
@@ -887,51 +1005,21 @@ def get_recent_rfqs(session_data: dict = Depends(get_user_session)):
 
     try:
         db_user, db_name,  db_password, _ = lookup_user_db_credentials(email)
-        logger.info(f" Password: {db_password}")
         logger.info(f"✅ DB credentials resolved for email: {email} -> DB: {db_name}")
     except Exception as e:
         logger.exception("❌ Failed to lookup DB credentials")
         raise HTTPException(status_code=500, detail="Error retrieving database credentials")
 
     try:
-        conn = open_tenant_db_connection(db_user, db_name, db_password)
-        logger.info("🔗 DB connection established")
-    except Exception as e:
-        logger.exception("❌ Failed to connect to the tenant DB")
-        raise HTTPException(status_code=500, detail="Database connection error")
-
-    try:
-        cursor = conn.cursor()
         logger.info("📄 Executing SQL query for recent RFQs")
-
-        cursor.execute("""
-            SELECT m.file_name, m.organization_name, m.title, m.submission_deadline
-            FROM rfqs m
-            JOIN documents d ON m.file_name = d.document_name
-            ORDER BY d.upload_time DESC
-        """)
-
-        rows = cursor.fetchall()
-        logger.info(f"📦 Retrieved {len(rows)} rows from the database")
-
-        result = [
-            {
-                "document_name": row[0],
-                "organization": row[1],
-                "title": row[2],
-                "deadline": row[3].isoformat() if row[3] else None
-            }
-            for row in rows
-        ]
+        result = await aget_recent_rfqs(db_user, db_name, db_password)
+        logger.info(f"📦 Retrieved {len(result)} rows from the database")
         logger.info("📄 RFQ Result: %s", result)
         return {"rfqs": result}
 
     except Exception as e:
         logger.exception("❌ Error while querying or processing RFQs")
         raise HTTPException(status_code=500, detail="Internal error retrieving RFQs")
-    finally:
-        conn.close()
-        logger.info("🔒 DB connection closed")
 
 
 @app.post("/api/search-rfqs")
@@ -942,6 +1030,11 @@ def search_rfqs(query_data: QueryRequest, session_data: dict = Depends(get_user_
 
     # Lookup DB credentials once
     db_user, db_name, db_password, _ = lookup_user_db_credentials(email)
+    # Only this endpoint needs the SQL chain; importing it at startup is slow
+    from langchain_community.utilities import SQLDatabase # type: ignore
+    from langchain_experimental.sql import SQLDatabaseChain # type: ignore
+    from langchain_openai import OpenAI # type: ignore
+
     conn = open_tenant_db_connection(db_user, db_name, db_password)
     try:
         db = SQLDatabase(conn)
@@ -999,6 +1092,8 @@ async def save_to_google_drive(payload: dict, session_data: dict = Depends(get_u
             "token_uri": app_settings.google_token_endpoint,
         }
 
+        from googleapiclient.discovery import build # type: ignore
+
         creds = Credentials.from_authorized_user_info(token_info)
         docs_service = build("docs", "v1", credentials=creds)
         drive_service = build("drive", "v3", credentials=creds)
@@ -1050,7 +1145,8 @@ async def save_to_google_drive(payload: dict, session_data: dict = Depends(get_u
         is_winning = payload.get("is_winning", False)
         
 
-        store_proposal_to_db(db_user, db_name, db_password, rfq_id, title, proposal_text, summary, is_winning)
+        proposal_id = await astore_proposal(db_user, db_name, db_password, rfq_id, title, proposal_text, summary, is_winning)
+        await exemplar_index.aadd_proposal(db_name, proposal_id, title, proposal_text, is_winning)
 
 
         return JSONResponse(content={"message": "Upload successful", "view_link": view_link})
@@ -1108,31 +1204,15 @@ async def get_prompt_suggestions(
         raise HTTPException(status_code=401, detail="User not authenticated")
 
     db_user, db_name, db_password, _ = lookup_user_db_credentials(email)
-    conn = open_tenant_db_connection(db_user, db_name, db_password)
-    cursor = conn.cursor()
-
     if rfq_id:
         logging.info("Selected RFQ: %s", rfq_id)
-        cursor.execute(
-            "SELECT prompt_suggestions FROM rfqs WHERE document_name = %s",
-            (rfq_id,)
-        )
-    else:
-        cursor.execute("""
-            SELECT prompt_suggestions
-            FROM rfqs
-            ORDER BY created_at DESC
-            LIMIT 1
-        """)
-
-    result = cursor.fetchone()
-    conn.close()
-
-    if not result or not result[0]:
+    result = await aget_prompt_suggestions(rfq_id, db_user, db_name, db_password)
+
+    if not result:
         return {"prompts": []}
 
     try:
-        prompts = json.loads(result[0])
+        prompts = json.loads(result)
         if isinstance(prompts, str):
             prompts = json.loads(prompts)
         return {"prompts": prompts}
@@ -1143,45 +1223,24 @@ async def get_prompt_suggestions(
 
 
 @app.get("/api/recent-activity")
-def recent_activity(session_data: dict= Depends(get_user_session)):
+async def recent_activity(session_data: dict= Depends(get_user_session)):
     email = session_data.get("email")
     if not email:
         raise HTTPException(status_code=401, detail="User not authenticated")
     db_user, db_name, db_password, _ = lookup_user_db_credentials(email)
-    activity = get_recent_activity(db_user, db_name, db_password)
+    activity = await aget_recent_activity(db_user, db_name, db_password)
 
     logging.info("Proposals returned: %s", activity.get("proposals", []))
     return activity
 
 @app.get("/api/winning-proposals")
-def winning_proposals(session_data: dict = Depends(get_user_session)):
+async def winning_proposals(session_data: dict = Depends(get_user_session)):
     email = session_data.get("email")
     if not email:
         raise HTTPException(status_code=401, detail="User not authenticated")
     db_user, db_name, db_password, _ = lookup_user_db_credentials(email)
 
-    conn = open_tenant_db_connection(db_user, db_name, db_password)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT proposal_id, proposal_title, proposal_content, created_at
-        FROM proposals
-        WHERE is_winning = TRUE
-        ORDER BY created_at DESC
-    """)
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-
-    proposals = [
-        {
-            "proposal_id": str(row[0]),
-            "proposal_title": row[1],
-            "proposal_content": row[2],
-            "created_at": row[3].isoformat() if row[3] else None,
-        }
-        for row in rows
-    ]
-
+    proposals = await aget_winning_proposals(db_user, db_name, db_password)
     return {"proposals": proposals}
 
         
@@ -1,4 +1,4 @@
-from sqlalchemy import MetaData, Table, Column, String # type: ignore
+from sqlalchemy import MetaData, Table, Column, String, Integer, Text, DateTime, LargeBinary, ForeignKey, JSON, func # type: ignore
 
 metadata = MetaData()
 
@@ -6,9 +6,63 @@ users_table = Table(
     "users",
     metadata,
     Column("user", String, primary_key=True),
-    Column("email", String, nullable=False),
+    Column("email", String, nullable=False, index=True),
     Column("database_name", String, nullable=False),
     Column("db_conn_str", String, nullable=False),
     Column("working_dir", String),
     Column("password", String, nullable=False)
 )
+
+# Durable queue of document-ingestion jobs, one row per upload request
+ingestion_jobs_table = Table(
+    "ingestion_jobs",
+    metadata,
+    Column("job_id", String, primary_key=True),
+    Column("email", String, nullable=False, index=True),
+    Column("status", String, nullable=False, server_default="queued", index=True),
+    Column("total_items", Integer, nullable=False, server_default="0"),
+    Column("processed_items", Integer, nullable=False, server_default="0"),
+    Column("attempts", Integer, nullable=False, server_default="0"),
+    Column("locked_by", String),
+    Column("error", Text),
+    Column("created_at", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column("started_at", DateTime(timezone=True)),
+    Column("heartbeat_at", DateTime(timezone=True)),
+    Column("finished_at", DateTime(timezone=True))
+)
+
+# Files and web links belonging to an ingestion job; file bytes are kept until the job finishes
+ingestion_job_items_table = Table(
+    "ingestion_job_items",
+    metadata,
+    Column("item_id", Integer, primary_key=True, autoincrement=True),
+    Column("job_id", String, ForeignKey("ingestion_jobs.job_id", ondelete="CASCADE"), nullable=False, index=True),
+    Column("position", Integer, nullable=False),
+    Column("kind", String, nullable=False),
+    Column("name", String, nullable=False),
+    Column("content", LargeBinary),
+    Column("status", String, nullable=False, server_default="queued"),
+    Column("result", JSON)
+)
+
+# Responses of deterministic classifier LLM calls, keyed by namespace + prompt version + input hash
+llm_response_cache_table = Table(
+    "llm_response_cache",
+    metadata,
+    Column("cache_key", String, primary_key=True),
+    Column("namespace", String, nullable=False, index=True),
+    Column("prompt_version", String, nullable=False),
+    Column("response", JSON, nullable=False),
+    Column("created_at", DateTime(timezone=True), nullable=False, server_default=func.now())
+)
+
+# Embedding vectors (float32 bytes) keyed by the hash of the model and the normalized text
+embedding_cache_table = Table(
+    "embedding_cache",
+    metadata,
+    Column("cache_key", String, primary_key=True),
+    Column("model", String, nullable=False, index=True),
+    Column("dims", Integer, nullable=False),
+    Column("vector", LargeBinary, nullable=False),
+    Column("created_at", DateTime(timezone=True), nullable=False, server_default=func.now())
+)
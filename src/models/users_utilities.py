@@ -2,10 +2,8 @@ import hashlib
 import logging
 from fastapi import Request, HTTPException, Depends # type: ignore
 from itsdangerous import URLSafeTimedSerializer, BadSignature # type: ignore
-from sqlalchemy import select # type: ignore
-from sqlalchemy.engine import create_engine # type: ignore
-from models.models import users_table
 from config.appconfig import settings as app_settings
+from database.tenant_directory import tenant_directory
 
 
 
@@ -48,31 +46,27 @@ def get_user_session(request: Request):
     return session_data
 
 
+def run_session(config) -> dict:
+    """
+    The session of the user a graph run belongs to. It travels in `config["configurable"]`, never in
+    the graph state, so the tenant credentials it holds are not written to the checkpoints.
+    """
+    return ((config or {}).get("configurable") or {}).get("session_data") or {}
+
+
 def get_tenant_db_connection_info(email: str = Depends(get_user_email_from_session)):
     info = lookup_user_db_credentials(email)
     return info
 
 
 def lookup_user_db_credentials(email: str):
-    engine = create_engine(app_settings.master_db_url)
-    with engine.connect() as conn:
-        result = conn.execute(
-            select(users_table).where(users_table.c.email == email)
-        ).fetchone()
-
-        if not result:
-            logging.error(f"User {email} not found in users_table.")
-            raise HTTPException(status_code=404, detail="User not registered")
-
-        logging.info(f"User record found: {result}")
-
-    # Extract database connection info
-        db_user = result.user
-        db_name = result.database_name
-        working_dir = result.working_dir
-        db_password = result.password
-        
-        logging.info(f"Database credentials for {email} retrieved successfully.")
-        logging.info(f"DB User: {db_user}, DB Name: {db_name}, Working Dir: {working_dir}")
-        logging.info(f"DB Password: {db_password}")
-    return db_user, db_name, db_password, working_dir
+    record = tenant_directory.lookup(email)
+    if record is None:
+        logging.error(f"User {email} not found in users_table.")
+        raise HTTPException(status_code=404, detail="User not registered")
+    return record.db_user, record.db_name, record.db_password, record.working_dir
+
+
+def invalidate_user_credentials(email: str) -> None:
+    """Forgets the cached tenant credentials of `email`; call after writing the user's record."""
+    tenant_directory.invalidate(email)
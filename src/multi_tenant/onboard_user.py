@@ -8,6 +8,7 @@ from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_excep
 import logging
 from database.db_helper import initialize_database
 from models.models import users_table
+from models.users_utilities import invalidate_user_credentials
 from multi_tenant.register_user import register_user
 from multi_tenant.superuser import create_tenant_database
 from sqlalchemy import select # type: ignore
@@ -75,5 +76,7 @@ def onboard_user(db_user: str, email: str, pg_super_conn_info: dict, master_db_e
     except Exception as e:
         logging.error(f"Failed to initialize tenant DB for {email}: {e}")
         raise
+    finally:
+        invalidate_user_credentials(email)
 
     return db_user, db_name, tenant_db_conn_str, working_dir, user_password
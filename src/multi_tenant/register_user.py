@@ -1,5 +1,6 @@
 import logging
 from models.models import users_table
+from models.users_utilities import invalidate_user_credentials
 from sqlalchemy.dialects.postgresql import insert # type: ignore
 
 # def register_user(engine, email, db_conn_str, working_dir, db_password):
@@ -42,5 +43,7 @@ def register_user(engine, db_user, email, db_conn_str, working_dir, db_password)
     except Exception as e:
         logging.error(f"Error inserting user {email}: {e}")
         raise
+    finally:
+        invalidate_user_credentials(email)
     
 
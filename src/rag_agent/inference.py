@@ -35,18 +35,68 @@ import traceback
 from fastapi import HTTPException # type: ignore
 from rag_agent.rag_instance import RAGManager
 from cloud_storage.do_spaces import download_all_files
-from database.db_helper import fetch_metadata_from_db
 from rag_agent.lightrag_setup import RAGFactory
 from langchain_openai import OpenAI # type: ignore
 from config.appconfig import settings as app_settings
 from rag_agent.ingress import ingress_file_doc
+from rag_agent.revision import revise_sections, select_sections_to_revise
+from rag_agent.section_generation import assemble_proposal, generate_proposal_sections
 from lightrag import QueryParam # type: ignore
-from models.users_utilities import lookup_user_db_credentials
+from models.users_utilities import lookup_user_db_credentials, run_session
 from utils import clean_text, factual_prompt, generate_explicit_query, proposal_prompt, query_expansion
 from langchain_core.messages import AIMessage # type: ignore
-from reflexion_agent.state import State
+from reflexion_agent.state import State, Status
 from langgraph.graph.message import add_messages # type: ignore
 from structure_agent.defined_proposal_strucutre import proposal_structure
+from langgraph.config import get_stream_writer # type: ignore
+
+
+async def run_rag_query(rag, prompt: str, param: QueryParam, config: dict, node: str) -> str:
+    """
+    Runs the LightRAG query for a draft node.
+
+    When the graph is driven by the streaming endpoint (`stream_tokens` in the configurable),
+    the answer is requested with `stream=True` and every chunk is forwarded to the graph's
+    custom stream as it arrives, so the client sees the first tokens long before the draft is done.
+    """
+    configurable = (config or {}).get("configurable", {})
+    if not configurable.get("stream_tokens"):
+        return await rag.aquery(prompt, param)
+
+    param.stream = True
+    writer = get_stream_writer()
+    response = await rag.aquery(prompt, param)
+
+    # Cached answers come back as a plain string even when streaming is requested
+    if isinstance(response, str):
+        writer({"event": "token", "node": node, "data": response})
+        return response
+
+    chunks = []
+    async for chunk in response:
+        if not chunk:
+            continue
+        chunks.append(chunk)
+        writer({"event": "token", "node": node, "data": chunk})
+    return "".join(chunks)
+
+async def expand_proposal_query(state: State) -> dict:
+    """
+    Expands the user query against the fixed proposal structure. It needs nothing but the query,
+    so the graph runs it in parallel with `structure_node` and `retrieve`. Section-parallel
+    generation builds its own per-section queries, so the graph only adds this node in
+    single-query mode (see `graph.node_edges.proposal_branches`).
+    """
+    expanded_query = await generate_explicit_query(state["user_query"], proposal_structure())
+    return {"expanded_query": expanded_query}
+
+
+def latest_feedback(feedback: list) -> str:
+    """The newest reviewer feedback; `human_feedback` holds it as messages."""
+    if not feedback:
+        return ""
+    return str(getattr(feedback[-1], "content", feedback[-1]))
+
 
 async def proposal_generate_draft(state: dict, config: dict) -> dict:
     user_query = state["user_query"]
@@ -61,31 +111,9 @@ async def proposal_generate_draft(state: dict, config: dict) -> dict:
 
     feedback = state.get("human_feedback", ["No Feedback yet"])
 
-    # Step 1: Expand query using structured context
-    expanded_queries = generate_explicit_query(user_query, structure_proposal)
-    print("[generate_draft] Expanded Queries:", expanded_queries)
-
-    # Step 2: Build the full prompt
-    if feedback:
-        full_prompt = (
-            f"{proposal_prompt(user_query, structure_proposal, retrieved_docs)}\n\n"
-            f"User Query: {expanded_queries}\n\n"
-            f"Previous Feedback to Improve: {feedback}\n\n"
-            f"Please incorporate this feedback into the proposal."
-        )
-    else:
-        full_prompt = (
-            f"{proposal_prompt(user_query, structure_proposal, retrieved_docs)}\n\n"
-            f"User Query: {expanded_queries}"
-        )
-
-    # Step 3: Create RAG instance using config file (PostgreSQL)
-    session_data = state.get("session_data")
-    if not session_data or "email" not in session_data:
-        raise HTTPException(status_code=401, detail="User not authenticated")
-
-    email = session_data.get("email")
-    print("[generate_draft] session_data received:", session_data)
+    # Step 1: Create RAG instance using config file (PostgreSQL)
+    email = run_session(config).get("email")
+    print("[generate_draft] session email:", email)
     if not email:
         raise HTTPException(status_code=401, detail="User not authenticated")
 
@@ -93,18 +121,58 @@ async def proposal_generate_draft(state: dict, config: dict) -> dict:
     db_user, db_name, db_password, working_dir = lookup_user_db_credentials(email)
     rag = await RAGManager.get_or_create_rag(db_user, db_name, db_password, working_dir)
     rag.chunk_entity_relation_graph.embedding_func = rag.embedding_func
-    param = QueryParam(mode=mode,
-                       ids=[rfq_id] if mode == "local" and rfq_id else None,
-                       user_prompt=full_prompt,
-                       conversation_history=[],
-                       history_turns=5)
 
-    full_response_text = await rag.aquery(full_prompt, param)
-    cleaned_response = clean_text(full_response_text)
+    # A revision rewrites only the sections the reviewer's feedback concerns (see rag_agent.revision)
+    targets = None
+    if state.get("status") == Status.NEEDS_REVISION and state.get("proposal_sections"):
+        targets = await select_sections_to_revise(latest_feedback(feedback), structure_proposal)
+
+    if targets:
+        sections = await revise_sections(
+            rag, user_query, structure_proposal, state["proposal_sections"], targets,
+            latest_feedback(feedback), retrieved_docs, mode, rfq_id, config
+        )
+        state["proposal_sections"] = sections
+        cleaned_response = assemble_proposal(sections)
+    elif app_settings.proposal_generation_mode == "sections":
+        # Step 2: Retrieve and draft every section concurrently, then write the framing sections
+        sections = await generate_proposal_sections(
+            rag, user_query, structure_proposal, retrieved_docs, feedback, mode, rfq_id, config
+        )
+        state["proposal_sections"] = sections
+        cleaned_response = assemble_proposal(sections)
+    else:
+        # Step 2: Expanded query, computed by the parallel expand_query branch
+        expanded_queries = state.get("expanded_query") or await generate_explicit_query(user_query, structure_proposal)
+        print("[generate_draft] Expanded Queries:", expanded_queries)
+
+        # Step 3: Build the full prompt and draft the whole proposal in one query
+        if feedback:
+            full_prompt = (
+                f"{proposal_prompt(user_query, structure_proposal, retrieved_docs)}\n\n"
+                f"User Query: {expanded_queries}\n\n"
+                f"Previous Feedback to Improve: {feedback}\n\n"
+                f"Please incorporate this feedback into the proposal."
+            )
+        else:
+            full_prompt = (
+                f"{proposal_prompt(user_query, structure_proposal, retrieved_docs)}\n\n"
+                f"User Query: {expanded_queries}"
+            )
+
+        param = QueryParam(mode=mode,
+                           ids=[rfq_id] if mode == "local" and rfq_id else None,
+                           user_prompt=full_prompt,
+                           conversation_history=[],
+                           history_turns=5)
+
+        full_response_text = await run_rag_query(rag, full_prompt, param, config, "proposal_draft")
+        cleaned_response = clean_text(full_response_text)
 
     print("[generate_draft] RAG Response Preview:", cleaned_response[:500])
 
-    # Step 6: Save result to state
+    # Step 6: Save result to state; the critic reviews only the revised sections, if any
+    state["revised_sections"] = targets or []
     candidate_text = cleaned_response
     ai_msg = AIMessage(content=candidate_text)
     state["candidate"] = ai_msg
@@ -123,7 +191,7 @@ async def factual_generate_draft(state: dict, config: dict) -> dict:
     logging.info("Mode selected %s", mode)
 
     # Step 1: Expand query using structured context
-    expanded_queries = query_expansion(user_query)
+    expanded_queries = await query_expansion(user_query)
     print("[generate_draft] Expanded Queries:", expanded_queries)
 
     # Step 2: Build the full prompt
@@ -133,12 +201,8 @@ async def factual_generate_draft(state: dict, config: dict) -> dict:
     )
 
     # Step 3: Create RAG instance using config file (PostgreSQL)
-    session_data = state.get("session_data")
-    if not session_data or "email" not in session_data:
-        raise HTTPException(status_code=401, detail="User not authenticated")
-
-    email = session_data.get("email")
-    print("[generate_draft] session_data received:", session_data)
+    email = run_session(config).get("email")
+    print("[generate_draft] session email:", email)
     if not email:
         raise HTTPException(status_code=401, detail="User not authenticated")
 
@@ -152,7 +216,7 @@ async def factual_generate_draft(state: dict, config: dict) -> dict:
                        conversation_history=[],
                        history_turns=5)
 
-    full_response_text = await rag.aquery(full_prompt, param)
+    full_response_text = await run_rag_query(rag, full_prompt, param, config, "factual_draft")
     cleaned_response = clean_text(full_response_text)
 
     print("[generate_draft] RAG Response Preview:", cleaned_response[:500])
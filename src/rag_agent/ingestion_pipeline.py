@@ -0,0 +1,149 @@
+"""
+Per-document ingestion steps run by the ingestion workers.
+
+An upload is processed in two phases. Every file or web link is first *prepared* on its own —
+parsed, its metadata and prompt suggestions extracted by the LLM, and the results stored — and the
+workers run these preparations concurrently. All prepared documents of the upload are then inserted
+into LightRAG with a single batched `ainsert`, so LightRAG's own chunking and entity-extraction
+concurrency spans the whole upload.
+
+PDFs are parsed a single time (`DocumentProcessor.extract_pdf`, cached by content hash); the
+metadata step and the LightRAG step both read that extraction. Before any of that, the SHA-256 of
+the content is compared with the tenant's `document_fingerprints`: content identical to what was
+last ingested under the same name is reported as unchanged and skipped entirely. Changed content
+replaces the earlier version: its LightRAG document is deleted before the new text is inserted
+(`insert_rag_documents`), and a web link keeps one metadata row, keyed on the URL.
+
+- `prepare_uploaded_file`: Saves an uploaded file, extracts and stores its metadata and prompt suggestions, and collects the text to index.
+- `prepare_web_link`: Downloads a web link and runs it through the same steps.
+- `ingest_prepared_documents`: Inserts the prepared documents of an upload into LightRAG in one batch.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+import requests # type: ignore
+from document_processor import METADATA_TEXT_LIMIT, DocumentProcessor
+from database.async_db import aget_fingerprint, ainsert_document, asave_metadata, aset_fingerprints
+from database.db_helper import extract_metadata_with_llm, extract_prompt_suggestions
+from rag_agent.ingress import collect_rag_documents, insert_rag_documents
+
+document_processor = DocumentProcessor()
+
+
+async def _unchanged(document_name: str, sha256: str, db_user: str, db_name: str, db_password: str) -> bool:
+    if await aget_fingerprint(document_name, db_user, db_name, db_password) == sha256:
+        logging.info(f"⏭️ '{document_name}' is unchanged since it was last ingested; skipping")
+        return True
+    return False
+
+
+async def _extract_and_save_metadata(text: str, metadata_overrides: dict, document_name: str, file_name: str, db_user: str, db_name: str, db_password: str) -> None:
+    # The two LLM calls are independent; run them side by side
+    metadata, prompt_suggestions = await asyncio.gather(
+        extract_metadata_with_llm(text),
+        extract_prompt_suggestions(text)
+    )
+    logging.info("Suggested Prompts: %s", prompt_suggestions)
+
+    metadata.update(metadata_overrides)
+    await ainsert_document(document_name, file_name, text, db_user, db_name, db_password)
+    await asave_metadata(metadata, prompt_suggestions, db_user, db_name, db_password)
+
+
+async def prepare_uploaded_file(file_name: str, file_bytes: bytes, db_user: str, db_name: str, db_password: str, working_dir: str) -> dict:
+    sha256 = hashlib.sha256(file_bytes).hexdigest()
+    if await _unchanged(file_name, sha256, db_user, db_name, db_password):
+        return {"unchanged": True, "document": file_name}
+
+    file_path = os.path.join(working_dir, file_name)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "wb") as f:
+        f.write(file_bytes)
+
+    # .txt files are read as they are by collect_rag_documents
+    extraction = None
+    if file_name.lower().endswith(".pdf"):
+        extraction = await asyncio.to_thread(document_processor.extract_pdf, file_bytes)
+        text = extraction.metadata_text
+    elif file_name.lower().endswith(".txt"):
+        text = (await asyncio.to_thread(document_processor.extract_txt_content, file_path))[:METADATA_TEXT_LIMIT]
+    else:
+        return {"error": "Unsupported file format."}
+
+    document_name = file_name
+    await _extract_and_save_metadata(
+        text, {"id": document_name, "file_name": file_name},
+        document_name, file_name, db_user, db_name, db_password
+    )
+    logging.info(f"✅ Inserted and saved metadata for document {document_name}")
+
+    documents = await collect_rag_documents(
+        file_name, db_user, db_name, db_password,
+        file_path=file_path,
+        overwrite=True,
+        extracted_text=extraction.rag_text if extraction else None
+    )
+    documents["fingerprint"] = (file_name, sha256)
+    return documents
+
+
+async def prepare_web_link(link: str, db_user: str, db_name: str, db_password: str, working_dir: str) -> dict:
+    response = await asyncio.to_thread(requests.get, link)
+    if response.status_code != 200:
+        logging.warning(f"❌ Failed to fetch {link}")
+        return {"error": f"Failed to fetch {link}"}
+
+    sha256 = hashlib.sha256(response.content).hexdigest()
+    if await _unchanged(link, sha256, db_user, db_name, db_password):
+        return {"unchanged": True, "document": link}
+
+    # A link keeps the same metadata row (and local copy) across re-ingestions
+    document_name = str(uuid.uuid5(uuid.NAMESPACE_URL, link))
+    filename = f"web_{document_name[:8]}.pdf"
+    file_path = os.path.join(working_dir, filename)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "wb") as f:
+        f.write(response.content)
+
+    # Linked PDFs are parsed once from the downloaded bytes; web pages go through trafilatura
+    if response.content.startswith(b"%PDF"):
+        extraction = await asyncio.to_thread(document_processor.extract_pdf, response.content)
+        text, rag_text = extraction.metadata_text, extraction.rag_text
+    else:
+        rag_text = await asyncio.to_thread(document_processor.process_webpage, link) or ""
+        text = rag_text[:METADATA_TEXT_LIMIT]
+    if not rag_text.strip():
+        return {"error": f"No valid content extracted from {link}"}
+
+    await _extract_and_save_metadata(
+        text, {"id": document_name, "file_name": filename, "source": link},
+        document_name, filename, db_user, db_name, db_password
+    )
+    logging.info(f"✅ Saved metadata for web link {link}")
+
+    documents = await collect_rag_documents(
+        link, db_user, db_name, db_password,
+        web_links=[link],
+        overwrite=True,
+        extracted_text=rag_text
+    )
+    documents["fingerprint"] = (link, sha256)
+    return documents
+
+
+async def ingest_prepared_documents(prepared: list, db_user: str, db_name: str, db_password: str, working_dir: str) -> dict:
+    """`prepared` holds the successful, changed results of `prepare_uploaded_file` / `prepare_web_link`."""
+    texts = [text for document in prepared for text in document["texts"]]
+    ids = [doc_id for document in prepared for doc_id in document["ids"]]
+    if not texts:
+        return {"error": "No valid content extracted from file or web links."}
+
+    logging.info("📥 Inserting %d document(s) into LightRAG in one batch", len(texts))
+    await insert_rag_documents(texts, ids, db_user, db_name, db_password, working_dir)
+
+    # Only fingerprint what actually reached LightRAG, so a failed insert is retried next upload
+    await aset_fingerprints([document["fingerprint"] for document in prepared], db_user, db_name, db_password)
+    return {"success": True}
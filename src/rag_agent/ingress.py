@@ -1,12 +1,15 @@
 """
 Ingests and processes document files or web links, extracting content and storing it in the database.
 
+- `collect_rag_documents`: Extracts the text of a file or web links and stores it in the tenant's documents table.
+- `insert_rag_documents`: Inserts a batch of extracted documents into the tenant's LightRAG instance, replacing earlier versions.
 - `ingress_file_doc`: Main function to process files or web links, extract text, insert metadata into the database, and process data using RAG.
 """
 
+import asyncio
 from fastapi import HTTPException # type: ignore
 from document_processor import DocumentProcessor
-from database.db_helper import insert_file_metadata, open_tenant_db_connection
+from database.async_db import adelete_document, adocument_exists, ainsert_file_metadata
 from cloud_storage.do_spaces import upload_file
 from rag_agent.rag_instance import RAGManager
 import traceback
@@ -20,10 +23,92 @@ logging.getLogger("pdfminer").setLevel(logging.ERROR)
 process_document = DocumentProcessor()
 
 
+async def collect_rag_documents(file_name: str, db_user: str, db_name: str, db_password: str, file_path: str = None, web_links: list = None, overwrite: bool = False, extracted_text: str = None) -> dict:
+    """
+    Extracts the text LightRAG should index for a file or web links and records it in the tenant's
+    `documents` table. Returns `{"texts": [...], "ids": [...]}` ready for `rag.ainsert`, or `{"error": ...}`.
+    Callers that already parsed the document pass `extracted_text`, which is stored under `file_name`.
+    """
+    if file_path:
+        print(f"🔎 Checking if file '{file_name}' exists in DB...")
+        existing = await adocument_exists(file_name, db_user, db_name, db_password)
+        print(f"🧾 File exists in DB: {existing}")
+        if existing and not overwrite:
+            print(f"❌ File '{file_name}' already exists. Returning early.")
+            return {"error": f"File '{file_name}' already exists."}
+        elif existing and overwrite:
+            print(f"♻️ Overwriting file '{file_name}' in DB.")
+            await adelete_document(file_name, db_user, db_name, db_password)
+
+    # Check if web links already exist in the database
+    if web_links:
+        for link in web_links:
+            if not await adocument_exists(link, db_user, db_name, db_password):
+                continue
+            if not overwrite:
+                return {"error": f"Web link '{link}' already exists."}
+            print(f"♻️ Overwriting web link '{link}' in DB.")
+            await adelete_document(link, db_user, db_name, db_password)
+
+    text_content = []
+    document_names = []
+
+    if extracted_text is not None:
+        if extracted_text:
+            text_content.append(extracted_text)
+            document_names.append(file_name)
+    elif file_path:
+        file_path_str = str(file_path)
+        if file_path_str.endswith(".pdf"):
+            extracted_text = await asyncio.to_thread(process_document.extract_text_and_tables_from_pdf, file_path_str)
+        elif file_path_str.endswith(".txt"):
+            extracted_text = await asyncio.to_thread(process_document.extract_txt_content, file_path_str)
+        else:
+            return {"error": "Unsupported file format."}
+        if extracted_text:
+            text_content.append(extracted_text)
+            document_names.append(file_name)
+
+    if web_links and extracted_text is None:
+        for link in web_links:
+            web_content = await asyncio.to_thread(process_document.process_webpage, link)
+            if web_content:
+                text_content.append(web_content)
+                document_names.append(link)
+
+    logging.debug("📝 Extracted document_names: %s", document_names)
+
+    if not text_content:
+        return {"error": "No valid content extracted from file or web links."}
+
+    for i, content in enumerate(text_content):
+        await ainsert_file_metadata(document_names[i], file_name, content, db_user, db_name, db_password)
+    logging.debug("📝 Extracted content (truncated): %s", [c[:100] for c in text_content])
+
+    return {"texts": text_content, "ids": document_names}
+
+
+async def insert_rag_documents(texts: list, ids: list, db_user: str, db_name: str, db_password: str, working_dir: str) -> None:
+    """Submits documents to the tenant's LightRAG in one `ainsert` call, so its chunk and extraction concurrency applies."""
+    rag = await RAGManager.get_or_create_rag(db_user, db_name, db_password, working_dir)
+
+    if rag is None:
+        raise RuntimeError("RAG not initialized.")
+
+    rag.chunk_entity_relation_graph.embedding_func = rag.embedding_func
+
+    # LightRAG silently skips ids it already holds; replaced content must go out first
+    new_ids = await rag.doc_status.filter_keys(set(ids))
+    for doc_id in ids:
+        if doc_id not in new_ids:
+            logging.info("♻️ Removing the previous LightRAG document '%s' before re-inserting it", doc_id)
+            await rag.adelete_by_doc_id(doc_id)
+    await rag.ainsert(texts, ids=ids)
+
+
 async def ingress_file_doc(file_name: str, file_path: str = None, web_links: list = None, overwrite: bool = False, session_data: dict = None):
     print("📥 Starting ingress_file_doc")
     try:
-        process_document = DocumentProcessor()
         # Extract email from session data
         email = session_data.get("email")
         if not email:
@@ -31,79 +116,19 @@ async def ingress_file_doc(file_name: str, file_path: str = None, web_links: lis
 
         # Lookup DB credentials once
         db_user, db_name, db_password, working_dir = lookup_user_db_credentials(email)
-        logging.info("Password for user %s: %s: %s", db_user, db_password, db_name)
-        with open_tenant_db_connection(db_user,db_name, db_password) as conn:
-            if not conn:
-                raise HTTPException(status_code=500, detail="Failed to connect to tenant database")
-        logging.info("✅ Connection and processor created")
-        cursor = conn.cursor()
+        logging.info("✅ Credentials resolved for %s", db_name)
     except Exception as e:
         traceback.print_exc()
         return {"error": f"Initialization failed: {str(e)}"}
     try:
-        if file_path:
-            print(f"🔎 Checking if file '{file_name}' exists in DB...")
-            cursor.execute("SELECT file_name FROM documents WHERE file_name = %s", (file_name,))
-            existing = cursor.fetchone()
-            print(f"🧾 File exists in DB: {existing}")
-            if existing and not overwrite:
-                print(f"❌ File '{file_name}' already exists. Returning early.")
-                return {"error": f"File '{file_name}' already exists."}
-            elif existing and overwrite:
-                print(f"♻️ Overwriting file '{file_name}' in DB.")
-                cursor.execute("DELETE FROM documents WHERE file_name = %s", (file_name,))
-                conn.commit()
-
-        # Check if web links already exist in the database
-        if web_links:
-            for link in web_links:
-                cursor.execute("SELECT file_name FROM documents WHERE file_name = %s", (link,))
-                if cursor.fetchone():
-                    return {"error": f"Web link '{link}' already exists."}
-
-        text_content = []
-        document_names = []
-
-        if file_path:
-            file_path_str = str(file_path)
-            if file_path_str.endswith(".pdf"):
-                extracted_text = process_document.extract_text_and_tables_from_pdf(file_path_str)
-                if extracted_text:
-                    text_content.append(extracted_text)
-                    document_names.append(file_name)
-            elif file_path_str.endswith(".txt"):
-                extracted_text = process_document.extract_txt_content(file_path_str)
-                if extracted_text:
-                    text_content.append(extracted_text)
-                    document_names.append(file_name)
-            else:
-                return {"error": "Unsupported file format."}
-
-        if web_links:
-            for link in web_links:
-                web_content = process_document.process_webpage(link)
-                if web_content:
-                    text_content.append(web_content)
-                    document_names.append(link)
-
-        logging.debug("📝 Extracted document_names: %s", document_names)
-
-        if not text_content:
-            return {"error": "No valid content extracted from file or web links."}
-
-        for i, content in enumerate(text_content):
-            insert_file_metadata(document_names[i], file_name, content, db_user, db_name, db_password)
-            print("📝 Extracted content (truncated):", [c[:100] for c in text_content])
-            logging.debug("📝 Extracted content (truncated): %s", [c[:100] for c in text_content])
-
-
-        rag = await RAGManager.get_or_create_rag(db_user, db_name, db_password, working_dir)
-
-        if rag is None:
-            raise RuntimeError("RAG not initialized.")
-        
-        rag.chunk_entity_relation_graph.embedding_func = rag.embedding_func
-        await rag.ainsert(text_content, ids=document_names)
+        documents = await collect_rag_documents(
+            file_name, db_user, db_name, db_password,
+            file_path=file_path, web_links=web_links, overwrite=overwrite
+        )
+        if "error" in documents:
+            return documents
+
+        await insert_rag_documents(documents["texts"], documents["ids"], db_user, db_name, db_password, working_dir)
 
         print(f"File '{file_name}' processed and inserted successfully!")
         logging.info("File '%s' processed and inserted successfully!", file_name)
@@ -113,10 +138,6 @@ async def ingress_file_doc(file_name: str, file_path: str = None, web_links: lis
         traceback.print_exc()
         return {"error": f"Initialization failed: {str(e)}"}
 
-    finally:
-        if conn:
-            conn.close()
-
 # async def ingress_file_doc(file_name: str, file_path: str = None, web_links: list = None):
 #     process_document = DocumentProcessor()
 
@@ -6,8 +6,8 @@ embedding and LLM (Large Language Model) configurations for efficient informatio
 question answering.
 
 Key Features:
-- Defines an embedding function using OpenAI's embedding API (`openai_embed`), which processes 
-  a list of input texts and returns their corresponding embeddings.
+- Embeds texts with OpenAI's `text-embedding-3-large` and completes with gpt-4o, both through the
+  shared client of `llm_gateway` (`lightrag_embed`, `lightrag_complete`).
 - Uses the LightRAG framework to create an RAG instance for the purpose of document retrieval 
   and question answering. This includes configuring the RAG with embeddings and LLM models.
 - Provides a `RAGFactory` class to instantiate and configure the RAG system, with shared embedding 
@@ -18,8 +18,8 @@ Key Features:
   and initializes the pipeline.
 
 Dependencies:
-- `openai_embed`: A function to get text embeddings from OpenAI.
-- `gpt_4o_complete`: A function from the LightRAG library to perform LLM-based completions.
+- `lightrag_embed`: Gets text embeddings from OpenAI through the LLM gateway, serving repeated texts from `embedding_cache`.
+- `lightrag_complete`: Drop-in for LightRAG's `gpt_4o_complete` that goes through the LLM gateway.
 - `LightRAG`: The core framework used for retrieval-augmented generation, enabling the RAG 
   pipeline for information retrieval and question answering.
 - `initialize_pipeline_status`: A utility function for managing pipeline status and storage 
@@ -38,15 +38,12 @@ Note:
 """
 
 import logging
-import asyncio
 import os
-import numpy as np # type: ignore
 from lightrag import LightRAG # type: ignore
 from lightrag.kg.postgres_impl import PostgreSQLDB  # type: ignore
-from lightrag.llm.openai import openai_embed, gpt_4o_complete # type: ignore
 from lightrag.utils import EmbeddingFunc # type: ignore
-from lightrag.kg.shared_storage import initialize_pipeline_status # type: ignore
 from config.appconfig import settings as app_settings
+from llm_gateway import lightrag_complete, lightrag_embed
 
 # Embedding function using OpenAI
 # def embedding_func(texts: list[str]) -> np.ndarray:
@@ -118,12 +115,7 @@ class RAGFactory:
         embedding_func = EmbeddingFunc(
             embedding_dim=3072,
             max_token_size=8192,
-            func=lambda texts: openai_embed(
-                texts,
-                model="text-embedding-3-large",
-                api_key=app_settings.openai_api_key,
-                base_url=app_settings.openai_api_base
-            )
+            func=lightrag_embed
         )
 
         workspace_dir = app_settings.workspace
@@ -137,7 +129,7 @@ class RAGFactory:
         rag = LightRAG(
             working_dir=workspace_dir,
             addon_params={"insert_batch_size": 10},
-            llm_model_func=gpt_4o_complete,
+            llm_model_func=lightrag_complete,
             embedding_func=embedding_func,
             kv_storage=app_settings.kv_storage,
             vector_storage=app_settings.vector_storage,
@@ -60,10 +60,10 @@ import os
 from typing import Dict
 from lightrag import LightRAG
 from lightrag.utils import EmbeddingFunc
-from lightrag.llm.openai import gpt_4o_complete, openai_embed
 from lightrag.kg.shared_storage import initialize_pipeline_status
 from config.appconfig import settings as app_settings
 from database.db_helper import initialize_age
+from llm_gateway import lightrag_complete, lightrag_embed
 
 class RAGManager:
     _instances: Dict[str, LightRAG] = {}
@@ -86,20 +86,15 @@ class RAGManager:
 
             rag = LightRAG(
                 working_dir=working_dir,
-                llm_model_func=gpt_4o_complete,
+                llm_model_func=lightrag_complete,
                 llm_model_name="gpt-4o",
-                llm_model_max_async=2,
+                llm_model_max_async=app_settings.lightrag_llm_max_async,
                 llm_model_max_token_size=128000,
                 enable_llm_cache_for_entity_extract=True,
                 embedding_func=EmbeddingFunc(
                     embedding_dim=3072,
                     max_token_size=8192,
-                    func=lambda texts: openai_embed(
-                        texts,
-                        model="text-embedding-3-large",
-                        api_key=app_settings.openai_api_key,
-                        base_url=app_settings.openai_api_base
-                    ),
+                    func=lightrag_embed,
                 ),
                 kv_storage="PGKVStorage",
                 doc_status_storage="PGDocStatusStorage",
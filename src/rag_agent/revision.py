@@ -0,0 +1,134 @@
+"""
+Section-scoped revision of a proposal under review.
+
+A reviewer's "revise: ..." feedback usually concerns one or two sections. Instead of regenerating the
+whole proposal (full query expansion, full RAG query, full critique), the revision engine:
+
+1. maps the feedback to the sections of the `proposal_structure()` outline it concerns — by name
+   when the feedback mentions a section, subsection or phase, otherwise with one small LLM call
+   (cached in `llm_cache`);
+2. rewrites only those sections, each with its own LightRAG query, from the current section text and
+   the feedback;
+3. splices them back into the previous candidate, leaving every other section unchanged.
+
+The critic then reviews only the rewritten sections (see `reflexion_agent.critic`), so the cost of a
+revision follows the size of the change, not of the document. Feedback that concerns the whole
+document ("all") falls back to full regeneration.
+
+- `split_sections`: Splits a proposal text into the sections of its structure, by heading.
+- `select_sections_to_revise`: The titles of the sections a piece of feedback concerns.
+- `revise_sections`: Rewrites the selected sections and returns the spliced section list.
+"""
+
+import asyncio
+import json
+import logging
+import re
+from typing import List, Optional
+from llm_cache import llm_cache
+from llm_gateway import llm_gateway
+from rag_agent.section_generation import section_stream_writer, proposal_sections, revise_section
+from config.appconfig import settings as app_settings
+from utils import revision_targets_prompt
+
+REVISION_TARGETS_MODEL = "gpt-4o"
+# Bump whenever the targets prompt changes
+REVISION_TARGETS_PROMPT_VERSION = "1"
+llm_cache.register("revision_targets", f"{REVISION_TARGETS_PROMPT_VERSION}:{REVISION_TARGETS_MODEL}")
+
+ALL_SECTIONS = "all"
+
+
+def _heading_pattern(title: str) -> re.Pattern:
+    # The heading may be numbered or decorated with markdown ("## 3. Technical Approach", "**Commercial**")
+    return re.compile(rf"^[ \t#*>\d.)\-]*{re.escape(title)}\b", re.IGNORECASE | re.MULTILINE)
+
+
+def split_sections(text: str, titles: List[str]) -> Optional[List[dict]]:
+    """
+    `[{"title", "content"}]` in `titles` order, or `None` when a heading is missing or out of order.
+    Text before the first heading stays with the first section.
+    """
+    if not text or not titles:
+        return None
+    starts, position = [], 0
+    for title in titles:
+        match = _heading_pattern(title).search(text, position)
+        if match is None:
+            return None
+        starts.append(match.start())
+        position = match.end()
+    starts[0] = 0
+    bounds = starts + [len(text)]
+    return [{"title": title, "content": text[bounds[i]:bounds[i + 1]].strip()} for i, title in enumerate(titles)]
+
+
+def _named_sections(feedback: str, sections: list) -> List[str]:
+    """Sections whose title, subsections or phases the feedback mentions."""
+    feedback = feedback.lower()
+    named = []
+    for title, outline in sections:
+        names = [title] + [topic for values in outline.values() for topic in values]
+        if any(re.search(rf"\b{re.escape(name.lower())}\b", feedback) for name in names):
+            named.append(title)
+    return named
+
+
+async def select_sections_to_revise(feedback: str, structure: dict) -> Optional[List[str]]:
+    """Titles of the sections to rewrite, in structure order; `None` when the whole proposal must be redrafted."""
+    sections = proposal_sections(structure)
+    titles = [title for title, _ in sections]
+
+    named = _named_sections(feedback, sections)
+    if named:
+        logging.info("✂️ Feedback names sections %s", named)
+        return named
+
+    outline = {title: outline for title, outline in sections}
+
+    async def classify():
+        raw = await llm_gateway.achat(
+            [{"role": "user", "content": revision_targets_prompt(feedback, outline)}],
+            model=REVISION_TARGETS_MODEL,
+            response_format={"type": "json_object"}
+        )
+        return json.loads(raw).get("sections", ALL_SECTIONS)
+
+    try:
+        selected = await llm_cache.aget_or_compute(
+            "revision_targets", f"{REVISION_TARGETS_PROMPT_VERSION}:{REVISION_TARGETS_MODEL}",
+            f"{feedback}\n{json.dumps(outline, sort_keys=True)}", classify
+        )
+    except (json.JSONDecodeError, AttributeError) as e:
+        logging.error("Could not map feedback to sections: %s", e)
+        return None
+
+    if selected == ALL_SECTIONS or not isinstance(selected, list):
+        return None
+    selected = [title for title in titles if title in set(selected)]
+    if not selected or len(selected) == len(titles):
+        return None
+    logging.info("✂️ Feedback mapped to sections %s", selected)
+    return selected
+
+
+async def revise_sections(rag, user_query: str, structure: dict, sections: List[dict], targets: List[str],
+                          feedback: str, retrieved_docs, mode: str, rfq_id: Optional[str], config: dict) -> List[dict]:
+    outlines = dict(proposal_sections(structure))
+    current = {section["title"]: section["content"] for section in sections}
+    writer = section_stream_writer(config)
+    semaphore = asyncio.Semaphore(app_settings.proposal_section_concurrency)
+
+    async def revise(title: str):
+        text = await revise_section(
+            rag, semaphore, user_query, title, outlines.get(title, {}), current.get(title, ""), feedback, retrieved_docs, mode, rfq_id
+        )
+        if writer:
+            writer({"event": "section", "node": "proposal_draft", "title": title, "data": text})
+        return title, text
+
+    revised = dict(await asyncio.gather(*(revise(title) for title in targets)))
+    return [
+        {"title": section["title"], "content": revised.get(section["title"], section["content"])}
+        for section in sections
+    ]
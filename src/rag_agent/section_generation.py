@@ -0,0 +1,177 @@
+"""
+Section-parallel generation of full proposals (map over `proposal_structure`, then reduce).
+
+Instead of one `rag.aquery` for the whole document, every body section is retrieved and drafted by
+its own LightRAG query, at most `PROPOSAL_SECTION_CONCURRENCY` at a time. The query of a section is
+the user query narrowed to that section's title, subsections and phases, so retrieval is focused on
+what the section needs; the drafting instructions go in `user_prompt`. Once the body is drafted, a
+stitching pass (one LLM call) lists the contradictions and repetitions between sections, and only the
+sections it flags are rewritten, concurrently, by their own LightRAG query. One LLM call then writes
+the framing sections (`FRAMING_SECTIONS`, e.g. the Introduction and Conclusion) from the body, which
+keeps them consistent with it, and the document is assembled in structure order. Wall-clock time is
+that of the slowest section plus the stitching, the slowest rewrite and the framing call, instead of
+the whole document.
+Opt-in with `PROPOSAL_GENERATION_MODE=sections`; by default a proposal is drafted by a single query.
+
+- `proposal_sections`: Flattens a proposal structure into `(title, outline)` pairs.
+- `revise_section`: Rewrites one drafted section according to a fix or reviewer feedback.
+- `generate_proposal_sections`: Drafts all sections and returns them in structure order.
+- `assemble_proposal`: Joins the drafted sections into the proposal text.
+"""
+
+import asyncio
+import json
+import logging
+from typing import List, Optional, Tuple
+from lightrag import QueryParam # type: ignore
+from langgraph.config import get_stream_writer # type: ignore
+from config.appconfig import settings as app_settings
+from llm_gateway import llm_gateway
+from utils import clean_text, consistency_prompt, framing_prompt, section_prompt, section_revision_prompt
+
+# Sections that summarise the others; written after the body, from the body
+FRAMING_SECTIONS = ("Introduction", "Conclusion")
+FRAMING_MODEL = "gpt-4o"
+# How much of each body section the framing call sees
+FRAMING_EXCERPT_CHARS = 1500
+# Attempts at a complete JSON answer before the framing sections fail the draft
+FRAMING_ATTEMPTS = 2
+CONSISTENCY_MODEL = "gpt-4o"
+
+
+def proposal_sections(structure: dict) -> List[Tuple[str, dict]]:
+    sections = []
+    for title, spec in structure.get("sections", {}).items():
+        if isinstance(spec, dict):
+            outline = {key: value for key, value in spec.items() if value}
+        else:
+            outline = {"subsections": list(spec)} if spec else {}
+        sections.append((title, outline))
+    return sections
+
+
+def section_query(user_query: str, title: str, outline: dict) -> str:
+    topics = [topic for values in outline.values() for topic in values]
+    return f"{user_query}\nFocus on: {title}" + (f" ({'; '.join(topics)})" if topics else "")
+
+
+def section_stream_writer(config: dict):
+    if not (config or {}).get("configurable", {}).get("stream_tokens"):
+        return None
+    return get_stream_writer()
+
+
+async def _draft_body_section(rag, semaphore: asyncio.Semaphore, user_query: str, title: str, outline: dict,
+                              retrieved_docs, feedback, mode: str, rfq_id: Optional[str]) -> str:
+    param = QueryParam(mode=mode,
+                       ids=[rfq_id] if mode == "local" and rfq_id else None,
+                       user_prompt=section_prompt(user_query, title, outline, retrieved_docs, feedback),
+                       conversation_history=[],
+                       history_turns=5)
+    async with semaphore:
+        response = await rag.aquery(section_query(user_query, title, outline), param)
+    logging.info("📝 Drafted proposal section '%s'", title)
+    return clean_text(response)
+
+
+async def revise_section(rag, semaphore: asyncio.Semaphore, user_query: str, title: str, outline: dict,
+                         current_text: str, feedback: str, retrieved_docs, mode: str, rfq_id: Optional[str]) -> str:
+    param = QueryParam(mode=mode,
+                       ids=[rfq_id] if mode == "local" and rfq_id else None,
+                       user_prompt=section_revision_prompt(user_query, title, outline, current_text, feedback, retrieved_docs),
+                       conversation_history=[],
+                       history_turns=5)
+    async with semaphore:
+        # Retrieval follows what the feedback asks for within this section
+        response = await rag.aquery(section_query(f"{user_query}\n{feedback}", title, outline), param)
+    logging.info("✏️ Revised proposal section '%s'", title)
+    return clean_text(response)
+
+
+async def _consistency_fixes(user_query: str, body: list) -> dict:
+    """`{title: fix}` for the body sections the stitching pass flags; empty when it finds nothing (or fails)."""
+    titles = {title for title, _ in body}
+    text = "\n\n".join(text for _, text in body)
+    raw = await llm_gateway.achat(
+        [{"role": "user", "content": consistency_prompt(user_query, text)}],
+        model=CONSISTENCY_MODEL,
+        response_format={"type": "json_object"}
+    )
+    try:
+        fixes = json.loads(raw).get("fixes", [])
+        return {fix["section"]: str(fix["fix"]) for fix in fixes if fix.get("section") in titles and fix.get("fix")}
+    except (json.JSONDecodeError, AttributeError, KeyError, TypeError) as e:
+        # The drafted sections are still valid on their own; only the stitching is skipped
+        logging.error("Consistency pass returned an unusable answer (%s): %s", e, raw[:500])
+        return {}
+
+
+async def _draft_framing_sections(user_query: str, titles: list, body: list) -> dict:
+    excerpts = "\n\n".join(f"{title}\n{text[:FRAMING_EXCERPT_CHARS]}" for title, text in body)
+    missing = titles
+    for attempt in range(1, FRAMING_ATTEMPTS + 1):
+        raw = await llm_gateway.achat(
+            [{"role": "user", "content": framing_prompt(user_query, titles, excerpts)}],
+            model=FRAMING_MODEL,
+            response_format={"type": "json_object"}
+        )
+        try:
+            drafted = json.loads(raw)
+        except json.JSONDecodeError:
+            drafted = None
+        if isinstance(drafted, dict):
+            missing = [title for title in titles if not isinstance(drafted.get(title), str) or not drafted[title].strip()]
+            if not missing:
+                return {title: clean_text(drafted[title]) for title in titles}
+        logging.warning("Framing sections attempt %d/%d is missing %s: %s", attempt, FRAMING_ATTEMPTS, missing, raw[:500])
+    raise ValueError(f"Could not draft the framing sections {missing} after {FRAMING_ATTEMPTS} attempts")
+
+
+async def generate_proposal_sections(rag, user_query: str, structure: dict, retrieved_docs, feedback,
+                                     mode: str, rfq_id: Optional[str], config: dict) -> List[dict]:
+    """Returns `[{"title", "content"}]` in structure order."""
+    sections = proposal_sections(structure)
+    framing = [title for title, _ in sections if title in FRAMING_SECTIONS]
+    body_sections = [(title, outline) for title, outline in sections if title not in FRAMING_SECTIONS]
+
+    writer = section_stream_writer(config)
+    semaphore = asyncio.Semaphore(app_settings.proposal_section_concurrency)
+
+    async def draft(title: str, outline: dict) -> Tuple[str, str]:
+        text = await _draft_body_section(rag, semaphore, user_query, title, outline, retrieved_docs, feedback, mode, rfq_id)
+        if writer:
+            # Sections finish out of order, so they are streamed whole rather than token by token
+            writer({"event": "section", "node": "proposal_draft", "title": title, "data": text})
+        return title, text
+
+    body = await asyncio.gather(*(draft(title, outline) for title, outline in body_sections))
+    drafted = dict(body)
+
+    # Stitching: rewrite only the sections that contradict or repeat the others
+    fixes = await _consistency_fixes(user_query, body) if len(body) > 1 else {}
+    if fixes:
+        logging.info("🧵 Consistency pass flagged sections %s", list(fixes))
+        outlines = dict(body_sections)
+
+        async def stitch(title: str) -> Tuple[str, str]:
+            text = await revise_section(rag, semaphore, user_query, title, outlines[title], drafted[title],
+                                        fixes[title], retrieved_docs, mode, rfq_id)
+            if writer:
+                writer({"event": "section", "node": "proposal_draft", "title": title, "data": text})
+            return title, text
+
+        drafted.update(await asyncio.gather(*(stitch(title) for title in fixes)))
+        body = [(title, drafted[title]) for title, _ in body_sections]
+
+    if framing:
+        framed = await _draft_framing_sections(user_query, framing, body)
+        drafted.update(framed)
+        if writer:
+            for title in framing:
+                writer({"event": "section", "node": "proposal_draft", "title": title, "data": framed[title]})
+
+    return [{"title": title, "content": drafted[title]} for title, _ in sections]
+
+
+def assemble_proposal(sections: List[dict]) -> str:
+    return "\n\n".join(section["content"].strip() for section in sections if section["content"].strip())
@@ -9,6 +9,10 @@ This module defines the `critic` function, which improves a candidate proposal b
     - The language model then critiques the candidate by comparing it with the examples.
     - The improved version of the candidate is saved back to the state along with a message log.
 
+After a section-scoped revision (`revised_sections` in the state, see `rag_agent.revision`) only the
+rewritten sections are critiqued and spliced back; otherwise the whole candidate is, and it is split
+into `proposal_sections` again so the next revision can work section by section.
+
 This is useful in reflexion loops where an LLM self-critiques and refines its own output using contextual examples.
 """
 
@@ -16,8 +20,13 @@ This is useful in reflexion loops where an LLM self-critiques and refines its ow
 from reflexion_agent.state import State
 from utils import prompt_template
 from langchain_core.messages import AIMessage # type: ignore
-from langchain_openai import ChatOpenAI # type: ignore
 from langchain_core.prompts import ChatPromptTemplate # type: ignore
+from llm_gateway import llm_gateway
+from rag_agent.revision import split_sections
+from rag_agent.section_generation import assemble_proposal, proposal_sections
+from structure_agent.defined_proposal_strucutre import proposal_structure
+
+CRITIC_MODEL = "gpt-4o-2024-08-06"
 
 
 
@@ -48,7 +57,20 @@ from langchain_core.prompts import ChatPromptTemplate # type: ignore
 #     return state
 
 
-def critic(state: dict, config: dict) -> dict:
+async def critique(text: str, examples) -> str:
+    # Build the critique prompt
+    prompt = ChatPromptTemplate.from_template(prompt_template())
+    filled = prompt.invoke({
+        "generated_proposal": text,
+        "retrieved_proposal": examples
+    })
+
+    # Run the model and extract new content
+    response: AIMessage = await llm_gateway.ainvoke(CRITIC_MODEL, filled)
+    return response.content or text
+
+
+async def critic(state: dict, config: dict) -> dict:
     candidate_msg = state.get("candidate")
     retrieved = state.get("examples")
 
@@ -57,31 +79,39 @@ def critic(state: dict, config: dict) -> dict:
         state["status"] = "missing_inputs_for_critique"
         return state
 
-    # Instantiate the LLM
-    llm = ChatOpenAI(model="gpt-4o-2024-08-06", temperature=0)
-
-    # Build the critique prompt
-    prompt = ChatPromptTemplate.from_template(prompt_template())
-    filled = prompt.invoke({
-        "generated_proposal": candidate_msg.content,
-        "retrieved_proposal": retrieved
-    })
-
-    # Run the model and extract new content
-    response: AIMessage = llm.invoke(filled)
-    new_content = response.content or candidate_msg.content
+    sections = state.get("proposal_sections")
+    revised = (state.get("revised_sections") or []) if sections else []
+    if revised:
+        # ✂️ After a section-scoped revision only the rewritten sections are critiqued; the rest of
+        # the proposal stays exactly as the reviewer saw it
+        current = {section["title"]: section["content"] for section in sections}
+        critiqued = await critique("\n\n".join(current[title] for title in revised), retrieved)
+        rewritten = split_sections(critiqued, revised)
+        if rewritten is None:
+            print("[critic] Critique lost the section headings; keeping the revised sections as drafted")
+            rewritten = [{"title": title, "content": current[title]} for title in revised]
+        updated = {section["title"]: section["content"] for section in rewritten}
+        sections = [{"title": section["title"], "content": updated.get(section["title"], section["content"])} for section in sections]
+        new_content = assemble_proposal(sections)
+    else:
+        new_content = await critique(candidate_msg.content, retrieved)
+        # Keep the sections in step with the critiqued text, so a revision can splice into it
+        titles = [title for title, _ in proposal_sections(proposal_structure())]
+        sections = split_sections(new_content, titles)
 
     print("[critic] Critique Result Preview:", new_content[:500])
 
     # Save the updated candidate and append to messages
     state["candidate"] = AIMessage(content=new_content)
+    state["proposal_sections"] = sections
+    state["revised_sections"] = []
     state.setdefault("messages", []).append(AIMessage(content=new_content))
     return state
 
 
-def critic_with_counter(state: dict, config: dict) -> dict:
+async def critic_with_counter(state: dict, config: dict) -> dict:
     # Run original critic logic
-    new_state = critic(state, config)
+    new_state = await critic(state, config)
 
     # Increment loop counter
     loops = new_state.get("critic_loops", 0) + 1
@@ -0,0 +1,355 @@
+"""
+Per-tenant BM25 index over past proposals, used by `retrieve_examples` to fetch exemplars.
+
+Each tenant's index is built from its `proposals` table (winning proposals rank higher, by
+`EXEMPLAR_WINNING_BOOST`) and persisted as a single uncompressed `.npz` of flat arrays under
+`EXEMPLAR_INDEX_DIR/<db_name>.npz`:
+
+- the vocabulary and the chunk texts as UTF-8 bytes plus offsets,
+- the postings in CSR form (`indptr`, `term_ids`, `tfs`) with the length, proposal id and winning
+  flag of every chunk.
+
+Indexes are loaded on first use, at most `EXEMPLAR_INDEX_MAX_TENANTS` at a time per worker, and
+reloaded when another worker has rewritten the file. Storing a proposal appends its chunks to the
+tenant's index (`add_proposal`) instead of rebuilding it; BM25 statistics are derived from the
+postings at query time, so appends need no rescoring. Writers hold an exclusive `flock` on
+`<db_name>.lock`, so workers never overwrite each other's appends.
+
+Tenants without proposals fall back to the bundled CTBTO technical proposal, indexed in memory on
+first use (or by the background warm-up, see `components`).
+
+- `aget_tenant_index`: The tenant's index, built from the database on first use.
+- `add_proposal`: Appends a stored proposal to the tenant's index, if the index exists.
+- `aadd_proposal`: `add_proposal` off the event loop.
+- `fallback_index`: The index of the bundled example proposal.
+"""
+
+import asyncio
+import fcntl
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import List, Optional
+import numpy as np # type: ignore
+from components import lazy
+from config.appconfig import settings as app_settings
+from database.async_db import aget_proposals_after
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+BM25_K1 = 1.5
+BM25_B = 0.75
+_TOKEN_RE = re.compile(r"\w+")
+
+# Go up one level from reflexion_agent to src
+_FALLBACK_PDF = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "doc", "ctbto_rfq_no._2024-0108_cdga_technical_proposal.pdf"
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def chunk_text(text: str, max_chars: int) -> List[str]:
+    """Splits on blank lines and packs paragraphs into chunks of at most `max_chars` (longer paragraphs stay whole)."""
+    chunks, current = [], ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _pack_strings(strings: List[str]):
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(data: np.ndarray, offsets: np.ndarray) -> List[str]:
+    raw = data.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+class ExemplarIndex:
+    """BM25 over proposal chunks, stored as flat numpy arrays."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.mtime_ns = None
+        self.lock = threading.Lock()
+        self.vocab = {}
+        self.texts: List[str] = []
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.term_ids = np.zeros(0, dtype=np.int32)
+        self.tfs = np.zeros(0, dtype=np.uint16)
+        self.doc_len = np.zeros(0, dtype=np.int32)
+        self.proposal_ids = np.zeros(0, dtype=np.int64)
+        self.winning = np.zeros(0, dtype=bool)
+        self._posting_doc = None
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @property
+    def last_proposal_id(self) -> int:
+        return int(self.proposal_ids.max()) if len(self.proposal_ids) else 0
+
+    # ---------------- Building ----------------
+
+    def add_chunks(self, chunks: List[str], proposal_id: int = 0, is_winning: bool = False) -> None:
+        indptr, term_ids, tfs, doc_len = [], [], [], []
+        offset = int(self.indptr[-1])
+        for chunk in chunks:
+            tokens = tokenize(chunk)
+            ids = np.fromiter((self.vocab.setdefault(t, len(self.vocab)) for t in tokens), dtype=np.int32, count=len(tokens))
+            unique, counts = np.unique(ids, return_counts=True)
+            term_ids.append(unique.astype(np.int32))
+            tfs.append(np.minimum(counts, np.iinfo(np.uint16).max).astype(np.uint16))
+            offset += len(unique)
+            indptr.append(offset)
+            doc_len.append(len(tokens))
+        if not chunks:
+            return
+        self.texts.extend(chunks)
+        self.indptr = np.concatenate([self.indptr, np.asarray(indptr, dtype=np.int64)])
+        self.term_ids = np.concatenate([self.term_ids, *term_ids])
+        self.tfs = np.concatenate([self.tfs, *tfs])
+        self.doc_len = np.concatenate([self.doc_len, np.asarray(doc_len, dtype=np.int32)])
+        self.proposal_ids = np.concatenate([self.proposal_ids, np.full(len(chunks), proposal_id, dtype=np.int64)])
+        self.winning = np.concatenate([self.winning, np.full(len(chunks), bool(is_winning))])
+        self._posting_doc = None
+
+    def add_proposal(self, proposal_id: int, title: Optional[str], content: Optional[str], is_winning: bool) -> int:
+        if (self.proposal_ids == proposal_id).any():
+            return 0  # already indexed
+        text = f"{title}\n\n{content}" if title else (content or "")
+        chunks = chunk_text(text, app_settings.exemplar_chunk_chars)
+        self.add_chunks(chunks, proposal_id, is_winning)
+        return len(chunks)
+
+    # ---------------- Persistence ----------------
+
+    def save(self) -> None:
+        vocab_terms = sorted(self.vocab, key=self.vocab.get)
+        term_bytes, term_offsets = _pack_strings(vocab_terms)
+        text_bytes, text_offsets = _pack_strings(self.texts)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                format_version=np.asarray([FORMAT_VERSION]),
+                term_bytes=term_bytes, term_offsets=term_offsets,
+                text_bytes=text_bytes, text_offsets=text_offsets,
+                indptr=self.indptr, term_ids=self.term_ids, tfs=self.tfs, doc_len=self.doc_len,
+                proposal_ids=self.proposal_ids, winning=self.winning,
+            )
+        os.replace(tmp_path, self.path)
+        self.mtime_ns = os.stat(self.path).st_mtime_ns
+
+    def load(self) -> bool:
+        """Replaces the in-memory index with the file's; False when there is no (readable) file."""
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+            with np.load(self.path) as data:
+                if int(data["format_version"][0]) != FORMAT_VERSION:
+                    return False
+                terms = _unpack_strings(data["term_bytes"], data["term_offsets"])
+                self.texts = _unpack_strings(data["text_bytes"], data["text_offsets"])
+                self.indptr = data["indptr"]
+                self.term_ids = data["term_ids"]
+                self.tfs = data["tfs"]
+                self.doc_len = data["doc_len"]
+                self.proposal_ids = data["proposal_ids"]
+                self.winning = data["winning"]
+        except (OSError, KeyError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning("Could not load exemplar index %s: %s", self.path, e)
+            return False
+        self.vocab = {term: i for i, term in enumerate(terms)}
+        self.mtime_ns = mtime_ns
+        self._posting_doc = None
+        return True
+
+    def is_stale(self) -> bool:
+        try:
+            return os.stat(self.path).st_mtime_ns != self.mtime_ns
+        except OSError:
+            return False
+
+    # ---------------- Search ----------------
+
+    def search(self, query: str, k: int) -> List[str]:
+        n_docs = len(self.texts)
+        if not n_docs:
+            return []
+        query_ids = [self.vocab[t] for t in tokenize(query) if t in self.vocab]
+        if not query_ids:
+            return []
+        query_ids, query_counts = np.unique(np.asarray(query_ids, dtype=np.int32), return_counts=True)
+
+        if self._posting_doc is None:
+            self._posting_doc = np.repeat(np.arange(n_docs), np.diff(self.indptr))
+        mask = np.isin(self.term_ids, query_ids)
+        if not mask.any():
+            return []
+        hit_terms = self.term_ids[mask]
+        hit_docs = self._posting_doc[mask]
+        tf = self.tfs[mask].astype(np.float64)
+
+        # Document frequency of the query terms only
+        term_slot = np.searchsorted(query_ids, hit_terms)
+        df = np.bincount(term_slot, minlength=len(query_ids))
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)) * query_counts
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[hit_docs] / max(self.doc_len.mean(), 1))
+        scores = np.bincount(hit_docs, weights=idf[term_slot] * tf * (BM25_K1 + 1) / (tf + norm), minlength=n_docs)
+        scores[self.winning] *= app_settings.exemplar_winning_boost
+
+        k = min(k, n_docs)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [self.texts[i] for i in top if scores[i] > 0]
+
+
+# ---------------- Tenant registry ----------------
+
+_indexes: "OrderedDict[str, ExemplarIndex]" = OrderedDict()
+_registry_lock = threading.Lock()
+_build_locks = {}
+
+
+def _index_path(db_name: str) -> str:
+    return os.path.join(app_settings.exemplar_index_dir, f"{db_name}.npz")
+
+
+@contextmanager
+def _file_lock(db_name: str):
+    """Exclusive across workers: serialises the read-modify-write of a tenant's index file."""
+    os.makedirs(app_settings.exemplar_index_dir, exist_ok=True)
+    with open(os.path.join(app_settings.exemplar_index_dir, f"{db_name}.lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _cached(db_name: str) -> Optional[ExemplarIndex]:
+    with _registry_lock:
+        index = _indexes.get(db_name)
+        if index is not None:
+            _indexes.move_to_end(db_name)
+        return index
+
+
+def _remember(db_name: str, index: ExemplarIndex) -> None:
+    with _registry_lock:
+        _indexes[db_name] = index
+        _indexes.move_to_end(db_name)
+        while len(_indexes) > app_settings.exemplar_index_max_tenants:
+            _indexes.popitem(last=False)
+
+
+def _load_from_disk(db_name: str) -> Optional[ExemplarIndex]:
+    index = ExemplarIndex(_index_path(db_name))
+    with index.lock:
+        return index if index.load() else None
+
+
+def _append_and_save(db_name: str, index: ExemplarIndex, rows: List[dict]) -> int:
+    with _file_lock(db_name), index.lock:
+        if index.is_stale():
+            index.load()  # pick up what other workers appended first
+        added = sum(
+            index.add_proposal(row["proposal_id"], row["proposal_title"], row["proposal_content"], row["is_winning"])
+            for row in rows
+        )
+        index.save()
+    return added
+
+
+async def aget_tenant_index(db_user: str, db_name: str, db_password: str) -> ExemplarIndex:
+    index = _cached(db_name)
+    if index is not None:
+        if index.is_stale():
+            await asyncio.to_thread(_reload, index)
+        return index
+
+    # One build per tenant at a time; concurrent first requests wait for it
+    lock = _build_locks.setdefault(db_name, asyncio.Lock())
+    async with lock:
+        index = _cached(db_name)
+        if index is not None:
+            return index
+        index = await asyncio.to_thread(_load_from_disk, db_name) or ExemplarIndex(_index_path(db_name))
+        # Catch up with proposals stored while the index was not loaded anywhere (or never built)
+        rows = await aget_proposals_after(index.last_proposal_id, db_user, db_name, db_password)
+        if rows or index.mtime_ns is None:
+            added = await asyncio.to_thread(_append_and_save, db_name, index, rows)
+            logger.info("📚 Exemplar index for %s: %d chunks (%d new)", db_name, len(index), added)
+        _remember(db_name, index)
+        return index
+
+
+def _reload(index: ExemplarIndex) -> None:
+    with index.lock:
+        index.load()
+
+
+def add_proposal(db_name: str, proposal_id: int, title: Optional[str], content: Optional[str], is_winning: bool) -> None:
+    """
+    Appends one stored proposal. Tenants whose index has never been built are skipped: the first
+    `aget_tenant_index` builds it from the table, this proposal included.
+    """
+    index = _cached(db_name)
+    if index is None:
+        if not os.path.exists(_index_path(db_name)):
+            return
+        index = ExemplarIndex(_index_path(db_name))
+    try:
+        row = {"proposal_id": proposal_id, "proposal_title": title, "proposal_content": content, "is_winning": is_winning}
+        added = _append_and_save(db_name, index, [row])
+        logger.info("📚 Added proposal %s to the exemplar index of %s (%d chunks)", proposal_id, db_name, added)
+    except OSError as e:
+        # The index catches up from the table the next time a worker loads it
+        logger.warning("Could not update the exemplar index of %s: %s", db_name, e)
+
+
+async def aadd_proposal(db_name: str, proposal_id: int, title: Optional[str], content: Optional[str], is_winning: bool) -> None:
+    await asyncio.to_thread(add_proposal, db_name, proposal_id, title, content, is_winning)
+
+
+def _build_fallback_index() -> ExemplarIndex:
+    from document_processor import DocumentProcessor
+
+    index = ExemplarIndex()
+    if os.path.exists(_FALLBACK_PDF):
+        with open(_FALLBACK_PDF, "rb") as f:
+            pages = DocumentProcessor().extract_pdf(f.read()).pages
+        # One chunk per page, as the PDF retriever always had
+        index.add_chunks([page for page in pages if page.strip()])
+    else:
+        logger.warning("Fallback example proposal not found at %s", _FALLBACK_PDF)
+    return index
+
+
+_fallback = lazy("exemplar_fallback_index", _build_fallback_index)
+
+
+def fallback_index() -> ExemplarIndex:
+    return _fallback.get()
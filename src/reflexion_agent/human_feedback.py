@@ -2,17 +2,36 @@
 This module defines the human intervention node in the Reflexion Agent workflow.
 It halts the graph execution at a designated point to await human feedback before proceeding,
 enabling real-time review and control over automated reasoning steps.
+
+The run is checkpointed at the interrupt; `/api/resume` continues the same thread with
+`Command(resume=feedback)`, so `interrupt()` returns the reviewer's feedback here and only the
+revision loop (`proposal_draft` → `critic` → `human_interrupt`) runs again.
 """
 
-from reflexion_agent.state import State
-from langgraph.types import Command, interrupt # type: ignore
-from langgraph.graph import END # type: ignore
+from reflexion_agent.state import State, Status
+from langgraph.types import interrupt # type: ignore
+
 
+def feedback_status(feedback: str) -> Status:
+    feedback = feedback.lower()
+    if "approve" in feedback:
+        return Status.APPROVED
+    if "revise" in feedback:
+        return Status.NEEDS_REVISION
+    return Status.IN_PROGRESS
 
 
-def human_node(state: State):
+def human_node(state: State) -> dict:
     """Human Intervention node - waits for feedback before proceeding"""
     print("\n[human_node] awaiting human feedback...")
-    
-    # Interrupt the graph execution to wait for human input
-    return interrupt("Please provide feedback to continue...")
\ No newline at end of file
+
+    # Interrupt the graph execution to wait for human input; resuming returns the feedback
+    feedback = str(interrupt("Please provide feedback to continue...") or "")
+    status = feedback_status(feedback)
+    print(f"[human_node] feedback received, status: {status.value}")
+
+    update = {"status": status, "interrupt_type": "proposal_review"}
+    if status == Status.NEEDS_REVISION:
+        update["human_feedback"] = [feedback]
+        update["iteration"] = (state.get("iteration") or 0) + 1
+    return update
@@ -1,65 +1,31 @@
 """
-This module loads a PDF document and sets up a retriever to find similar examples from it.
+This module retrieves similar past proposals of the current tenant to use as examples.
 
-- It uses `PyPDFLoader` to read and split a PDF into separate text chunks (documents).
-- Then it creates a `BM25Retriever`, which is a simple text search engine that ranks documents based on keyword relevance.
+- Examples come from the tenant's own `proposals` table through a per-tenant BM25 index
+  (see `reflexion_agent.exemplar_index`), loaded on first use and kept up to date as proposals are stored.
+- Tenants that have no proposals yet get examples from the bundled example proposal PDF instead.
 - The `retrieve_examples` function takes in the current application state and a configuration object:
-    - It extracts the user's current proposal (from state).
-    - It searches for the top `k` most relevant past examples from the PDF.
-    - It returns these examples wrapped in tags, ready to be used for comparison or critique.
+    - It extracts the user's query (from state).
+    - It searches for the top `k` most relevant past examples (`k` in the configurable, else `EXEMPLAR_TOP_K`).
+    - It returns these examples joined together, ready to be used for comparison or critique.
 
 This is helpful for applications where a user writes proposals, and you want to fetch past examples to improve or critique the new one.
 """
 
-import os
-from langchain_community.document_loaders import PyPDFLoader # type: ignore
-from langchain_unstructured import UnstructuredLoader # type: ignore
+import asyncio
+import logging
 from langchain_core.runnables import RunnableConfig # type: ignore
-from langchain_core.messages.ai import AIMessage # type: ignore
-from langchain_community.retrievers import BM25Retriever # type: ignore
+from config.appconfig import settings as app_settings
+from models.users_utilities import lookup_user_db_credentials, run_session
+from reflexion_agent.exemplar_index import aget_tenant_index, fallback_index
 from reflexion_agent.state import State
 
-# Go up one level from reflexion_agent to src
-base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-file_path = os.path.join(base_dir, "doc", "ctbto_rfq_no._2024-0108_cdga_technical_proposal.pdf")
 
+def _search(index, query: str, k: int):
+    # The lock keeps a concurrent append from swapping the arrays mid-search
+    with index.lock:
+        return index.search(query, k)
 
-# Load PDF
-if os.path.exists(file_path):
-    print(f"Loading PDF: {file_path}")
-    loader = PyPDFLoader(file_path)
-    documents = loader.load()
-    print(f"Successfully loaded {len(documents)} pages.")
-else:
-    raise FileNotFoundError(f"The file was not found at: {file_path}")
-
-
-retriever = BM25Retriever.from_documents(documents)
-
-
-# def retrieve_examples(state: State, config: RunnableConfig):
-#     top_k = config["configurable"].get("k") or 2
-#     query = state["candidate"].content.strip()  # it's just a string now
-
-#     if not query:
-#         raise ValueError("No candidate proposal to critique.")
-
-#     retrieved_docs = retriever.invoke(query)[:top_k]
-#     examples_str = "\n---\n".join(doc.page_content for doc in retrieved_docs)
-
-#     print("[retrieve_examples] Retrieved Examples Preview:", examples_str[:500])
-
-#     examples_str = f"""You previously wrote the following proposals:
-#     <RetrievedProposals>
-#     {examples_str}
-#     </RetrievedProposals>
-    
-#     Critique the current proposal by comparing it to the above."""
-
-#     state["examples"] = examples_str
-#     state["status"] = "examples_retrieved"
-
-#     return state
 
 async def retrieve_examples(state: State, config: RunnableConfig) -> dict:
     # Perform retrieval
@@ -67,16 +33,22 @@ async def retrieve_examples(state: State, config: RunnableConfig) -> dict:
     if not query:
         raise ValueError("No user query provided for retrieval.")
 
-    docs = retriever.invoke(query)  # fetch all relevant docs
+    top_k = (config or {}).get("configurable", {}).get("k") or app_settings.exemplar_top_k
 
-    # Store complete documents for later use
-    state["retrieved_docs"] = docs
+    docs = []
+    email = run_session(config).get("email")
+    if email:
+        db_user, db_name, db_password, _ = lookup_user_db_credentials(email)
+        index = await aget_tenant_index(db_user, db_name, db_password)
+        # BM25 scoring is CPU-bound; keep it off the event loop so the parallel branches can progress
+        docs = await asyncio.to_thread(_search, index, query, top_k)
+    if not docs:
+        logging.info("[retrieve_examples] No tenant exemplars matched, using the example proposal")
+        docs = await asyncio.to_thread(_search, await asyncio.to_thread(fallback_index), query, top_k)
 
     # For critique/comparison contexts, concatenate full content
-    examples_str = "\n---\n".join(doc.page_content for doc in docs)
+    examples_str = "\n---\n".join(docs)
     print("[retrieve_examples] Retrieved examples preview:", examples_str[:500])
 
-    state["examples"] = examples_str
-    state["status"] = "examples_retrieved"
-
-    return state
+    # Partial update: this node runs in parallel with structure_node and expand_query
+    return {"examples": examples_str, "status": "examples_retrieved"}
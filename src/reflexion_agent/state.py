@@ -43,7 +43,9 @@ class State(TypedDict):
     user_id: str
     structure: ProposalStructure      # <-- hold the dict here
     structure_message: AIMessage
-    session_data: dict
+    expanded_query: str
+    proposal_sections: list           # [{"title", "content"}] of the current candidate, when it splits into sections
+    revised_sections: list            # titles rewritten by the last revision; the critic reviews only these
     needs_clarification: bool
     response_type: str
     intent_route: str
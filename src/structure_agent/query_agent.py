@@ -1,10 +1,9 @@
 import json
 import logging
-from openai import AsyncOpenAI # type: ignore
 from fastapi import HTTPException # type: ignore
 from utils import query_agent_prompt
 from langchain_core.messages import AIMessage # type: ignore
-from config.appconfig import settings as app_settings
+from llm_gateway import llm_gateway
 
 
 # async def query_understanding_agent(state: dict, config: dict) -> dict:
@@ -57,17 +56,15 @@ async def query_understanding_agent(state: dict, config: dict) -> dict:
 
     system_prompt = query_agent_prompt(user_query)  # define this prompt
 
-    client = AsyncOpenAI(api_key=app_settings.openai_api_key)
-    response = await client.chat.completions.create(
-        model="gpt-4-1106-preview",
-        messages=[
+    response = await llm_gateway.achat(
+        [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_query}
         ],
-        temperature=0.0
+        model="gpt-4-1106-preview"
     )
 
-    raw = response.choices[0].message.content.strip()
+    raw = response.strip()
     logging.info("Raw response: %s", raw)
     if not raw:
         raise ValueError("query_understanding_agent got empty response from LLM")
@@ -1,15 +1,23 @@
 from typing import TypedDict, List, Literal
 from datamodel import ProposalStructure
-from langchain_core.runnables import Runnable  # type: ignore
-from langchain_openai import ChatOpenAI # type: ignore
 from langchain_core.messages import AIMessage # type: ignore
 from langchain_core.prompts import ChatPromptTemplate # type: ignore
 from reflexion_agent.state import State
 from structure_agent.defined_proposal_strucutre import proposal_structure
+from llm_cache import llm_cache
+from components import lazy
+from llm_gateway import llm_gateway
 
+# Bump whenever the structure prompt or schema changes
+STRUCTURE_PROMPT_VERSION = "1"
+llm_cache.register("structure_node", STRUCTURE_PROMPT_VERSION)
 
-def create_structure_agent() -> Runnable:
-    structure_prompt = ChatPromptTemplate.from_messages([
+
+STRUCTURE_MODEL = "gpt-4o-2024-08-06"
+
+
+def create_structure_prompt() -> ChatPromptTemplate:
+    return ChatPromptTemplate.from_messages([
         (
             "system",
             """You are a smart technical proposal structuring agent. Based on the user query below, determine:
@@ -36,23 +44,28 @@ def create_structure_agent() -> Runnable:
     ])
 
 
-    llm = ChatOpenAI(model="gpt-4o-2024-08-06", temperature=0)
-    return structure_prompt | llm.with_structured_output(schema=ProposalStructure)
+structure_prompt = lazy("structure_prompt", create_structure_prompt)
 
 
-structure_agent = create_structure_agent()
+async def structure_node(state: State) -> dict:
+    query = state["user_query"]
 
+    async def classify() -> dict:
+        structure = await llm_gateway.ainvoke(
+            STRUCTURE_MODEL, structure_prompt.get().format_messages(query=query), schema=ProposalStructure
+        )
+        return dict(structure)
 
-def structure_node(state: State) -> State:
-    query = state["user_query"]
-    structure_generation = structure_agent.invoke({"query": query})
+    structure_generation = await llm_cache.aget_or_compute("structure_node", STRUCTURE_PROMPT_VERSION, query, classify)
     # Override structure with client-defined structure if it's a full proposal
     if structure_generation["type"] == "full_proposal":
         structure_generation = proposal_structure()
-    # Store the structure both as dict (for use) and as AIMessage (for LangChain message tracking)
-    state["structure"] = structure_generation
-    state["structure_message"] = AIMessage(content=str(structure_generation))
-    return state
+    # Store the structure both as dict (for use) and as AIMessage (for LangChain message tracking).
+    # Only the keys written here are returned: this node runs in parallel with other branches.
+    return {
+        "structure": structure_generation,
+        "structure_message": AIMessage(content=str(structure_generation))
+    }
 
 
 
@@ -0,0 +1,175 @@
+"""
+Per-node latency, LLM call, token and cost metrics for the LangGraph workflows, exported in the
+Prometheus text format on `/api/metrics`.
+
+`create_state_graph` wraps every node with `trace_node`. While a node runs, its labels (node, tenant,
+path) sit in a context variable, so each LLM call the node makes through `llm_gateway` is attributed
+to it by `record_llm_call`. Calls made outside the graph (ingestion, memory workers) are labelled
+`node="none"`.
+
+LightRAG runs its LLM and embedding functions in long-lived worker tasks that keep the context of
+whichever caller started them, so their calls cannot be traced back to a node or tenant. The
+gateway's LightRAG functions record them under `node="lightrag"` (see `attribute_to`). The one
+exception is a streamed answer, which the node iterates itself and so stays attributed to it.
+
+Labels:
+- `tenant`: the `user_id` of the run (from the config, else the state), `unknown` when neither is set.
+- `path`: `direct`, `factual` or `proposal` once the routers have decided, `routing` before that.
+
+Costs are estimates from `MODEL_PRICES` (USD per 1M tokens); models missing from the table count
+tokens but no cost.
+
+- `trace_node`: Wraps a graph node so its runs are timed and its LLM calls attributed.
+- `record_llm_call`: Records one LLM call and its token usage against the current node.
+- `attribute_to`: Records the LLM calls made inside it under a fixed node label.
+- `render_metrics`: The Prometheus exposition of every metric.
+"""
+
+import functools
+import inspect
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, NamedTuple, Optional
+from langgraph.config import get_config # type: ignore
+from langgraph.errors import GraphBubbleUp # type: ignore
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# USD per 1M (prompt, completion) tokens; dated snapshots fall back to their family by prefix
+MODEL_PRICES = {
+    "gpt-4o-search-preview": (2.50, 10.00),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4-1106-preview": (10.00, 30.00),
+    "gpt-3.5-turbo-instruct": (1.50, 2.00),
+    "text-embedding-3-large": (0.13, 0.0),
+    "text-embedding-3-small": (0.02, 0.0),
+}
+
+NODE_DURATION = Histogram(
+    "graph_node_duration_seconds", "Wall time of a graph node run",
+    ["node", "tenant", "path"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160)
+)
+NODE_ERRORS = Counter("graph_node_errors_total", "Graph node runs that raised", ["node", "tenant", "path"])
+LLM_CALLS = Counter("llm_calls_total", "LLM API calls", ["node", "tenant", "path", "model"])
+LLM_TOKENS = Counter("llm_tokens_total", "LLM tokens by kind (prompt/completion)", ["node", "tenant", "path", "model", "kind"])
+LLM_COST = Counter("llm_cost_usd_total", "Estimated LLM cost in USD", ["node", "tenant", "path", "model"])
+
+
+class NodeLabels(NamedTuple):
+    node: str
+    tenant: str
+    path: str
+
+
+_OUTSIDE_GRAPH = NodeLabels("none", "unknown", "none")
+_current_node: ContextVar[NodeLabels] = ContextVar("current_graph_node", default=_OUTSIDE_GRAPH)
+
+
+def _path_of(state: dict) -> str:
+    if state.get("intent_route") == "direct":
+        return "direct"
+    response_type = state.get("response_type")
+    if response_type == "full_proposal":
+        return "proposal"
+    if response_type == "simple_answer":
+        return "factual"
+    return "routing"
+
+
+def _labels(node: str, state) -> NodeLabels:
+    state = state if isinstance(state, dict) else {}
+    try:
+        # The run config, also for nodes whose signature does not ask for it
+        configurable = get_config().get("configurable", {})
+    except RuntimeError:
+        configurable = {}
+    tenant = configurable.get("user_id") or state.get("user_id") or "unknown"
+    return NodeLabels(node, str(tenant), _path_of(state))
+
+
+def _model_price(model: str) -> Optional[tuple]:
+    if model in MODEL_PRICES:
+        return MODEL_PRICES[model]
+    # Longest prefix first, so "gpt-4o-2024-08-06" does not match "gpt-4"
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model.startswith(name):
+            return MODEL_PRICES[name]
+    return None
+
+
+def record_llm_call(model: str, prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+    labels = _current_node.get()
+    LLM_CALLS.labels(*labels, model).inc()
+    LLM_TOKENS.labels(*labels, model, "prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(*labels, model, "completion").inc(completion_tokens)
+    price = _model_price(model)
+    if price is not None:
+        LLM_COST.labels(*labels, model).inc((prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000)
+
+
+@contextmanager
+def attribute_to(node: str) -> Iterator[None]:
+    """For calls whose caller is unknown (e.g. LightRAG's workers): no tenant, no path."""
+    token = _current_node.set(NodeLabels(node, "unknown", "none"))
+    try:
+        yield
+    finally:
+        _current_node.reset(token)
+
+
+def trace_node(name: str, fn: Callable) -> Callable:
+    """
+    Returns `fn` wrapped for tracing. `functools.wraps` keeps the original signature visible, so
+    LangGraph still injects `config`, `store` and `writer`, and sync nodes stay sync.
+    """
+    def start(state):
+        labels = _labels(name, state)
+        return labels, _current_node.set(labels), time.perf_counter()
+
+    def finish(labels, token, started, failed):
+        _current_node.reset(token)
+        NODE_DURATION.labels(*labels).observe(time.perf_counter() - started)
+        if failed:
+            NODE_ERRORS.labels(*labels).inc()
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def traced(state, *args, **kwargs):
+            labels, token, started = start(state)
+            failed = False
+            try:
+                return await fn(state, *args, **kwargs)
+            except GraphBubbleUp:
+                # interrupt() and other control-flow signals are not failures
+                raise
+            except Exception:
+                failed = True
+                raise
+            finally:
+                finish(labels, token, started, failed)
+    else:
+        @functools.wraps(fn)
+        def traced(state, *args, **kwargs):
+            labels, token, started = start(state)
+            failed = False
+            try:
+                return fn(state, *args, **kwargs)
+            except GraphBubbleUp:
+                # interrupt() and other control-flow signals are not failures
+                raise
+            except Exception:
+                failed = True
+                raise
+            finally:
+                finish(labels, token, started, failed)
+    return traced
+
+
+def render_metrics() -> tuple:
+    """`(body, content_type)` for the metrics endpoint."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -38,6 +38,7 @@
 # print(censored_text)
 
 from structure_agent.defined_proposal_strucutre import proposal_structure
+import asyncio
 from utils import generate_explicit_query
 from pprint import pprint
 
@@ -49,6 +50,6 @@ if __name__ == "__main__":
     structure_proposal = proposal_structure()
 
     print("Testing generate_explicit_query...")
-    queries = generate_explicit_query(user_query, structure_proposal)
+    queries = asyncio.run(generate_explicit_query(user_query, structure_proposal))
     pprint(queries)
 
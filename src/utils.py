@@ -8,9 +8,11 @@ Text processing functions for cleaning and formatting content.
 - `remove_non_ascii`: Removes non-ASCII characters from the text.
 - `clean_text`: Combines all cleaning functions to process and clean text content.
 - `format_response`: Splits and formats chatbot responses into readable sentences.
+- `generate_explicit_query` / `query_expansion`: Async LLM query expansion, memoized in the LLM response cache.
 """
 
 import ast
+import hashlib
 import json
 import logging
 import re
@@ -20,12 +22,20 @@ from intent_router.intent_router import detect_intent
 from structure_agent.defined_proposal_strucutre import proposal_structure
 from langchain_core.documents import Document # type: ignore
 from unstructured.cleaners.core import (clean, clean_non_ascii_chars, replace_unicode_quotes) # type: ignore
-from langchain_openai import OpenAI # type: ignore
-from config.appconfig import settings as app_settings
 from langchain_core.messages import AIMessage # type: ignore
+from llm_cache import llm_cache
+from llm_gateway import llm_gateway
 
 proposal_structure_json = json.dumps(proposal_structure(), indent=2)
 
+# Query expansion runs at temperature 0, so its output is memoized per normalized query, structure
+# and model. Bump the prompt version whenever one of the expansion prompts below changes.
+EXPANSION_MODEL = "gpt-3.5-turbo-instruct"
+EXPLICIT_QUERY_PROMPT_VERSION = "1"
+QUERY_EXPANSION_PROMPT_VERSION = "1"
+llm_cache.register("explicit_query", f"{EXPLICIT_QUERY_PROMPT_VERSION}:{EXPANSION_MODEL}")
+llm_cache.register("query_expansion", f"{QUERY_EXPANSION_PROMPT_VERSION}:{EXPANSION_MODEL}")
+
 
 def unbold_text(text):
     # Mapping of bold numbers to their regular equivalents
@@ -289,9 +299,8 @@ def parse_response_for_doc_ids(response):
 #     return resp.strip()
 
 
-def generate_explicit_query(query: str, structure: ProposalStructure) -> str:
+async def generate_explicit_query(query: str, structure: ProposalStructure) -> str:
     """Expands the user query using the structure and merges it into a single, explicit query."""
-    llm = OpenAI(temperature=0, openai_api_key=app_settings.openai_api_key)
 
     # 🛠️ Parse structure if it's an AIMessage
     if hasattr(structure, "content"):
@@ -417,17 +426,23 @@ def generate_explicit_query(query: str, structure: ProposalStructure) -> str:
     Final Explicit Query:
     "…"
     """
+    async def expand() -> str:
+        response = await llm_gateway.acomplete(prompt, model=EXPANSION_MODEL)
+        return response.strip()
+
+    structure_hash = hashlib.sha256(json.dumps(structure, sort_keys=True, default=str).encode("utf-8")).hexdigest()
     try:
-        response = llm.invoke(prompt)
+        return await llm_cache.aget_or_compute(
+            "explicit_query", f"{EXPLICIT_QUERY_PROMPT_VERSION}:{EXPANSION_MODEL}",
+            f"{structure_hash}\n{query}", expand
+        )
     except Exception as e:
         print("[generate_explicit_query] Exception during LLM call:", str(e))
         return ""
-    return response.strip()
 
 
-def query_expansion(query: str) -> str:
+async def query_expansion(query: str) -> str:
     """Expands the user query using the structure and merges it into a single, explicit query."""
-    llm = OpenAI(temperature=0, openai_api_key=app_settings.openai_api_key)
 
 
     prompt = f"""
@@ -456,12 +471,17 @@ def query_expansion(query: str) -> str:
     "…"
     """
 
+    async def expand() -> str:
+        response = await llm_gateway.acomplete(prompt, model=EXPANSION_MODEL)
+        return response.strip()
+
     try:
-        response = llm.invoke(prompt)
+        return await llm_cache.aget_or_compute(
+            "query_expansion", f"{QUERY_EXPANSION_PROMPT_VERSION}:{EXPANSION_MODEL}", query, expand
+        )
     except Exception as e:
-        print("[generate_explicit_query] Exception during LLM call:", str(e))
+        print("[query_expansion] Exception during LLM call:", str(e))
         return ""
-    return response.strip()
 
 
 
@@ -574,6 +594,124 @@ def proposal_prompt(user_query: str, structure: dict, retrieved_docs: list[Docum
     Generate a full draft proposal now:
     """
 
+def section_prompt(user_query: str, title: str, outline: dict, retrieved_docs: list[Document], feedback=None) -> str:
+    """Prompt for drafting one section of a full proposal; the sections are drafted concurrently."""
+    feedback_block = f"""
+    Previous Feedback to Improve: {feedback}
+    Incorporate this feedback where it applies to this section.
+    """ if feedback else ""
+    return f"""
+    You are CDGA-AI, a proposal-writing agent writing on behalf of CDGA.
+
+    **Example (bad):**
+    "We can help with this project by applying general engineering principles."
+
+    **Example (good):**
+    "CDGA will leverage its established expertise in sustainable civil infrastructure to design and implement resilient water systems, 
+    building on its prior success delivering projects across Sub-Saharan Africa in collaboration with UNDP and the African Union."
+
+    A full technical proposal is being written in response to the user query:
+    "{user_query}"
+
+    Write ONLY the section "{title}". Other sections are written separately, so do not repeat their content.
+    Start with the heading "{title}", then cover every subsection and phase below, in order, even if the context
+    doesn’t fully support it—create placeholders in those cases.
+    Use numbered lists and clear, concise technical language.
+
+    <section_outline>
+    {json.dumps(outline, indent=2)}
+    </section_outline>
+
+    <context>
+    {retrieved_docs}
+    </context>
+    {feedback_block}
+    Generate the "{title}" section now:
+    """
+
+
+def framing_prompt(user_query: str, titles: list, body: str) -> str:
+    """Prompt for the sections that summarise the rest of the proposal, written once the body is drafted."""
+    return f"""
+    You are CDGA-AI, a proposal-writing agent writing on behalf of CDGA.
+
+    The body of a technical proposal responding to "{user_query}" has been drafted section by section:
+
+    <proposal_body>
+    {body}
+    </proposal_body>
+
+    Write the sections {", ".join(f'"{title}"' for title in titles)} of this proposal. They must be consistent with
+    the body: same names, figures, phases and commitments, and no facts the body does not contain.
+    Write clearly and professionally, as if the response will be reviewed by a technical evaluation committee.
+
+    Return a JSON object whose keys are exactly the section titles and whose values are the section texts
+    (each starting with its heading).
+    """
+
+def consistency_prompt(user_query: str, body: str) -> str:
+    """Prompt for the stitching pass that finds contradictions between independently drafted sections."""
+    return f"""
+    You are reviewing a technical proposal responding to "{user_query}". Its sections were drafted
+    independently, so they may disagree with each other:
+
+    <proposal_body>
+    {body}
+    </proposal_body>
+
+    Find the places where sections contradict each other or repeat each other at length: different names,
+    figures, dates, durations, phases or commitments for the same thing, or the same content written twice.
+    Ignore style and wording. For each section that must change, say exactly what to change so the
+    proposal reads as one consistent document.
+
+    Return a JSON object: {{"fixes": [{{"section": "<exact section title>", "fix": "<what to change>"}}, ...]}}
+    or {{"fixes": []}} when the sections are consistent.
+    """
+
+def section_revision_prompt(user_query: str, title: str, outline: dict, current_text: str, feedback: str, retrieved_docs) -> str:
+    """Prompt for rewriting one section of an existing proposal after reviewer feedback."""
+    return f"""
+    You are CDGA-AI, a proposal-writing agent writing on behalf of CDGA.
+
+    A technical proposal responding to "{user_query}" is under review. The reviewer asked:
+    "{feedback}"
+
+    Rewrite ONLY the section "{title}" to address this feedback. Keep everything in it that the feedback
+    does not concern, keep its heading and the subsections and phases of its outline, and do not add
+    content that belongs to other sections.
+
+    <section_outline>
+    {json.dumps(outline, indent=2)}
+    </section_outline>
+
+    <current_section>
+    {current_text}
+    </current_section>
+
+    <context>
+    {retrieved_docs}
+    </context>
+
+    Return the revised "{title}" section only:
+    """
+
+
+def revision_targets_prompt(feedback: str, outline: dict) -> str:
+    """Prompt mapping reviewer feedback to the proposal sections it concerns."""
+    return f"""
+    A reviewer gave this feedback on a technical proposal:
+    "{feedback}"
+
+    The proposal has these sections (with their subsections and phases):
+    {json.dumps(outline, indent=2)}
+
+    Which sections must be rewritten to address the feedback? Pick as few as possible. If the feedback
+    concerns the whole document (tone, length, formatting, every section), answer "all".
+
+    Return a JSON object: {{"sections": ["<exact section title>", ...]}} or {{"sections": "all"}}.
+    """
+
+
 def factual_prompt(user_query: str) -> str:
     return f"""
     User Query:
@@ -740,17 +878,18 @@ def prompt_template():
     3. Suggest specific changes to the **Generated Proposal** to make it more aligned with the **Retrieved Proposal**. These changes should include improvements in structure, content, language, and any other relevant details.
     4. If there are any inconsistencies, clarify them and suggest how the **Generated Proposal** can be modified to address these inconsistencies.
 
-    Return your feedback and the revised **Generated Proposal** in the same format as the **Generated Proposal**.
+    Apply these changes and return ONLY the revised **Generated Proposal**, in the same format as the
+    **Generated Proposal** and with the same section headings, in the same order.
 
     **Generated Proposal:**
-    {{candidate}}
+    {generated_proposal}
 
     **Retrieved Proposal:**
-    {{examples_str}}
+    {retrieved_proposal}
 
     ---
 
-    Please provide a detailed critique of the **Generated Proposal** based on the **Retrieved Proposal**.
+    Return the revised **Generated Proposal** now.
     """
 
 def sql_expert_prompt() -> str: